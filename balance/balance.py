@@ -1,7 +1,5 @@
-import json
-import requests
 from client import client as c
-from typing import Optional
+from typing import NamedTuple, Optional
 import validation as v
 
 class ResultBalance:
@@ -10,6 +8,15 @@ class ResultBalance:
         self.amount = amount
 
 
+class CompactResultBalance(NamedTuple):
+    """Tuple-backed ResultBalance returned when the client has compact_results enabled."""
+    type: str
+    amount: float
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
 BALANCE_URI_PATH = "/balance"
 
 
@@ -22,25 +29,83 @@ class Balance:
         """
         self.result = result
 
-    def get(client: c.Client):
+    def get(client: c.Client, timeout=None, deadline=None, refresh=False):
         """
         Returns the current balance of the account.
 
+        If the client has a balance_cache with a fresh balance, it is returned without a request.
+
         :param client: A Client object containing API authentication details.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+        :param refresh: If True, ask the API even if a cached balance is available.
         :raises TypeError: If client parameter is not an instance of Client class.
         :return: A Balance object containing the current account balance.
         """
         v.validate([client],[c.Client],"client")
+        cached = cached_balance(client, refresh)
+        if cached is not None:
+            return cached
+        url = client.endpoint + BALANCE_URI_PATH
+
+        response = client.request(url, client.content_type_json, {"text": ""}, timeout=timeout, deadline=deadline)
+        return balance_from_response(response, client)
+
+    def refresh(client: c.Client, timeout=None, deadline=None):
+        """
+        Fetches the current balance from the API and updates the client balance_cache.
+
+        :param client: A Client object containing API authentication details.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+        :return: A Balance object containing the current account balance.
+        """
+        return Balance.get(client, timeout, deadline, refresh=True)
+
+    async def get_async(client: c.AsyncClient, timeout=None, deadline=None, refresh=False):
+        """
+        Asynchronous version of Balance.get using an AsyncClient.
+
+        :param client: An AsyncClient object containing API authentication details.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+        :param refresh: If True, ask the API even if a cached balance is available.
+        :return: A Balance object containing the current account balance.
+        """
+        v.validate([client],[c.AsyncClient],["client"])
+        cached = cached_balance(client, refresh)
+        if cached is not None:
+            return cached
         url = client.endpoint + BALANCE_URI_PATH
 
-        response = client.request(url, client.content_type_json, {"text": ""})
-        status_code = response["code"]
-        body_byte = response["content"]
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Balance(result=error)
-
-        result = json.loads(body_byte)
-        result = ResultBalance(type=result["type"], amount=result["amount"])
-        return Balance(result=result.__dict__)
+        response = await client.request(url, client.content_type_json, {"text": ""}, timeout=timeout, deadline=deadline)
+        return balance_from_response(response, client)
+
+
+def cached_balance(client, refresh: bool = False) -> Optional[Balance]:
+    if refresh or client.balance_cache is None:
+        return None
+    result = client.balance_cache.get()
+    if result is None or result["type"] is None:
+        # Only sends filled the cache; they do not report the balance type.
+        return None
+    if client.compact_results:
+        return Balance(result=CompactResultBalance(result["type"], result["amount"]))
+    return Balance(result=result)
+
+
+def balance_from_response(response: dict, client=None) -> Balance:
+    error = c.error_from_response(response)
+    if error is not None:
+        return Balance(result=error)
+    result = c.decode_json(response["content"], client)
+    if client is not None and client.compact_results:
+        result = CompactResultBalance(result["type"], result["amount"])
+        if client.balance_cache is not None:
+            client.balance_cache.set(result.to_dict())
+        return Balance(result=result)
+    result = ResultBalance(type=result["type"], amount=result["amount"])
+    if client is not None and client.balance_cache is not None:
+        client.balance_cache.set(result.__dict__)
+    return Balance(result=result.__dict__)
+
@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class BalanceCache:
+    """
+    Keeps the account balance locally so that balance checks do not need a request.
+
+    The cache is filled by Balance.get and kept up to date from the remaining_balance of every
+    SMS result, so while messages are being sent it rarely expires. Results of concurrent sends
+    arrive in any order and sends only lower the balance, so within the ttl a send can only lower
+    the cached balance, like BulkResult.remaining_balance; Balance.get always replaces it. Sends do
+    not report the balance type: until Balance.get has filled the cache its type is None, and
+    Balance.get asks the API once instead of answering from it. Pass it to Client or AsyncClient
+    as balance_cache. It is safe to share between threads.
+
+    :param ttl: Seconds a balance stays valid after it was last updated.
+    :param low_balance_threshold: Optional amount under which on_low_balance is called.
+    :param on_low_balance: Optional callable receiving the amount when the balance drops under the
+        threshold. It is called once per crossing, and again only after the balance went back up.
+    """
+
+    def __init__(self, ttl: float = 60.0, low_balance_threshold: Optional[float] = None,
+                 on_low_balance: Optional[Callable[[float], None]] = None):
+        self.ttl = ttl
+        self.low_balance_threshold = low_balance_threshold
+        self.on_low_balance = on_low_balance
+        self.type = None
+        self.amount = None
+        self.updated = None
+        self._estimated = False
+        self._low = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[dict]:
+        """
+        Returns the cached balance in the same form as Balance.get, or None if it is missing or expired.
+        """
+        with self._lock:
+            if self.amount is None or time.monotonic() - self.updated >= self.ttl:
+                return None
+            return {"type": self.type, "amount": self.amount}
+
+    def set(self, result: dict):
+        """
+        Stores a balance returned by the API.
+
+        :param result: A ResultBalance dictionary with type and amount.
+        """
+        with self._lock:
+            self.type = result["type"]
+            crossed = self._store(result["amount"])
+        self._notify(crossed)
+
+    def update(self, remaining_balance: float):
+        """
+        Stores the remaining balance reported by a send, unless a lower balance reported by the API
+        is still fresh: that one comes from a send that was processed later.
+
+        :param remaining_balance: The remaining_balance of a ResultSms.
+        """
+        with self._lock:
+            fresh = self.amount is not None and time.monotonic() - self.updated < self.ttl
+            if fresh and not self._estimated and remaining_balance >= self.amount:
+                return
+            crossed = self._store(remaining_balance)
+        self._notify(crossed)
+
+    def debit(self, amount: float):
+        """
+        Subtracts a locally estimated cost from the cached balance, before the API reports it.
+
+        :param amount: The amount to subtract.
+        """
+        with self._lock:
+            if self.amount is None:
+                return
+            crossed = self._store(self.amount - amount, estimated=True)
+        self._notify(crossed)
+
+    def invalidate(self):
+        """Forgets the cached balance, so the next Balance.get asks the API."""
+        with self._lock:
+            self.amount = None
+
+    def _store(self, amount: float, estimated: bool = False) -> Optional[float]:
+        # Called with the lock held; returns the amount if the balance just dropped under the
+        # threshold, so the callback gets this value even if another thread changes it first.
+        self.amount = amount
+        self.updated = time.monotonic()
+        self._estimated = estimated
+        low = self.low_balance_threshold is not None and amount < self.low_balance_threshold
+        crossed = low and not self._low
+        self._low = low
+        return amount if crossed else None
+
+    def _notify(self, crossed: Optional[float]):
+        if crossed is not None and self.on_low_balance is not None:
+            self.on_low_balance(crossed)
@@ -0,0 +1,288 @@
+"""
+Measures the throughput, latency, CPU and memory of the library against a local mock API.
+
+    python -m benchmark.benchmark --output results.json
+    python -m benchmark.benchmark --latency 0.02 --error-rate 0.01 --compare baseline.json
+
+Every scenario runs twice: once for throughput, latency and CPU, and once under tracemalloc for
+peak memory. CPU is the process time of the benchmark process; with the default in-process mock
+it includes the mock server, so pass --endpoint with a mock started by python -m benchmark.server
+to measure the client alone.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional
+
+from balance.balance import Balance
+from benchmark.server import MockMovider, scheduled_item, sms_result
+from client import client as c
+from client.pool import api_error
+from sms import bulk
+from sms import sms as s
+from verify.verify import Verify
+
+
+class Calls(NamedTuple):
+    """
+    Outcome of a scenario run: the latency in seconds of every successful call, and the number of
+    calls and messages that failed, with an API error or an exception.
+    """
+    latencies: List[float]
+    errors: int = 0
+    failed_messages: int = 0
+
+
+class Scenario:
+    """
+    A benchmark: run(client) performs `requests` API calls sending `messages` messages, and
+    returns their Calls.
+    """
+
+    def __init__(self, name: str, run: Callable[[c.Client], Calls], requests: int, messages: int):
+        self.name = name
+        self.run = run
+        self.requests = requests
+        self.messages = messages
+
+
+def timed(call: Callable) -> float:
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def checked(call: Callable):
+    # Latency of a successful API call, or None if it failed.
+    started = time.perf_counter()
+    try:
+        value = call()
+    except Exception:
+        return None
+    return time.perf_counter() - started if api_error(value) is None else None
+
+
+def concurrently(call: Callable, count: int, workers: int, messages: int = 0) -> Calls:
+    """Performs count calls over workers threads; each call sends messages messages."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        samples = list(executor.map(lambda _: checked(call), range(count)))
+    latencies = [sample for sample in samples if sample is not None]
+    errors = count - len(latencies)
+    return Calls(latencies, errors, errors * messages)
+
+
+def scenarios(args) -> List[Scenario]:
+    recipients = [str(66800000000 + i) for i in range(args.recipients)]
+    bulk_recipients = [str(66900000000 + i) for i in range(args.bulk_recipients)]
+    body = json.dumps(sms_result(recipients)).encode()
+    response = {"code": 200, "content": body, "headers": {}}
+    scheduled = {"code": 200, "content": json.dumps({"items": [scheduled_item(i) for i in range(
+        args.scheduled_items)]}).encode(), "headers": {}}
+    parse_client = c.Client("key", "secret")
+    compact_client = c.Client("key", "secret", compact_results=True)
+
+    def bulk_send(client):
+        started = time.perf_counter()
+        result = bulk.BulkSms.send(client, bulk_recipients, "benchmark", batch_size=args.batch_size,
+                                   max_workers=args.workers)
+        seconds = time.perf_counter() - started
+        failed = result.failed()
+        return Calls([] if failed else [seconds], len(failed), sum(len(batch.to) for batch in failed))
+
+    def parse(client, count):
+        return Calls([timed(lambda: s.sms_from_response(response, client)) for _ in range(count)])
+
+    def parse_compact(count):
+        # Compact results decode on first access; read a field so the decode is measured.
+        return Calls([timed(lambda: s.sms_from_response(response, compact_client).result.total_sms)
+                      for _ in range(count)])
+
+    def parse_scheduled(count):
+        return Calls([timed(lambda: s.all_scheduled_from_response(scheduled, parse_client))
+                      for _ in range(count)])
+
+    def iter_scheduled(client):
+        def call():
+            response = s.Sms.iter_all_scheduled(client)
+            if api_error(response) is None:
+                for _ in response.result:
+                    pass
+            return response
+
+        seconds = checked(call)
+        return Calls([seconds], 0, 0) if seconds is not None else Calls([], 1, args.scheduled_items)
+
+    return [
+        Scenario("sms_send", lambda client: concurrently(
+            lambda: s.Sms.send(client, recipients, "benchmark"), args.requests, args.workers, len(recipients)),
+            args.requests, args.requests * len(recipients)),
+        Scenario("verify_send", lambda client: concurrently(
+            lambda: Verify.send(client, [recipients[0]]), args.requests, args.workers, 1),
+            args.requests, args.requests),
+        Scenario("balance_get", lambda client: concurrently(
+            lambda: Balance.get(client), args.requests, args.workers), args.requests, 0),
+        Scenario("bulk_send", bulk_send, -(-len(bulk_recipients) // args.batch_size), len(bulk_recipients)),
+        Scenario("get_all_scheduled", lambda client: concurrently(
+            lambda: s.Sms.get_all_scheduled(client), max(1, args.requests // 10), args.workers,
+            args.scheduled_items),
+            max(1, args.requests // 10), max(1, args.requests // 10) * args.scheduled_items),
+        Scenario("iter_all_scheduled", iter_scheduled, 1, args.scheduled_items),
+        Scenario("parse_sms", lambda client: parse(parse_client, args.requests), 0,
+                 args.requests * len(recipients)),
+        Scenario("parse_sms_compact", lambda client: parse_compact(args.requests), 0,
+                 args.requests * len(recipients)),
+        Scenario("parse_all_scheduled", lambda client: parse_scheduled(max(1, args.requests // 10)), 0,
+                 max(1, args.requests // 10) * args.scheduled_items),
+    ]
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def measure(scenario: Scenario, client: c.Client) -> dict:
+    cpu = time.process_time()
+    started = time.perf_counter()
+    calls = scenario.run(client)
+    seconds = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    tracemalloc.start()
+    try:
+        scenario.run(client)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Throughput counts only the requests and messages that succeeded.
+    succeeded = scenario.requests - calls.errors
+    delivered = scenario.messages - calls.failed_messages
+    return {
+        "name": scenario.name,
+        "seconds": seconds,
+        "requests": scenario.requests,
+        "messages": scenario.messages,
+        "errors": calls.errors,
+        "error_rate": calls.errors / scenario.requests if scenario.requests else None,
+        "failed_messages": calls.failed_messages,
+        "requests_per_second": succeeded / seconds if scenario.requests else None,
+        "messages_per_second": delivered / seconds if scenario.messages else None,
+        "latency_p50_ms": _ms(percentile(calls.latencies, 0.5)),
+        "latency_p99_ms": _ms(percentile(calls.latencies, 0.99)),
+        "cpu_seconds": cpu,
+        "cpu_us_per_message": cpu / scenario.messages * 1e6 if scenario.messages else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return seconds * 1000 if seconds is not None else None
+
+
+def version() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    mock = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        mock = MockMovider(args.latency, args.error_rate, args.scheduled_items)
+        mock.start()
+        endpoint = mock.endpoint
+    try:
+        with c.Client("key", "secret", pool_maxsize=max(args.workers, c.default_pool_maxsize)) as client:
+            client.endpoint = endpoint
+            selected = [scenario for scenario in scenarios(args)
+                        if not args.scenario or scenario.name in args.scenario]
+            results = []
+            for scenario in selected:
+                result = measure(scenario, client)
+                results.append(result)
+                print(report(result), file=sys.stderr)
+    finally:
+        if mock is not None:
+            mock.stop()
+    return {
+        "version": version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {name: value for name, value in vars(args).items() if name not in ("output", "compare")},
+        "results": results,
+    }
+
+
+def report(result: dict) -> str:
+    """Returns the summary line of a scenario: successful throughput, errors and latency."""
+    if result["messages"]:
+        rate, unit = result["messages_per_second"], "msg/s"
+    else:
+        rate, unit = result["requests_per_second"], "req/s"
+    latency = f"p50 {_format(result['latency_p50_ms'])} ms  p99 {_format(result['latency_p99_ms'])} ms"
+    errors = f"{result['errors']} errors ({result['error_rate']:.1%})" if result["error_rate"] is not None else "-"
+    return f"{result['name']:<20} {rate:>12.0f} {unit}  {errors:<20} {latency}"
+
+
+def _format(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def compare(current: dict, baseline: dict) -> str:
+    """
+    Returns a table of the throughput of current relative to baseline, per scenario: messages
+    per second, or requests per second for scenarios without messages.
+    """
+    before = {result["name"]: result for result in baseline["results"]}
+    lines = [f"{'scenario':<20} {'baseline':>12} {'current':>12} {'change':>8}"]
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        key = "messages_per_second" if result["messages"] else "requests_per_second"
+        if not old.get(key) or not result.get(key):
+            continue
+        change = result[key] / old[key] - 1
+        lines.append(f"{result['name']:<20} {old[key]:>12.0f} {result[key]:>12.0f} {change:>+8.1%}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--output", help="write the results as JSON to this file (default is stdout)")
+    parser.add_argument("--compare", help="a previous results file to compare with")
+    parser.add_argument("--endpoint", help="mock API endpoint to use instead of starting one in process")
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--requests", type=int, default=200, help="calls per scenario")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent calls")
+    parser.add_argument("--recipients", type=int, default=100, help="phone numbers per Sms.send")
+    parser.add_argument("--bulk-recipients", type=int, default=20000, help="phone numbers of the bulk send")
+    parser.add_argument("--batch-size", type=int, default=bulk.default_batch_size, help="bulk batch size")
+    parser.add_argument("--scheduled-items", type=int, default=1000, help="items of the scheduled listing")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock responses that fail")
+    args = parser.parse_args(argv)
+    results = run(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as file:
+            print(compare(results, json.load(file)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
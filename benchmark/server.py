@@ -0,0 +1,176 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class MockMovider:
+    """
+    A local stand-in for api.movider.co serving /sms, /sms/scheduled, /verify,
+    /verify/acknowledge, /verify/cancel and /balance with canned responses.
+
+    Point a client at it with client.endpoint = server.endpoint. Use it as a context manager, or
+    call start() and stop().
+
+    :param latency: Seconds every response is delayed.
+    :param error_rate: Fraction of requests answered with 500, between 0 and 1.
+    :param scheduled_items: Number of items returned by GET /sms/scheduled.
+    :param seed: Seed of the error sampling, so runs are repeatable.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, scheduled_items: int = 100,
+                 seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.scheduled_items = scheduled_items
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scheduled = None
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def endpoint(self) -> str:
+        return "http://127.0.0.1:%d/v1" % self._server.server_address[1]
+
+    def start(self):
+        mock = self
+
+        class Handler(MockHandler):
+            server_mock = mock
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MockMovider", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def failing(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def scheduled_body(self) -> bytes:
+        # Built once per size, so large listings do not measure the mock itself.
+        if self._scheduled is None or self._scheduled[0] != self.scheduled_items:
+            items = [scheduled_item(i) for i in range(self.scheduled_items)]
+            self._scheduled = (self.scheduled_items, json.dumps({"items": items}).encode())
+        return self._scheduled[1]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40 ms per response.
+    disable_nagle_algorithm = True
+    server_mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_method("GET")
+
+    def do_POST(self):
+        self.handle_method("POST")
+
+    def do_DELETE(self):
+        self.handle_method("DELETE")
+
+    def handle_method(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode()) if length else {}
+        mock = self.server_mock
+        if mock.latency:
+            time.sleep(mock.latency)
+        if mock.failing():
+            return self.send_json(500, {"error": {"code": 500, "name": "internal error"}})
+        path = urlparse(self.path).path
+        if path.startswith("/v1"):
+            path = path[3:]
+        if path == "/sms" or (path == "/sms/scheduled" and method == "POST"):
+            numbers = form.get("to", [""])[0].split(",")
+            return self.send_json(200, sms_result(numbers, scheduled=path != "/sms"))
+        if path == "/sms/scheduled":
+            return self.send_body(200, mock.scheduled_body())
+        if path.startswith("/sms/scheduled/"):
+            schedule_id = path.rsplit("/", 1)[1]
+            if not schedule_id.isdigit():
+                return self.send_json(404, {"error": {"code": 404, "name": "not found"}})
+            return self.send_json(200, {} if method == "DELETE" else scheduled_item(int(schedule_id)))
+        if path == "/verify":
+            return self.send_json(200, {"request_id": "r%d" % mock.requests,
+                                        "number": form.get("to", [""])[0], "price": 0.2})
+        if path == "/verify/acknowledge":
+            return self.send_json(200, {"request_id": form.get("request_id", [""])[0], "price": 0.0})
+        if path == "/verify/cancel":
+            return self.send_json(200, {"request_id": form.get("request_id", [""])[0]})
+        if path == "/balance":
+            return self.send_json(200, {"type": "credit", "amount": 1000000.0})
+        self.send_json(404, {"error": {"code": 404, "name": "not found"}})
+
+    def send_json(self, code, data):
+        self.send_body(code, json.dumps(data).encode())
+
+    def send_body(self, code, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def sms_result(numbers, scheduled=False) -> dict:
+    good = [number for number in numbers if number.isdigit()]
+    result = {
+        "remaining_balance": 1000000.0 - len(good) * 0.1,
+        "total_sms": len(good),
+        "phone_number_list": [{"number": number, "message_id": "m" + number, "price": 0.1} for number in good],
+        "bad_phone_number_list": [{"number": number, "msg": "invalid number"}
+                                  for number in numbers if not number.isdigit()],
+    }
+    if scheduled:
+        result["scheduleId"] = 1
+    return result
+
+
+def scheduled_item(i: int) -> dict:
+    return {"id": i, "text": "benchmark message %d" % i, "total_sms": 1, "method": "POST",
+            "callback_url": "", "from": "MOVIDER", "delivery_date": "2030-01-01T00:00:00Z",
+            "delivery_status": "pending", "delivery_status_updated_date": "2030-01-01T00:00:%02dZ" % (i % 60),
+            "created_date": "2029-12-31T00:00:00Z"}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serves a local stand-in for the Movider API.")
+    parser.add_argument("--latency", type=float, default=0.0, help="response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of responses that fail")
+    parser.add_argument("--scheduled-items", type=int, default=100, help="items of the scheduled listing")
+    args = parser.parse_args(argv)
+    with MockMovider(args.latency, args.error_rate, args.scheduled_items) as mock:
+        print(mock.endpoint, flush=True)
+        try:
+            mock._thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
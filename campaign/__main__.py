@@ -0,0 +1,5 @@
+import sys
+
+from campaign.campaign import main
+
+sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Sends an SMS campaign to the recipients of CSV or JSONL files from a pool of processes.
+
+    python -m campaign recipients.csv --text "Our store opens today" --output results.jsonl
+    python -m campaign customers.jsonl --template "Hi {name}, your code is {code}" --rate 50
+
+Input files are read in chunks of lines by the main process; parsing, validation and sending run
+in the worker processes, each sending through the bulk path with its own threads. Every record
+needs the phone number under --to-field (and, with --template, a value for every placeholder).
+CSV files need a header row and must not have line breaks inside fields.
+
+Every recipient gets a JSON line in the output file as soon as its chunk is done:
+{"number", "status": "sent", "message_id", "price"}, {"number", "status": "bad", "msg"} or
+{"number", "status": "failed", "error"}. If a worker fails on a whole chunk (or the process pool
+breaks), every number of that chunk is written as failed and the other chunks go on. The exit
+status is 1 if any batch failed.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, NamedTuple, Optional
+
+import validation as v
+from client import client as c
+from client.limiter import RateLimiter
+from client.retry import RetryPolicy
+from sms import bulk as b
+from sms import sms as s
+from sms import template as t
+
+# Lines of input per chunk handed to a worker process.
+default_chunk_size = 10000
+
+# Seconds between progress updates.
+progress_interval = 0.5
+
+
+class Config(NamedTuple):
+    """Settings every worker process builds its client and sends with."""
+    api_key: str
+    api_secret: str
+    endpoint: Optional[str]
+    text: Optional[str]
+    template: Optional[str]
+    to_field: str
+    params: s.Params
+    delivery_datetime: Optional[str]
+    batch_size: int
+    threads: int
+    rate: Optional[float]
+    retries: int
+    country_code: Optional[str]
+
+
+class Chunk(NamedTuple):
+    format: str
+    header: Optional[List[str]]
+    lines: List[bytes]
+
+
+class ChunkResult(NamedTuple):
+    records: List[dict]
+    sent: int
+    bad: int
+    failed: int
+    cost: float
+    requests: int
+
+
+_client = None
+_config = None
+_template = None
+
+
+def init_worker(config: Config):
+    global _client, _config, _template
+    limiter = RateLimiter({"/sms": config.rate}) if config.rate else None
+    retry = RetryPolicy(max_attempts=config.retries) if config.retries > 1 else None
+    normalizer = v.RecipientNormalizer(config.country_code) if config.country_code else None
+    _client = c.Client(config.api_key, config.api_secret, pool_maxsize=max(config.threads, c.default_pool_maxsize),
+                       limiter=limiter, retry=retry, compact_results=True, recipient_normalizer=normalizer)
+    if config.endpoint:
+        _client.endpoint = config.endpoint
+    _config = config
+    _template = t.Template(config.template) if config.template is not None else None
+
+
+def parse_records(chunk: Chunk, to_field: str, bad: List[dict]) -> Iterator[dict]:
+    """Yields the records of a chunk that have a phone number, adding the others to bad."""
+    if chunk.format == "csv":
+        header = chunk.header
+        records = (dict(zip(header, row))
+                   for row in csv.reader(line.decode("utf-8-sig") for line in chunk.lines) if row)
+    else:
+        records = parse_json_lines(chunk.lines, bad)
+    for record in records:
+        if isinstance(record, dict) and isinstance(record.get(to_field), str):
+            yield record
+        else:
+            number = record.get(to_field) if isinstance(record, dict) else None
+            bad.append({"number": number, "status": "bad", "msg": f"no {to_field} field"})
+
+
+def parse_json_lines(lines: List[bytes], bad: List[dict]) -> Iterator:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            bad.append({"number": None, "status": "bad", "msg": "invalid JSON line"})
+
+
+def send_chunk(chunk: Chunk) -> ChunkResult:
+    """Parses, validates and sends one chunk in a worker process, and returns a record per recipient."""
+    config = _config
+    records = []
+    bad = []
+    valid = parse_records(chunk, config.to_field, bad)
+    if _template is not None:
+        result = t.TemplateSms.send(_client, _template, valid, config.params, config.delivery_datetime,
+                                    config.to_field, config.batch_size, config.threads)
+    else:
+        numbers = (record[config.to_field] for record in valid)
+        result = b.BulkSms.send_schedule(_client, numbers, config.text, config.delivery_datetime, config.params,
+                                         config.batch_size, config.threads)
+    phone_numbers = result.phone_number_list
+    for number, message_id, price in zip(phone_numbers.numbers, phone_numbers.message_ids, phone_numbers.prices):
+        records.append({"number": number, "status": "sent", "message_id": message_id, "price": price})
+    bad_numbers = result.bad_phone_number_list
+    for number, msg in zip(bad_numbers.numbers, bad_numbers.msgs):
+        bad.append({"number": number, "status": "bad", "msg": msg})
+    failed = 0
+    for batch in result.failed():
+        error = batch.error if isinstance(batch.error, dict) else repr(batch.error)
+        failed += len(batch.to)
+        records.extend({"number": number, "status": "failed", "error": error} for number in batch.to)
+    records.extend(bad)
+    return ChunkResult(records, len(phone_numbers), len(bad), failed, sum(phone_numbers.prices),
+                       len(result.batches))
+
+
+def failed_chunk(chunk: Chunk, to_field: str, error: BaseException) -> ChunkResult:
+    """Returns the records of a chunk whose worker raised: every phone number failed with the error."""
+    bad = []
+    numbers = [record[to_field] for record in parse_records(chunk, to_field, bad)]
+    records = [{"number": number, "status": "failed", "error": repr(error)} for number in numbers]
+    records.extend(bad)
+    return ChunkResult(records, 0, len(bad), len(numbers), 0.0, 0)
+
+
+def read_chunks(paths: List[str], format: Optional[str], chunk_size: int) -> Iterator[Chunk]:
+    """Reads the input files as chunks of raw lines, leaving the parsing to the worker processes."""
+    for path in paths:
+        file_format = format or detect_format(path)
+        with open(path, "rb") as file:
+            header = None
+            if file_format == "csv":
+                header = next(csv.reader([file.readline().decode("utf-8-sig")]), None)
+                if not header:
+                    continue
+            lines = []
+            for line in file:
+                lines.append(line)
+                if len(lines) == chunk_size:
+                    yield Chunk(file_format, header, lines)
+                    lines = []
+            if lines:
+                yield Chunk(file_format, header, lines)
+
+
+def detect_format(path: str) -> str:
+    name = path.lower()
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"cannot tell the format of {path}, pass --format csv or --format jsonl")
+
+
+class Progress:
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.started = time.monotonic()
+        self.shown = 0.0
+        self.read = 0
+        self.done = 0
+        self.sent = 0
+        self.bad = 0
+        self.failed = 0
+        self.cost = 0.0
+        self.requests = 0
+
+    def add(self, result: ChunkResult):
+        self.done += len(result.records)
+        self.sent += result.sent
+        self.bad += result.bad
+        self.failed += result.failed
+        self.cost += result.cost
+        self.requests += result.requests
+
+    def show(self, final: bool = False):
+        now = time.monotonic()
+        if not final and now - self.shown < progress_interval:
+            return
+        self.shown = now
+        elapsed = max(now - self.started, 1e-9)
+        self.stream.write(f"\r{self.done} done ({self.read} lines read)  {self.done / elapsed:.0f} msg/s  "
+                          f"{self.requests / elapsed:.1f} req/s  sent {self.sent}  bad {self.bad}  "
+                          f"failed {self.failed}  cost {self.cost:.2f}  {elapsed:.0f}s" + ("\n" if final else ""))
+        self.stream.flush()
+
+
+def run(config: Config, paths: List[str], output, processes: int, format: Optional[str] = None,
+        chunk_size: int = default_chunk_size, progress: Optional[Progress] = None) -> Progress:
+    """
+    Sends the campaign and writes a JSON line per recipient to output as chunks complete.
+
+    At most two chunks per process are read ahead, so memory does not depend on the input size.
+    """
+    progress = progress if progress is not None else Progress()
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(config,)) as executor:
+        # The chunk of every future in flight, to report its numbers if the worker fails.
+        pending = {}
+
+        def write(result: ChunkResult):
+            output.write("".join(json.dumps(record) + "\n" for record in result.records))
+            progress.add(result)
+
+        def collect(done):
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = failed_chunk(chunk, config.to_field, e)
+                write(result)
+            output.flush()
+            progress.show()
+
+        for chunk in read_chunks(paths, format, chunk_size):
+            if len(pending) >= processes * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            progress.read += len(chunk.lines)
+            try:
+                pending[executor.submit(send_chunk, chunk)] = chunk
+            except BrokenProcessPool as e:
+                write(failed_chunk(chunk, config.to_field, e))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    progress.show(final=True)
+    return progress
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m campaign", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("inputs", nargs="+", help="CSV or JSONL files of recipients")
+    message = parser.add_mutually_exclusive_group(required=True)
+    message.add_argument("--text", help="the text message sent to every recipient")
+    message.add_argument("--template", help="a text with {field} placeholders filled from every record")
+    parser.add_argument("--output", default="-", help="JSONL file of per-recipient results (default is stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default is by file extension)")
+    parser.add_argument("--to-field", default="to", help="field holding the phone number (default is to)")
+    parser.add_argument("--api-key", default=os.environ.get("MOVIDER_API_KEY"),
+                        help="API key (default is $MOVIDER_API_KEY)")
+    parser.add_argument("--api-secret", default=os.environ.get("MOVIDER_API_SECRET"),
+                        help="API secret (default is $MOVIDER_API_SECRET)")
+    parser.add_argument("--endpoint", help="API endpoint (default is the Movider API)")
+    parser.add_argument("--from", dest="from_", help="sender name")
+    parser.add_argument("--callback-url", help="delivery report URL")
+    parser.add_argument("--callback-method", help="delivery report HTTP method")
+    parser.add_argument("--delivery-datetime", help="RFC3339 time to deliver at (default is now)")
+    parser.add_argument("--country-code", help="calling code given to national numbers, enables validation")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--threads", type=int, default=b.default_max_workers,
+                        help="requests in flight per process")
+    parser.add_argument("--batch-size", type=int, default=b.default_batch_size, help="phone numbers per request")
+    parser.add_argument("--chunk-size", type=int, default=default_chunk_size, help="input lines per chunk")
+    parser.add_argument("--rate", type=float, help="total SMS requests per second, shared by the processes")
+    parser.add_argument("--retries", type=int, default=3, help="attempts per request (1 for no retries)")
+    args = parser.parse_args(argv)
+    if not args.api_key or not args.api_secret:
+        parser.error("--api-key and --api-secret (or MOVIDER_API_KEY and MOVIDER_API_SECRET) are required")
+    if args.processes < 1 or args.threads < 1 or args.batch_size < 1 or args.chunk_size < 1:
+        parser.error("--processes, --threads, --batch-size and --chunk-size must be at least 1")
+    if args.text is not None and not args.text:
+        parser.error("--text must not be empty")
+    if args.template is not None:
+        # Fail before starting the processes.
+        try:
+            t.Template(args.template)
+        except ValueError as e:
+            parser.error(f"--template: {e}")
+    config = Config(args.api_key, args.api_secret, args.endpoint, args.text, args.template, args.to_field,
+                    s.Params(args.callback_url, args.callback_method, args.from_), args.delivery_datetime,
+                    args.batch_size, args.threads, args.rate / args.processes if args.rate else None,
+                    args.retries, args.country_code)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        progress = run(config, args.inputs, output, args.processes, args.format, args.chunk_size)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if progress.failed else 0
@@ -0,0 +1,263 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Endpoint groups that get a breaker by default; /verify also covers /verify/acknowledge and /verify/cancel.
+default_paths = ("/sms", "/sms/scheduled", "/verify", "/balance")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while the circuit breaker of its endpoint is open.
+    The request was not sent.
+
+    :param path: The API path of the request.
+    :param retry_after: Seconds until the breaker lets a probe request through.
+    """
+
+    def __init__(self, path: str, retry_after: float):
+        super().__init__(f"circuit breaker of {path} is open, retry after {retry_after:.1f}s")
+        self.path = path
+        self.retry_after = retry_after
+
+
+class RollingWindow:
+    """
+    Counts calls, failures, slow calls and their total duration over the last seconds, in
+    buckets that are reused as time moves on. Not thread-safe; CircuitBreaker locks around it.
+
+    :param seconds: Length of the window.
+    :param buckets: Number of buckets the window is divided in.
+    """
+    __slots__ = ("width", "slots", "calls", "failures", "slow", "durations")
+
+    def __init__(self, seconds: float, buckets: int = 10):
+        self.width = seconds / buckets
+        self.slots = [None] * buckets
+        self.calls = [0] * buckets
+        self.failures = [0] * buckets
+        self.slow = [0] * buckets
+        self.durations = [0.0] * buckets
+
+    def add(self, now: float, seconds: float, failed: bool, slow: bool):
+        slot = int(now / self.width)
+        i = slot % len(self.slots)
+        if self.slots[i] != slot:
+            self.slots[i] = slot
+            self.calls[i] = self.failures[i] = self.slow[i] = 0
+            self.durations[i] = 0.0
+        self.calls[i] += 1
+        self.failures[i] += failed
+        self.slow[i] += slow
+        self.durations[i] += seconds
+
+    def totals(self, now: float):
+        """Returns (calls, failures, slow calls, total seconds) of the window ending now."""
+        current = int(now / self.width)
+        size = len(self.slots)
+        calls = failures = slow = 0
+        durations = 0.0
+        for i, slot in enumerate(self.slots):
+            if slot is not None and current - slot < size:
+                calls += self.calls[i]
+                failures += self.failures[i]
+                slow += self.slow[i]
+                durations += self.durations[i]
+        return calls, failures, slow, durations
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an endpoint that keeps failing or answering slowly.
+
+    The breaker is closed while the last window seconds hold fewer than min_calls attempts, or
+    fewer failures (exceptions and 5xx responses) than error_rate and fewer attempts slower than
+    slow_call_duration than slow_rate. Otherwise it opens, and attempts fail fast with
+    CircuitOpenError for open_for seconds. It then lets half_open_probes attempts through at a
+    time; it closes after as many of them succeed quickly, and opens again if one fails.
+    429 responses are left out: the rate limiter handles them.
+
+    :param error_rate: Fraction of failed attempts that opens the breaker.
+    :param slow_call_duration: Seconds after which an attempt counts as slow.
+    :param slow_rate: Fraction of slow attempts that opens the breaker.
+    :param window: Seconds of history the rates are computed over.
+    :param min_calls: Attempts the window needs before the breaker may open.
+    :param open_for: Seconds the breaker stays open before probing.
+    :param half_open_probes: Attempts let through, and needed to close, while half-open.
+    """
+
+    def __init__(self, error_rate: float = 0.5, slow_call_duration: float = 5.0, slow_rate: float = 0.8,
+                 window: float = 30.0, min_calls: int = 20, open_for: float = 15.0, half_open_probes: int = 3):
+        self.error_rate = error_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.open_for = open_for
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = None
+        self.on_state_change: Optional[Callable[[str, str], None]] = None
+        self._window = RollingWindow(window)
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str = "") -> bool:
+        """
+        Lets an attempt through, or raises CircuitOpenError.
+
+        :param path: The API path, for the error message.
+        :return: True if the attempt is a half-open probe; pass it to record or release.
+        :raises CircuitOpenError: If the breaker is open, or half-open with all probes in flight.
+        """
+        with self._lock:
+            changed = None
+            if self.state == OPEN:
+                retry_after = self.opened_at + self.open_for - time.monotonic()
+                if retry_after > 0:
+                    raise CircuitOpenError(path, retry_after)
+                changed = self._set_state(HALF_OPEN)
+            probe = self.state == HALF_OPEN
+            if probe:
+                if self._probes >= self.half_open_probes:
+                    raise CircuitOpenError(path, 0.0)
+                self._probes += 1
+        self._notify(changed)
+        return probe
+
+    def record(self, probe: bool, seconds: float, failed: bool):
+        """
+        Records the outcome of an attempt let through by acquire.
+
+        :param probe: The return value of acquire.
+        :param seconds: Duration of the attempt.
+        :param failed: True if the attempt raised or the API answered 5xx.
+        """
+        now = time.monotonic()
+        slow = seconds >= self.slow_call_duration
+        changed = None
+        with self._lock:
+            if probe:
+                self._probes -= 1
+                # Another probe may already have opened or closed the breaker.
+                if self.state == HALF_OPEN:
+                    if failed or slow:
+                        changed = self._open(now)
+                    else:
+                        self._probe_successes += 1
+                        if self._probe_successes >= self.half_open_probes:
+                            self._window.clear()
+                            changed = self._set_state(CLOSED)
+            elif self.state == CLOSED:
+                self._window.add(now, seconds, failed, slow)
+                calls, failures, slow_calls, _ = self._window.totals(now)
+                if calls >= self.min_calls and (failures >= self.error_rate * calls or
+                                                slow_calls >= self.slow_rate * calls):
+                    changed = self._open(now)
+        self._notify(changed)
+
+    def release(self, probe: bool):
+        """Gives back an attempt let through by acquire without recording it, for example after a 429."""
+        if probe:
+            with self._lock:
+                self._probes -= 1
+
+    def health(self) -> dict:
+        """Returns the state of the breaker and the rates of its window."""
+        now = time.monotonic()
+        with self._lock:
+            calls, failures, slow, durations = self._window.totals(now)
+            retry_after = 0.0
+            if self.state == OPEN:
+                retry_after = max(0.0, self.opened_at + self.open_for - now)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "error_rate": failures / calls if calls else 0.0,
+                "slow_rate": slow / calls if calls else 0.0,
+                "mean_latency": durations / calls if calls else None,
+                "retry_after": retry_after,
+            }
+
+    def _open(self, now: float):
+        self.opened_at = now
+        self._probe_successes = 0
+        return self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        # Called with the lock held; returns the change to notify once the lock is released.
+        old, self.state = self.state, state
+        if state != HALF_OPEN:
+            self._probe_successes = 0
+        return (old, state) if old != state else None
+
+    def _notify(self, changed):
+        if changed is not None and self.on_state_change is not None:
+            self.on_state_change(*changed)
+
+
+class CircuitBreakers:
+    """
+    A circuit breaker per API endpoint group; pass it to Client or AsyncClient as breakers.
+
+    A request goes through the breaker with the longest matching path prefix, so "/verify" also
+    covers "/verify/acknowledge". Paths without a breaker are never stopped. Every attempt of a
+    call, retries included, asks the breaker first, so a call fails fast with CircuitOpenError
+    instead of waiting for the timeout of a degraded API. Safe to share between clients and threads.
+
+    :param breakers: A dictionary of API path prefix to CircuitBreaker (default is a CircuitBreaker
+        with the default settings for each of default_paths).
+    :param on_state_change: Optional callable receiving (path, old state, new state) when a breaker
+        opens, half-opens or closes.
+    """
+
+    def __init__(self, breakers: Optional[Dict[str, CircuitBreaker]] = None,
+                 on_state_change: Optional[Callable[[str, str, str], None]] = None):
+        if breakers is None:
+            breakers = {path: CircuitBreaker() for path in default_paths}
+        self.breakers = dict(breakers)
+        self.on_state_change = on_state_change
+        for path, breaker in self.breakers.items():
+            breaker.on_state_change = self._state_change_handler(path)
+        # Longest prefixes first, so the most specific breaker wins.
+        self._prefixes = sorted(self.breakers, key=len, reverse=True)
+
+    def breaker(self, path: str) -> Optional[CircuitBreaker]:
+        """
+        Returns the breaker of a path.
+
+        :param path: The API path, for example "/sms/scheduled/123".
+        :return: The matching CircuitBreaker, or None if the path has no breaker.
+        """
+        for prefix in self._prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return self.breakers[prefix]
+        return None
+
+    def available(self, path: str) -> bool:
+        """
+        Returns True if a request to path would currently be sent, without sending one. Use it to
+        shed load or queue work while an endpoint is down.
+        """
+        breaker = self.breaker(path)
+        if breaker is None:
+            return True
+        health = breaker.health()
+        return health["state"] != OPEN or health["retry_after"] == 0
+
+    def health(self) -> Dict[str, dict]:
+        """Returns the health of every breaker (see CircuitBreaker.health), by path prefix."""
+        return {path: breaker.health() for path, breaker in self.breakers.items()}
+
+    def _state_change_handler(self, path: str):
+        def handler(old, new):
+            if self.on_state_change is not None:
+                self.on_state_change(path, old, new)
+        return handler
@@ -1,19 +1,209 @@
+import asyncio
 import json
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
 import requests
+from requests.adapters import HTTPAdapter
+
+from client.limiter import RateLimitedError, parse_retry_after
+from client.metrics import RequestEvent, trace_config
 
 # ExpectTimeout is used to limit http.Client waiting time.
 expect_timeout = 15
 
+# Default size of the connection pool kept by each Client and AsyncClient.
+default_pool_connections = 10
+default_pool_maxsize = 10
+
+
+class DeadlineExceededError(requests.Timeout):
+    """Raised when a call cannot complete before its deadline."""
+
+
+def deadline_after(seconds):
+    """
+    Returns a deadline the given number of seconds from now, for the deadline parameter of API calls.
+
+    :param seconds: Time budget in seconds.
+    :return: An absolute time.monotonic() timestamp.
+    """
+    return time.monotonic() + seconds
+
+
+def remaining_time(deadline):
+    """
+    Returns the seconds left before a deadline.
+
+    :param deadline: An absolute time.monotonic() timestamp, or None.
+    :return: The remaining seconds, or None if there is no deadline.
+    :raises DeadlineExceededError: If the deadline has passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError("deadline exceeded")
+    return remaining
+
+
+def resolve_timeout(client, timeout, deadline):
+    """
+    Returns the (connect, read) timeouts of one attempt, bounded by the time left before the deadline.
+
+    :param client: The Client or AsyncClient sending the request.
+    :param timeout: Per-call timeout in seconds, a (connect, read) tuple, or None for the client defaults.
+    :param deadline: An absolute time.monotonic() timestamp, or None.
+    :raises DeadlineExceededError: If the deadline has passed.
+    """
+    if timeout is None:
+        connect, read = client.connect_timeout, client.read_timeout
+    elif isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    remaining = remaining_time(deadline)
+    if remaining is not None:
+        connect = remaining if connect is None else min(connect, remaining)
+        read = remaining if read is None else min(read, remaining)
+    return connect, read
+
+
+def default_json_decoder():
+    """
+    Returns the fastest installed JSON decoder: orjson, then msgspec, then the standard json module.
+
+    orjson and msgspec decode the received bytes directly, without first copying them into a str.
+    """
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        return msgspec.json.decode
+    except ImportError:
+        return json.loads
+
+
+def decode_json(content, client=None):
+    """
+    Decodes a JSON response body with the decoder of the client.
+
+    :param content: The body as bytes.
+    :param client: The Client or AsyncClient that received it, or None for the standard json module.
+    """
+    if client is None:
+        return json.loads(content)
+    if client.instrumentation is None:
+        return client.json_decoder(content)
+    started = time.perf_counter()
+    result = client.json_decoder(content)
+    client.instrumentation.decoded(time.perf_counter() - started, len(content))
+    return result
+
+
+def record_attempt(event, response, seconds):
+    """Adds the phases and request bytes of one requests.Response attempt to a RequestEvent."""
+    server = response.elapsed.total_seconds()
+    event.add_phase("server", server)
+    event.add_phase("transfer", max(0.0, seconds - server))
+    body = response.request.body
+    if body:
+        event.sent_bytes += len(body)
+
+
+def admit(limiter, breaker, path, deadline):
+    """
+    Lets one attempt through the circuit breaker of its path, then charges it to the rate limiter,
+    so attempts stopped by an open circuit use no rate budget and do not wait.
+
+    :param limiter: The RateLimiter of the client, or None.
+    :param breaker: The CircuitBreaker of the path, or None.
+    :param path: The API path of the request.
+    :param deadline: An absolute time.monotonic() timestamp, or None.
+    :return: A (probe, wait) tuple: the return value of CircuitBreaker.acquire, and the seconds to
+        wait before sending.
+    :raises CircuitOpenError: If the circuit breaker is open.
+    :raises DeadlineExceededError: If waiting for the rate limiter would pass the deadline.
+    """
+    probe = breaker.acquire(path) if breaker is not None else False
+    wait = limiter.reserve(path) if limiter is not None else 0.0
+    if wait > 0 and deadline is not None and time.monotonic() + wait >= deadline:
+        if breaker is not None:
+            breaker.release(probe)
+        raise DeadlineExceededError("deadline exceeded while waiting for the rate limiter")
+    return probe, wait
+
+
+def record_breaker(breaker, probe, status_code, seconds):
+    """Records a response in a CircuitBreaker: 5xx responses are failures, 429 responses are left out."""
+    if status_code == requests.codes.too_many_requests:
+        breaker.release(probe)
+    else:
+        breaker.record(probe, seconds, status_code >= 500)
+
+
+def error_from_response(response):
+    """
+    Returns the error object of a non-OK API response.
+
+    :param response: A dictionary returned by Client.request, Client.get or Client.delete.
+    :return: The "error" value of the response body, or None if the response status is OK.
+        Bodies that are not API errors (for example a gateway error page) are reported as
+        {"code": status code, "name": body text}.
+    """
+    if response["code"] == requests.codes.OK:
+        return None
+    try:
+        return json.loads(response["content"])["error"]
+    except (ValueError, KeyError, TypeError):
+        content = response["content"]
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "replace")
+        return {"code": response["code"], "name": content}
+
 
 class Client:
     """
     A client object that handles API requests to a specific endpoint.
 
+    The client keeps a pooled keep-alive requests.Session, so consecutive calls
+    reuse TCP/TLS connections to the API host. A single Client may be shared
+    between threads. Call close() (or use the client as a context manager)
+    to release pooled connections.
+
     :param api_key: A string representing the API key for authentication.
     :param api_secret: A string representing the API secret for authentication.
+    :param pool_connections: Number of per-host connection pools to cache.
+    :param pool_maxsize: Maximum number of connections kept alive per host.
+    :param pool_block: If True, block when all pooled connections per host are in use instead of opening extra ones.
+    :param keep_alive: If False, send "Connection: close" so sockets are not reused.
+    :param limiter: Optional RateLimiter that paces requests and adapts to 429 responses.
+    :param retry: Optional RetryPolicy for transient errors (default is no retries).
+    :param connect_timeout: Seconds to wait for a connection to the API, None to wait forever.
+    :param read_timeout: Seconds to wait for the API to send data, None to wait forever.
+    :param balance_cache: Optional BalanceCache used by Balance.get and updated by every SMS send.
+    :param compact_results: If True, results are compact tuple or __slots__ objects decoded lazily,
+        with phone number lists stored as columns; call to_dict() on them for the regular dictionary.
+    :param json_decoder: Optional callable decoding a JSON body from bytes (default is default_json_decoder()).
+    :param recipient_normalizer: Optional validation.RecipientNormalizer that normalizes and checks the
+        phone numbers of SMS and verification sends before the request.
+    :param coalescer: Optional verify.coalesce.Coalescer sharing one request between identical
+        concurrent Verify.send calls.
+    :param instrumentation: Optional Instrumentation (see client.metrics) receiving every call,
+        for example Metrics or OpenTelemetryTracing.
+    :param breakers: Optional CircuitBreakers (see client.breaker) that fail calls fast with
+        CircuitOpenError while their endpoint keeps failing or answering slowly.
     """
 
-    def __init__(self, api_key, api_secret):
+    def __init__(self, api_key, api_secret, pool_connections=default_pool_connections,
+                 pool_maxsize=default_pool_maxsize, pool_block=False, keep_alive=True, limiter=None,
+                 retry=None, connect_timeout=expect_timeout, read_timeout=expect_timeout,
+                 balance_cache=None, compact_results=False, json_decoder=None, recipient_normalizer=None,
+                 coalescer=None, instrumentation=None, breakers=None):
         self.api_key = api_key
         self.api_secret = api_secret
         self.endpoint = "https://api.movider.co/v1"
@@ -21,54 +211,505 @@ class Client:
         self.content_type_xml = "application/xml"
         self.content_type_form_urlencoded = "application/x-www-form-urlencoded"
         self.content_type_form = "multipart/form-data"
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.limiter = limiter
+        self.retry = retry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.balance_cache = balance_cache
+        self.compact_results = compact_results
+        self.json_decoder = json_decoder if json_decoder is not None else default_json_decoder()
+        self.recipient_normalizer = recipient_normalizer
+        self.coalescer = coalescer
+        self.instrumentation = instrumentation
+        self.breakers = breakers
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def session(self):
+        """
+        Returns the pooled requests.Session, creating it on first use.
+
+        :return: A requests.Session shared by all requests of this client.
+        """
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                session = self._session
+                if session is None:
+                    session = self._new_session()
+                    self._session = session
+        return session
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        return session
 
-    def request(self, url, accept, data):
+    def close(self):
+        """
+        Closes the pooled session and its connections. The client may still be
+        used afterwards; a new session is created on the next request.
+        """
+        with self._session_lock:
+            session = self._session
+            self._session = None
+        if session is not None:
+            session.close()
+
+    def _auth_url(self, url):
+        params = "?api_key=" + self.api_key+"&api_secret=" + self.api_secret
+        return url + params
+
+    def _path(self, url):
+        return url[len(self.endpoint):] if url.startswith(self.endpoint) else url
+
+    def health(self):
+        """
+        Returns the circuit breaker health of every endpoint group (see CircuitBreakers.health).
+
+        :return: A dictionary of path prefix to breaker state and rates, empty without breakers.
+        """
+        return self.breakers.health() if self.breakers is not None else {}
+
+    def _send(self, method, url, headers, data=None, timeout=None, deadline=None, stream=False):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._attempt(method, url, headers, data, timeout, deadline, stream, None)
+        event = RequestEvent(method, self._path(url))
+        instrumentation.request_started(event)
+        try:
+            response = self._attempt(method, url, headers, data, timeout, deadline, stream, event)
+            event.status_code = response["code"]
+            return response
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.duration = time.perf_counter() - event.started
+            instrumentation.request_finished(event)
+
+    def _attempt(self, method, url, headers, data, timeout, deadline, stream, event):
+        limiter = self.limiter
+        retry = self.retry
+        path = self._path(url)
+        breaker = self.breakers.breaker(path) if self.breakers is not None else None
+        started = time.monotonic()
+        attempts = 0
+        throttles = 0
+        while True:
+            probe, wait = admit(limiter, breaker, path, deadline)
+            if wait > 0:
+                time.sleep(wait)
+            attempts += 1
+            if event is not None:
+                event.attempts = attempts
+            sent = time.perf_counter()
+            try:
+                response = self.session.request(method, self._auth_url(url), headers=headers, data=data,
+                                                timeout=resolve_timeout(self, timeout, deadline), stream=stream)
+                if event is not None:
+                    record_attempt(event, response, time.perf_counter() - sent)
+            except DeadlineExceededError:
+                if breaker is not None:
+                    breaker.release(probe)
+                raise
+            except Exception as e:
+                if breaker is not None:
+                    breaker.record(probe, time.perf_counter() - sent, True)
+                delay = None
+                if retry is not None:
+                    delay = retry.delay(method, path, attempts, started, error=e, deadline=deadline)
+                if delay is None:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise DeadlineExceededError("deadline exceeded") from e
+                    raise
+                time.sleep(delay)
+                continue
+            status_code = response.status_code
+            if breaker is not None:
+                record_breaker(breaker, probe, status_code, time.perf_counter() - sent)
+            if limiter is not None and limiter.on_response(path, status_code, response.headers):
+                if throttles >= limiter.max_throttle_retries:
+                    raise RateLimitedError(path, parse_retry_after(response.headers.get("Retry-After")))
+                # The limiter already waits for Retry-After; a throttle does not use up a retry attempt.
+                throttles += 1
+                attempts -= 1
+                if event is not None:
+                    event.throttles = throttles
+                response.close()
+                continue
+            if retry is not None:
+                delay = retry.delay(method, path, attempts, started, status_code=status_code,
+                                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                                    deadline=deadline)
+                if delay is not None:
+                    response.close()
+                    time.sleep(delay)
+                    continue
+            if stream and status_code == requests.codes.OK:
+                if event is not None:
+                    event.received_bytes += int(response.headers.get("Content-Length") or 0)
+                return {"code": status_code, "content": None, "headers": response.headers, "stream": response}
+            if event is not None:
+                event.received_bytes += len(response.content)
+            return {"code": status_code, "content": response.content, "headers": response.headers}
+
+    def request(self, url, accept, data, idempotency_key=None, timeout=None, deadline=None):
         """
         Sends a POST request to the specified URL with the given data.
 
         :param url: A string representing the URL to which the request will be sent.
         :param accept: A string representing the accept header for the request.
         :param data: A dictionary representing the data to be sent in the request body.
-        :return: A dictionary containing the response status code and content.
+        :param idempotency_key: Optional Idempotency-Key header value. When a retry policy is set,
+            a random key is generated if none is given, and reused by every attempt.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary containing the response status code, content and headers.
         :raises TypeError: If url, accept or data are not strings or if data is not a dictionary.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the call completes.
         """
         headers = {
             "Content-Type": self.content_type_form_urlencoded,
             "Accept": accept
         }
-        params = "?api_key=" + self.api_key+"&api_secret=" + self.api_secret
-        url += params
-        response = requests.post(url, headers=headers,
-                                 data=data, timeout=expect_timeout)
-        return {"code": response.status_code, "content": response.content}
+        if idempotency_key is None and self.retry is not None:
+            idempotency_key = uuid.uuid4().hex
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
+        return self._send("POST", url, headers, data, timeout, deadline)
 
-    def get(self, url, accept):
+    def get(self, url, accept, timeout=None, deadline=None):
         """
         Sends a GET request to the specified URL.
 
         :param url: A string representing the URL to which the request will be sent.
         :param accept: A string representing the accept header for the request.
-        :return: A dictionary containing the response status code and content.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary containing the response status code, content and headers.
         :raises TypeError: If url or accept are not strings.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the call completes.
         """
         headers = {"Accept": accept}
-        params = "?api_key=" + self.api_key+"&api_secret=" + self.api_secret
-        url += params
-        response = requests.get(url, headers=headers)
-        return {"code": response.status_code, "content": response.content}
+        return self._send("GET", url, headers, timeout=timeout, deadline=deadline)
+
+    def get_stream(self, url, accept, timeout=None, deadline=None):
+        """
+        Sends a GET request to the specified URL without buffering a successful response body.
 
-    def delete(self, url, accept):
+        :param url: A string representing the URL to which the request will be sent.
+        :param accept: A string representing the accept header for the request.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary like get. For an OK response, content is None and "stream" holds the
+            requests.Response to read the body from (for example with iter_content); the caller must close it.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the response headers arrive.
+        """
+        headers = {"Accept": accept}
+        return self._send("GET", url, headers, timeout=timeout, deadline=deadline, stream=True)
+
+    def delete(self, url, accept, timeout=None, deadline=None):
         """
         Sends a DELETE request to the specified URL.
 
         :param url: A string representing the URL to which the request will be sent.
         :param accept: A string representing the accept header for the request.
-        :return: A dictionary containing the response status code and content.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary containing the response status code, content and headers.
         :raises TypeError: If url or accept are not strings.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the call completes.
         """
 
         headers = {"Accept": accept}
+        return self._send("DELETE", url, headers, timeout=timeout, deadline=deadline)
+
+
+class AsyncClient:
+    """
+    An asyncio client object that handles API requests to a specific endpoint.
+
+    Requests go through a pooled aiohttp.ClientSession, so many calls can be in
+    flight on one event loop without a thread per request. The session is
+    created on first use inside the running loop; await close() (or use the
+    client as an async context manager) to release it. Requires aiohttp.
+
+    :param api_key: A string representing the API key for authentication.
+    :param api_secret: A string representing the API secret for authentication.
+    :param pool_maxsize: Maximum number of simultaneous connections (0 for no limit).
+    :param pool_maxsize_per_host: Maximum number of simultaneous connections per host (0 for no limit).
+    :param keep_alive: If False, connections are closed after every response.
+    :param limiter: Optional RateLimiter that paces requests and adapts to 429 responses.
+    :param retry: Optional RetryPolicy for transient errors (default is no retries).
+    :param connect_timeout: Seconds to wait for a connection to the API, None to wait forever.
+    :param read_timeout: Seconds to wait for the API to send data, None to wait forever.
+    :param balance_cache: Optional BalanceCache used by Balance.get and updated by every SMS send.
+    :param compact_results: If True, results are compact tuple or __slots__ objects decoded lazily,
+        with phone number lists stored as columns; call to_dict() on them for the regular dictionary.
+    :param json_decoder: Optional callable decoding a JSON body from bytes (default is default_json_decoder()).
+    :param recipient_normalizer: Optional validation.RecipientNormalizer that normalizes and checks the
+        phone numbers of SMS and verification sends before the request.
+    :param coalescer: Optional verify.coalesce.Coalescer sharing one request between identical
+        concurrent Verify.send calls.
+    :param instrumentation: Optional Instrumentation (see client.metrics) receiving every call,
+        for example Metrics or OpenTelemetryTracing.
+    :param breakers: Optional CircuitBreakers (see client.breaker) that fail calls fast with
+        CircuitOpenError while their endpoint keeps failing or answering slowly.
+    """
+
+    def __init__(self, api_key, api_secret, pool_maxsize=100, pool_maxsize_per_host=0, keep_alive=True,
+                 limiter=None, retry=None, connect_timeout=expect_timeout, read_timeout=expect_timeout,
+                 balance_cache=None, compact_results=False, json_decoder=None, recipient_normalizer=None,
+                 coalescer=None, instrumentation=None, breakers=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.endpoint = "https://api.movider.co/v1"
+        self.content_type_json = "application/json"
+        self.content_type_xml = "application/xml"
+        self.content_type_form_urlencoded = "application/x-www-form-urlencoded"
+        self.content_type_form = "multipart/form-data"
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.keep_alive = keep_alive
+        self.limiter = limiter
+        self.retry = retry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.balance_cache = balance_cache
+        self.compact_results = compact_results
+        self.json_decoder = json_decoder if json_decoder is not None else default_json_decoder()
+        self.recipient_normalizer = recipient_normalizer
+        self.coalescer = coalescer
+        self.instrumentation = instrumentation
+        self.breakers = breakers
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def session(self):
+        """
+        Returns the pooled aiohttp.ClientSession, creating it on first use.
+
+        :return: An aiohttp.ClientSession shared by all requests of this client.
+        """
+        if self._session is None or self._session.closed:
+            self._session = self._new_session()
+        return self._session
+
+    def _new_session(self):
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("AsyncClient requires aiohttp, install it with: pip install aiohttp")
+        connector = aiohttp.TCPConnector(limit=self.pool_maxsize,
+                                         limit_per_host=self.pool_maxsize_per_host,
+                                         force_close=not self.keep_alive)
+        if self.instrumentation is not None:
+            return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config()])
+        return aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        """
+        Closes the pooled session and its connections.
+        """
+        session = self._session
+        self._session = None
+        if session is not None:
+            await session.close()
+
+    def _auth_url(self, url):
         params = "?api_key=" + self.api_key+"&api_secret=" + self.api_secret
-        url += params
-        response = requests.delete(url, headers=headers)
-        return {"code": response.status_code, "content": response.content}
+        return url + params
+
+    def _path(self, url):
+        return url[len(self.endpoint):] if url.startswith(self.endpoint) else url
+
+    def health(self):
+        """
+        Returns the circuit breaker health of every endpoint group (see CircuitBreakers.health).
+
+        :return: A dictionary of path prefix to breaker state and rates, empty without breakers.
+        """
+        return self.breakers.health() if self.breakers is not None else {}
+
+    async def _send(self, method, url, headers, data=None, timeout=None, deadline=None):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return await self._attempt(method, url, headers, data, timeout, deadline, None)
+        event = RequestEvent(method, self._path(url))
+        instrumentation.request_started(event)
+        try:
+            response = await self._attempt(method, url, headers, data, timeout, deadline, event)
+            event.status_code = response["code"]
+            return response
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.duration = time.perf_counter() - event.started
+            instrumentation.request_finished(event)
+
+    async def _attempt(self, method, url, headers, data, timeout, deadline, event):
+        import aiohttp
+        limiter = self.limiter
+        retry = self.retry
+        path = self._path(url)
+        breaker = self.breakers.breaker(path) if self.breakers is not None else None
+        started = time.monotonic()
+        attempts = 0
+        throttles = 0
+        while True:
+            probe, wait = admit(limiter, breaker, path, deadline)
+            try:
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                connect, read = resolve_timeout(self, timeout, deadline)
+                options = aiohttp.ClientTimeout(total=remaining_time(deadline), sock_connect=connect, sock_read=read)
+            except BaseException:
+                if breaker is not None:
+                    breaker.release(probe)
+                raise
+            attempts += 1
+            sent = time.perf_counter()
+            try:
+                if event is None:
+                    async with self.session.request(method, self._auth_url(url), headers=headers, data=data,
+                                                    timeout=options) as response:
+                        content = await response.read()
+                else:
+                    event.attempts = attempts
+                    if data is not None:
+                        event.sent_bytes += len(urlencode(data))
+                    async with self.session.request(method, self._auth_url(url), headers=headers, data=data,
+                                                    timeout=options, trace_request_ctx=event) as response:
+                        headers_received = time.perf_counter()
+                        content = await response.read()
+                    event.add_phase("transfer", time.perf_counter() - headers_received)
+            except asyncio.CancelledError:
+                if breaker is not None:
+                    breaker.release(probe)
+                raise
+            except Exception as e:
+                if breaker is not None:
+                    breaker.record(probe, time.perf_counter() - sent, True)
+                delay = None
+                if retry is not None:
+                    delay = retry.delay(method, path, attempts, started, error=e, deadline=deadline)
+                if delay is None:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise DeadlineExceededError("deadline exceeded") from e
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            status_code = response.status
+            if breaker is not None:
+                record_breaker(breaker, probe, status_code, time.perf_counter() - sent)
+            if limiter is not None and limiter.on_response(path, status_code, response.headers):
+                if throttles >= limiter.max_throttle_retries:
+                    raise RateLimitedError(path, parse_retry_after(response.headers.get("Retry-After")))
+                # The limiter already waits for Retry-After; a throttle does not use up a retry attempt.
+                throttles += 1
+                attempts -= 1
+                if event is not None:
+                    event.throttles = throttles
+                continue
+            if retry is not None:
+                delay = retry.delay(method, path, attempts, started, status_code=status_code,
+                                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                                    deadline=deadline)
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    continue
+            if event is not None:
+                event.received_bytes += len(content)
+            return {"code": status_code, "content": content, "headers": response.headers}
+
+    async def request(self, url, accept, data, idempotency_key=None, timeout=None, deadline=None):
+        """
+        Sends a POST request to the specified URL with the given data.
+
+        :param url: A string representing the URL to which the request will be sent.
+        :param accept: A string representing the accept header for the request.
+        :param data: A dictionary representing the data to be sent in the request body.
+        :param idempotency_key: Optional Idempotency-Key header value. When a retry policy is set,
+            a random key is generated if none is given, and reused by every attempt.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary containing the response status code, content and headers.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the call completes.
+        """
+        headers = {
+            "Content-Type": self.content_type_form_urlencoded,
+            "Accept": accept
+        }
+        if idempotency_key is None and self.retry is not None:
+            idempotency_key = uuid.uuid4().hex
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
+        # Like requests, leave out empty fields and send everything else as text.
+        form = {key: str(value) for key, value in data.items() if value is not None}
+        return await self._send("POST", url, headers, form, timeout, deadline)
+
+    async def get(self, url, accept, timeout=None, deadline=None):
+        """
+        Sends a GET request to the specified URL.
+
+        :param url: A string representing the URL to which the request will be sent.
+        :param accept: A string representing the accept header for the request.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary containing the response status code, content and headers.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the call completes.
+        """
+        headers = {"Accept": accept}
+        return await self._send("GET", url, headers, timeout=timeout, deadline=deadline)
+
+    async def delete(self, url, accept, timeout=None, deadline=None):
+        """
+        Sends a DELETE request to the specified URL.
+
+        :param url: A string representing the URL to which the request will be sent.
+        :param accept: A string representing the accept header for the request.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see deadline_after) shared by all attempts of the call.
+        :return: A dictionary containing the response status code, content and headers.
+        :raises RateLimitedError: If a limiter is set and the API keeps throttling the request.
+        :raises CircuitOpenError: If breakers are set and the circuit breaker of the endpoint is open.
+        :raises DeadlineExceededError: If the deadline passes before the call completes.
+        """
+        headers = {"Accept": accept}
+        return await self._send("DELETE", url, headers, timeout=timeout, deadline=deadline)
@@ -0,0 +1,200 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Union
+
+import requests
+
+# Seconds to pause a bucket after a 429 response that has no Retry-After header.
+default_throttle_pause = 1.0
+
+
+class RateLimitedError(Exception):
+    """
+    Raised when the API keeps answering 429 Too Many Requests after the limiter retried.
+
+    :param path: The API path that was throttled.
+    :param retry_after: Seconds the server asked to wait, if it said so.
+    """
+
+    def __init__(self, path: str, retry_after: Optional[float] = None):
+        super().__init__(f"{path} is rate limited" +
+                         (f", retry after {retry_after:g}s" if retry_after is not None else ""))
+        self.path = path
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that adapts its rate to throttling.
+
+    Requests take one token each; tokens refill at the current rate up to capacity. When the
+    server throttles, the rate is halved (down to min_rate) and the bucket pauses for the
+    Retry-After time; every successful response then adds back a small fraction of the
+    configured rate, so throughput settles just below the server's ceiling.
+
+    :param rate: Allowed requests per second.
+    :param capacity: Maximum burst size (default is 1, so requests are evenly spaced).
+    :param min_rate: Lowest rate the bucket slows down to after throttling (default is rate / 10).
+    :param increase: Rate added back after each successful response (default is rate / 20).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, min_rate: Optional[float] = None,
+                 increase: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else 1.0
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.increase = increase if increase is not None else rate / 20
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token and returns how many seconds the caller must wait before using it.
+
+        :return: Seconds to wait, 0 if the request may go now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def wait_time(self) -> float:
+        """
+        Returns how many seconds reserve() would make the caller wait, without taking a token.
+
+        :return: Seconds to wait, 0 if a request could go now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            wait = (1 - tokens) / self.rate if tokens < 1 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """
+        Slows the bucket down after a 429 response.
+
+        :param retry_after: Seconds the server asked to wait, default_throttle_pause if unknown.
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Requests already in flight when the first 429 arrived are throttled too;
+            # only slow down once per pause.
+            if now >= self.blocked_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else default_throttle_pause
+            self.blocked_until = max(self.blocked_until, now + pause)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        """Speeds the bucket back up towards its configured rate after a successful response."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter with a separate budget per API path.
+
+    A request is charged to the budget with the longest matching path prefix, so a budget for
+    "/sms" also covers "/sms/scheduled". Paths without a budget use default_rate, or are not
+    limited if it is None. Pass the limiter to Client or AsyncClient.
+
+    :param budgets: A dictionary of API path prefix to requests per second or TokenBucket,
+        for example {"/sms": 50, "/verify": 10, "/balance": 1}.
+    :param default_rate: Requests per second for paths without a budget (default is no limit).
+    :param max_throttle_retries: How many times a 429 response is retried after waiting before
+        RateLimitedError is raised.
+    """
+
+    def __init__(self, budgets: Dict[str, Union[float, TokenBucket]], default_rate: Optional[float] = None,
+                 max_throttle_retries: int = 2):
+        self.buckets = {}
+        for path, budget in budgets.items():
+            self.buckets[path] = budget if isinstance(budget, TokenBucket) else TokenBucket(budget)
+        self.default = TokenBucket(default_rate) if default_rate is not None else None
+        self.max_throttle_retries = max_throttle_retries
+        # Longest prefixes first, so the most specific budget wins.
+        self._prefixes = sorted(self.buckets, key=len, reverse=True)
+        # Retry-After pauses of throttled paths that have no budget, by top-level path.
+        self._paused_until = {}
+
+    def bucket(self, path: str) -> Optional[TokenBucket]:
+        """
+        Returns the budget a path is charged to.
+
+        :param path: The API path, for example "/sms/scheduled/123".
+        :return: The matching TokenBucket, or None if the path is not limited.
+        """
+        for prefix in self._prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return self.buckets[prefix]
+        return self.default
+
+    def reserve(self, path: str) -> float:
+        """
+        Charges a request to the budget of a path.
+
+        :param path: The API path of the request.
+        :return: Seconds to wait before sending the request.
+        """
+        bucket = self.bucket(path)
+        if bucket is not None:
+            return bucket.reserve()
+        paused_until = self._paused_until.get(top_level_path(path))
+        return max(0.0, paused_until - time.monotonic()) if paused_until else 0.0
+
+    def on_response(self, path: str, status_code: int, headers) -> bool:
+        """
+        Adapts the budget of a path to a response.
+
+        :param path: The API path of the request.
+        :param status_code: The HTTP status code of the response.
+        :param headers: The response headers.
+        :return: True if the response was a throttle (429) and the request may be retried.
+        """
+        bucket = self.bucket(path)
+        if status_code != requests.codes.too_many_requests:
+            if bucket is not None and status_code < 500:
+                bucket.succeeded()
+            return False
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if bucket is not None:
+            bucket.throttled(retry_after)
+        else:
+            pause = retry_after if retry_after is not None else default_throttle_pause
+            self._paused_until[top_level_path(path)] = time.monotonic() + pause
+        return True
+
+
+def top_level_path(path: str) -> str:
+    return "/" + path.lstrip("/").split("/", 1)[0]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header given either in seconds or as an HTTP date.
+
+    :param value: The header value, or None.
+    :return: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,315 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional
+
+# Histogram buckets of durations in seconds and of batch sizes.
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+batch_size_buckets = (1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_id_segment = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint(path: str) -> str:
+    """Returns the path with numeric ids replaced by {id}, to label metrics by endpoint."""
+    return _id_segment.sub("/{id}", path)
+
+
+class RequestEvent:
+    """
+    One API call, from the first attempt to the last, as seen by an Instrumentation.
+
+    phases holds seconds spent per phase, summed over attempts: "server" (request sent until
+    response headers) and "transfer" (reading the body) for every client, and "dns" and
+    "connect" (TCP and TLS) for AsyncClient, whose transport reports them.
+    """
+    __slots__ = ("method", "path", "endpoint", "started", "duration", "attempts", "throttles",
+                 "status_code", "error", "phases", "sent_bytes", "received_bytes", "span", "_marks")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint(path)
+        self.started = time.perf_counter()
+        self.duration = None
+        self.attempts = 0
+        self.throttles = 0
+        self.status_code = None
+        self.error = None
+        self.phases = {}
+        self.sent_bytes = 0
+        self.received_bytes = 0
+        self.span = None
+        self._marks = {}
+
+    def add_phase(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+class Instrumentation:
+    """
+    Receives the requests of a client; pass it to Client or AsyncClient as instrumentation.
+
+    The base class only calls the optional hooks. Subclass it, or use Metrics or
+    OpenTelemetryTracing, to record more. Clients without instrumentation skip all of this.
+
+    :param before_request: Optional callable receiving the RequestEvent before the first attempt.
+    :param after_response: Optional callable receiving the RequestEvent after the call completed or failed.
+    """
+
+    def __init__(self, before_request: Optional[Callable[[RequestEvent], None]] = None,
+                 after_response: Optional[Callable[[RequestEvent], None]] = None):
+        self.before_request = before_request
+        self.after_response = after_response
+
+    def request_started(self, event: RequestEvent):
+        if self.before_request is not None:
+            self.before_request(event)
+
+    def request_finished(self, event: RequestEvent):
+        if self.after_response is not None:
+            self.after_response(event)
+
+    def decoded(self, seconds: float, size: int):
+        """Called after a response body of size bytes was decoded in seconds."""
+
+    def batch_sent(self, size: int):
+        """Called before a bulk batch of size phone numbers is sent."""
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics(Instrumentation):
+    """
+    Counts requests and records latency histograms per endpoint, and exports them in the
+    Prometheus text format with prometheus(). Safe to share between clients and threads.
+
+    :param prefix: Prefix of the metric names.
+    """
+
+    def __init__(self, prefix: str = "movider", before_request=None, after_response=None):
+        super().__init__(before_request, after_response)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.requests: Dict[tuple, int] = {}
+        self.errors: Dict[tuple, int] = {}
+        self.retries: Dict[str, int] = {}
+        self.throttles: Dict[str, int] = {}
+        self.sent_bytes: Dict[str, int] = {}
+        self.received_bytes: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.phases: Dict[str, Histogram] = {}
+        self.decode = Histogram(latency_buckets)
+        self.decoded_bytes = 0
+        self.batch_sizes = Histogram(batch_size_buckets)
+
+    def request_finished(self, event: RequestEvent):
+        path = event.endpoint
+        with self._lock:
+            if event.status_code is not None:
+                key = (path, event.method, str(event.status_code))
+                self.requests[key] = self.requests.get(key, 0) + 1
+            if event.error is not None:
+                key = (path, event.method, type(event.error).__name__)
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if event.attempts > 1:
+                self.retries[path] = self.retries.get(path, 0) + event.attempts - 1
+            if event.throttles:
+                self.throttles[path] = self.throttles.get(path, 0) + event.throttles
+            self.sent_bytes[path] = self.sent_bytes.get(path, 0) + event.sent_bytes
+            self.received_bytes[path] = self.received_bytes.get(path, 0) + event.received_bytes
+            histogram = self.latency.get(path)
+            if histogram is None:
+                histogram = self.latency[path] = Histogram(latency_buckets)
+            histogram.observe(event.duration)
+            for phase, seconds in event.phases.items():
+                histogram = self.phases.get(phase)
+                if histogram is None:
+                    histogram = self.phases[phase] = Histogram(latency_buckets)
+                histogram.observe(seconds)
+        super().request_finished(event)
+
+    def decoded(self, seconds: float, size: int):
+        with self._lock:
+            self.decode.observe(seconds)
+            self.decoded_bytes += size
+
+    def batch_sent(self, size: int):
+        with self._lock:
+            self.batch_sizes.observe(size)
+
+    def prometheus(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            _counter(lines, f"{p}_requests_total", "API calls by final status code.",
+                     ("path", "method", "status"), self.requests)
+            _counter(lines, f"{p}_request_errors_total", "API calls that raised, by exception type.",
+                     ("path", "method", "error"), self.errors)
+            _counter(lines, f"{p}_retries_total", "Attempts beyond the first one.", ("path",), self.retries)
+            _counter(lines, f"{p}_throttles_total", "429 responses retried by the rate limiter.",
+                     ("path",), self.throttles)
+            _counter(lines, f"{p}_request_bytes_total", "Request body bytes sent.", ("path",), self.sent_bytes)
+            _counter(lines, f"{p}_response_bytes_total", "Response body bytes received.",
+                     ("path",), self.received_bytes)
+            _histograms(lines, f"{p}_request_duration_seconds", "Duration of API calls, including retries.",
+                        "path", self.latency)
+            _histograms(lines, f"{p}_request_phase_seconds", "Time spent per request phase.",
+                        "phase", self.phases)
+            _histograms(lines, f"{p}_decode_seconds", "Time spent decoding response bodies.",
+                        None, {None: self.decode})
+            _counter(lines, f"{p}_decoded_bytes_total", "Response bytes decoded.", (), {(): self.decoded_bytes})
+            _histograms(lines, f"{p}_batch_size", "Phone numbers per bulk batch.",
+                        None, {None: self.batch_sizes})
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryTracing(Instrumentation):
+    """
+    Records every API call as an OpenTelemetry client span, with its status code, attempts and
+    phase durations as attributes. Requires opentelemetry-api.
+
+    :param tracer: Optional tracer (default is the global tracer provider's "movider" tracer).
+    """
+
+    def __init__(self, tracer=None, before_request=None, after_response=None):
+        super().__init__(before_request, after_response)
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("OpenTelemetryTracing requires opentelemetry-api, "
+                              "install it with: pip install opentelemetry-api")
+        self._trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer("movider")
+
+    def request_started(self, event: RequestEvent):
+        event.span = self.tracer.start_span(
+            f"{event.method} {event.endpoint}", kind=self._trace.SpanKind.CLIENT,
+            attributes={"http.method": event.method, "http.route": event.endpoint})
+        super().request_started(event)
+
+    def request_finished(self, event: RequestEvent):
+        span = event.span
+        if span is not None:
+            span.set_attribute("movider.attempts", event.attempts)
+            if event.status_code is not None:
+                span.set_attribute("http.status_code", event.status_code)
+            for phase, seconds in event.phases.items():
+                span.set_attribute("movider.phase." + phase, seconds)
+            if event.error is not None:
+                span.record_exception(event.error)
+                span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+            span.end()
+        super().request_finished(event)
+
+
+class Combined(Instrumentation):
+    """
+    Sends every event to several instrumentations, for example Metrics and OpenTelemetryTracing.
+
+    :param instrumentations: The instrumentations, called in order.
+    """
+
+    def __init__(self, *instrumentations: Instrumentation):
+        super().__init__()
+        self.instrumentations = instrumentations
+
+    def request_started(self, event: RequestEvent):
+        for instrumentation in self.instrumentations:
+            instrumentation.request_started(event)
+
+    def request_finished(self, event: RequestEvent):
+        for instrumentation in self.instrumentations:
+            instrumentation.request_finished(event)
+
+    def decoded(self, seconds: float, size: int):
+        for instrumentation in self.instrumentations:
+            instrumentation.decoded(seconds, size)
+
+    def batch_sent(self, size: int):
+        for instrumentation in self.instrumentations:
+            instrumentation.batch_sent(size)
+
+
+def trace_config():
+    """
+    Returns an aiohttp.TraceConfig recording the dns, connect and server phases of the
+    RequestEvent passed to a request as trace_request_ctx.
+    """
+    import aiohttp
+
+    config = aiohttp.TraceConfig()
+
+    def mark(name):
+        async def handler(session, context, params):
+            event = context.trace_request_ctx
+            if isinstance(event, RequestEvent):
+                event._marks[name] = time.perf_counter()
+        return handler
+
+    def phase(name, start, end):
+        async def handler(session, context, params):
+            event = context.trace_request_ctx
+            if isinstance(event, RequestEvent):
+                now = time.perf_counter()
+                event._marks[end] = now
+                if start in event._marks:
+                    event.add_phase(name, now - event._marks.pop(start))
+        return handler
+
+    config.on_dns_resolvehost_start.append(mark("dns_start"))
+    config.on_dns_resolvehost_end.append(phase("dns", "dns_start", "dns_end"))
+    config.on_connection_create_start.append(mark("connect_start"))
+    config.on_connection_create_end.append(phase("connect", "connect_start", "connect_end"))
+    config.on_request_headers_sent.append(mark("server_start"))
+    config.on_request_end.append(phase("server", "server_start", "server_end"))
+    return config
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _counter(lines, name, help, label_names, values):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(values.items()):
+        key = key if isinstance(key, tuple) else (key,)
+        lines.append(f"{name}{_labels(label_names, key)} {value}")
+
+
+def _histograms(lines, name, help, label_name, histograms):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} histogram")
+    for label, histogram in sorted(histograms.items(), key=lambda item: str(item[0])):
+        base = f'{label_name}="{_escape(str(label))}",' if label_name is not None else ""
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{base}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{base}le="+Inf"}} {histogram.count}')
+        labels = "{" + base.rstrip(",") + "}" if base else ""
+        lines.append(f"{name}_sum{labels} {histogram.sum}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
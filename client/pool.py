@@ -0,0 +1,304 @@
+import asyncio
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from balance.balance import Balance
+from balance.cache import BalanceCache
+from client.breaker import CircuitOpenError
+from client.client import DeadlineExceededError
+from client.limiter import RateLimitedError, TokenBucket
+from client.retry import default_retry_exceptions, not_sent
+
+# Routing strategies of ClientPool.
+ROUND_ROBIN = "round_robin"
+LEAST_IN_FLIGHT = "least_in_flight"
+BALANCE = "balance"
+
+# Seconds an account is skipped after it failed a call.
+default_cooldown = 30.0
+
+# API error codes of requests that were not processed, so another account may send them.
+failover_codes = frozenset({401, 402, 403, 429, 503})
+
+# Exceptions that put an account in cooldown; any other exception is raised as is.
+transport_errors = (RateLimitedError, CircuitOpenError) + default_retry_exceptions()
+
+
+class NoAccountAvailableError(Exception):
+    """Raised when every account of a ClientPool is cooling down or below its minimum balance."""
+
+
+class Account:
+    """
+    One set of credentials in a ClientPool.
+
+    An account without a balance_cache on its client gets one, so its balance is known from the
+    remaining_balance of every send.
+
+    :param client: A Client or AsyncClient with the credentials, and endpoint, of the account.
+    :param weight: Relative share of the traffic under round robin, and of the in-flight requests
+        under least in-flight.
+    :param rate: Optional requests per second budget of the account; the pool routes around
+        accounts that used up their budget.
+    :param min_balance: The account is skipped while its balance is below this amount.
+    :param name: Optional name shown by ClientPool.stats (default is the API key).
+    :raises ValueError: If weight is not greater than 0.
+    """
+
+    def __init__(self, client, weight: float = 1, rate: Optional[float] = None, min_balance: float = 0.0,
+                 name: Optional[str] = None):
+        if weight <= 0:
+            raise ValueError("weight must be greater than 0")
+        if client.balance_cache is None:
+            client.balance_cache = BalanceCache()
+        self.client = client
+        self.weight = weight
+        self.bucket = TokenBucket(rate) if rate is not None else None
+        self.min_balance = min_balance
+        self.name = name if name is not None else client.api_key
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.last_error = None
+        self.down_until = 0.0
+        self._current_weight = 0.0
+        self._balance_checked = None
+
+    @property
+    def balance(self) -> Optional[float]:
+        """The last known balance, even if the cache expired, or None if it was never fetched."""
+        return self.client.balance_cache.amount
+
+    def available(self, now: Optional[float] = None) -> bool:
+        """Returns True if the account is not cooling down and not below its minimum balance."""
+        now = time.monotonic() if now is None else now
+        balance = self.balance
+        return now >= self.down_until and (balance is None or balance >= self.min_balance)
+
+    def wait_time(self) -> float:
+        return self.bucket.wait_time() if self.bucket is not None else 0.0
+
+
+class ClientPool:
+    """
+    Spreads calls over several accounts, each with its own credentials, endpoint and rate budget.
+
+    Pass any API function taking the client as its first argument to call() (or call_async() for
+    pools of AsyncClient), for example pool.call(Sms.send, ["66812345678"], "Hello"). Every call
+    goes to one account chosen by the routing strategy among the accounts that are available and
+    within their rate budget. An account that fails a call is skipped for cooldown seconds, and
+    the call moves on to the next account when the request was not processed: the connection
+    could not be opened, a circuit breaker stopped it, the API throttled it (429, 503), rejected
+    the credentials or reported a lack of credit. Other failures (timeouts, 500) may have sent the message, so they are
+    raised or returned instead, unless fail_over_unsafe is True.
+
+    :param accounts: The Account objects, or clients for accounts with the default settings.
+    :param strategy: ROUND_ROBIN (weighted), LEAST_IN_FLIGHT, or BALANCE (highest remaining balance,
+        refreshed with Balance.get when the cached balance expired).
+    :param cooldown: Seconds an account is skipped after it failed a call.
+    :param fail_over_unsafe: If True, also move on to another account after failures where the
+        request may have been processed, at the risk of sending a message twice.
+    :param fails_over: Optional callable receiving an API error object and returning True if another
+        account may take the call (default is default_fails_over).
+    :raises ValueError: If there are no accounts or the strategy is unknown.
+    """
+
+    def __init__(self, accounts: Sequence, strategy: str = ROUND_ROBIN, cooldown: float = default_cooldown,
+                 fail_over_unsafe: bool = False, fails_over: Optional[Callable[[dict], bool]] = None):
+        if not accounts:
+            raise ValueError("a pool needs at least one account")
+        if strategy not in (ROUND_ROBIN, LEAST_IN_FLIGHT, BALANCE):
+            raise ValueError(f"unknown strategy {strategy!r}")
+        self.accounts: List[Account] = [account if isinstance(account, Account) else Account(account)
+                                        for account in accounts]
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.fail_over_unsafe = fail_over_unsafe
+        self.fails_over = fails_over if fails_over is not None else default_fails_over
+        self._lock = threading.Lock()
+
+    def call(self, operation: Callable, *args, **kwargs):
+        """
+        Calls operation(client, *args, **kwargs) with the client of an account, failing over to the
+        other accounts as described in the class documentation.
+
+        :param operation: An API function such as Sms.send, Verify.send or BulkSms.send.
+        :return: The return value of operation. If every account failed with an API error, the
+            result of the last one.
+        :raises NoAccountAvailableError: If no account is available.
+        :raises DeadlineExceededError: If a deadline keyword argument passes while waiting for a rate budget.
+        """
+        deadline = kwargs.get("deadline")
+        tried = []
+        failed = None
+        while True:
+            for account in self._stale_balances():
+                try:
+                    Balance.get(account.client, deadline=deadline)
+                except transport_errors:
+                    # Routing goes on with the last known balance.
+                    pass
+            account = self._select(tried)
+            if account is None:
+                return self._exhausted(failed)
+            try:
+                wait = account.bucket.reserve() if account.bucket is not None else 0.0
+                if wait > 0:
+                    if deadline is not None and time.monotonic() + wait >= deadline:
+                        raise DeadlineExceededError("deadline exceeded while waiting for the account rate budget")
+                    time.sleep(wait)
+                value = operation(account.client, *args, **kwargs)
+            except DeadlineExceededError:
+                raise
+            except transport_errors as e:
+                if not self._failed_over(account, e, tried):
+                    raise
+                failed = e
+                continue
+            finally:
+                self._done(account)
+            error = api_error(value)
+            if error is not None and self.fails_over(error):
+                self._failed_over(account, error, tried)
+                failed = value
+                continue
+            return value
+
+    async def call_async(self, operation: Callable, *args, **kwargs):
+        """
+        Asynchronous version of call for pools of AsyncClient, where operation is a coroutine
+        function such as Sms.send_async.
+        """
+        deadline = kwargs.get("deadline")
+        tried = []
+        failed = None
+        while True:
+            for account in self._stale_balances():
+                try:
+                    await Balance.get_async(account.client, deadline=deadline)
+                except transport_errors:
+                    pass
+            account = self._select(tried)
+            if account is None:
+                return self._exhausted(failed)
+            try:
+                wait = account.bucket.reserve() if account.bucket is not None else 0.0
+                if wait > 0:
+                    if deadline is not None and time.monotonic() + wait >= deadline:
+                        raise DeadlineExceededError("deadline exceeded while waiting for the account rate budget")
+                    await asyncio.sleep(wait)
+                value = await operation(account.client, *args, **kwargs)
+            except DeadlineExceededError:
+                raise
+            except transport_errors as e:
+                if not self._failed_over(account, e, tried):
+                    raise
+                failed = e
+                continue
+            finally:
+                self._done(account)
+            error = api_error(value)
+            if error is not None and self.fails_over(error):
+                self._failed_over(account, error, tried)
+                failed = value
+                continue
+            return value
+
+    def stats(self) -> List[dict]:
+        """Returns the state of every account: name, availability, balance, in-flight requests and counts."""
+        now = time.monotonic()
+        with self._lock:
+            return [{"name": account.name, "available": account.available(now), "balance": account.balance,
+                     "in_flight": account.in_flight, "calls": account.calls, "failures": account.failures,
+                     "last_error": account.last_error} for account in self.accounts]
+
+    def _select(self, tried: List[Account]) -> Optional[Account]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [account for account in self.accounts
+                          if account not in tried and account.available(now)]
+            if not candidates:
+                return None
+            ready = [account for account in candidates if account.wait_time() == 0]
+            if not ready:
+                # Every budget is used up; take the account whose budget frees up first.
+                account = min(candidates, key=Account.wait_time)
+            elif self.strategy == LEAST_IN_FLIGHT:
+                account = min(ready, key=lambda account: account.in_flight / account.weight)
+            elif self.strategy == BALANCE:
+                account = max(ready, key=lambda account: account.balance or 0.0)
+            else:
+                # Smooth weighted round robin: heavier accounts are picked more often, but not in a row.
+                total = 0
+                for account in ready:
+                    account._current_weight += account.weight
+                    total += account.weight
+                account = max(ready, key=lambda account: account._current_weight)
+                account._current_weight -= total
+            account.in_flight += 1
+            account.calls += 1
+            return account
+
+    def _stale_balances(self) -> List[Account]:
+        # Accounts whose balance should be fetched before routing: all expired ones under BALANCE
+        # routing, and otherwise those held back by min_balance, so a top-up is noticed. Each
+        # account is fetched at most once per cache ttl, by one caller.
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            for account in self.accounts:
+                cache = account.client.balance_cache
+                if cache.get() is not None:
+                    continue
+                if self.strategy != BALANCE and (account.balance is None or account.balance >= account.min_balance):
+                    continue
+                if account._balance_checked is not None and now - account._balance_checked < cache.ttl:
+                    continue
+                account._balance_checked = now
+                stale.append(account)
+        return stale
+
+    def _done(self, account: Account):
+        with self._lock:
+            account.in_flight -= 1
+
+    def _failed_over(self, account: Account, error, tried: List[Account]) -> bool:
+        # Puts the account in cooldown; returns True if the call may move on to another account.
+        with self._lock:
+            account.failures += 1
+            account.last_error = error
+            account.down_until = time.monotonic() + self.cooldown
+        tried.append(account)
+        if isinstance(error, (dict, RateLimitedError, CircuitOpenError)) or not_sent(error):
+            return True
+        return self.fail_over_unsafe
+
+    def _exhausted(self, failed):
+        if failed is None:
+            raise NoAccountAvailableError("no account is available")
+        if isinstance(failed, Exception):
+            raise failed
+        return failed
+
+
+def api_error(value) -> Optional[dict]:
+    """Returns the API error object of the return value of an API function, or None if it succeeded."""
+    result = getattr(value, "result", None)
+    if isinstance(result, dict) and "code" in result:
+        return result
+    return None
+
+
+def default_fails_over(error: dict) -> bool:
+    """
+    Returns True if an API error means the request was not processed and another account may
+    send it: throttling, unavailability, rejected credentials or a lack of credit.
+
+    :param error: The API error object, with a code and a name.
+    """
+    code = error.get("code")
+    if code in failover_codes:
+        return True
+    name = str(error.get("name", "")).lower()
+    return "balance" in name or "credit" in name
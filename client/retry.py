@@ -0,0 +1,152 @@
+import asyncio
+import random
+import time
+from typing import Iterable, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from client.breaker import CircuitOpenError
+from client.client import DeadlineExceededError
+from client.limiter import RateLimitedError
+
+# Statuses that mean the server did not process the request, so even a send may be repeated.
+not_processed_statuses = frozenset({requests.codes.too_many_requests, requests.codes.service_unavailable})
+
+# POST paths that only read data and are safe to repeat.
+idempotent_post_paths = frozenset({"/balance"})
+
+
+def default_retry_exceptions() -> tuple:
+    exceptions = (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError)
+    try:
+        import aiohttp
+    except ImportError:
+        return exceptions
+    return exceptions + (aiohttp.ClientConnectionError,)
+
+
+def not_sent(error: BaseException) -> bool:
+    """
+    Returns True if the error happened before the request reached the server.
+
+    :param error: The exception raised by the transport.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        reason = error.args[0] if error.args else None
+        return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+    try:
+        import aiohttp
+    except ImportError:
+        return False
+    return isinstance(error, aiohttp.ClientConnectorError)
+
+
+def in_doubt(error: BaseException) -> bool:
+    """
+    Returns True if a call that raised error may still have been processed by the server, so
+    sending it again could repeat it (for example a read timeout after the request was sent).
+
+    :param error: The exception raised by the call.
+    """
+    if isinstance(error, (RateLimitedError, CircuitOpenError)):
+        return False
+    if isinstance(error, DeadlineExceededError):
+        # Raised before an attempt was sent, unless it replaces the error of that attempt.
+        return error.__cause__ is not None and in_doubt(error.__cause__)
+    return not not_sent(error)
+
+
+def status_in_doubt(status_code: int) -> bool:
+    """Returns True if an error status means the server may have processed the request anyway."""
+    return status_code >= 500 and status_code not in not_processed_statuses
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed request is sent again.
+
+    Delays grow exponentially from backoff_base up to backoff_max, and with jitter each delay is
+    drawn uniformly between 0 and that value so that concurrent workers do not retry in lockstep.
+
+    GET, DELETE and read-only POST requests are retried on any retryable status or exception.
+    Other POST requests (sending SMS or verification codes) are not idempotent: clients send them
+    with an Idempotency-Key header that stays the same across attempts, and unless retry_unsafe
+    is True they are only retried when the request provably was not processed (the connection
+    could not be opened, or the API answered 429 or 503), so a retry cannot double-send.
+
+    :param max_attempts: Maximum number of attempts, including the first one.
+    :param backoff_base: Delay in seconds before the first retry.
+    :param backoff_max: Upper bound of a single delay in seconds.
+    :param jitter: If True, randomize delays ("full jitter").
+    :param retry_statuses: HTTP status codes that are retried.
+    :param retry_exceptions: Exception types that are retried (default is connection errors and timeouts).
+    :param deadline: Maximum seconds spent on one call across all attempts, None for no limit.
+    :param retry_unsafe: If True, retry non-idempotent requests like idempotent ones.
+    """
+
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 jitter: bool = True, retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 retry_exceptions: Optional[tuple] = None, deadline: Optional[float] = None,
+                 retry_unsafe: bool = False):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = retry_exceptions if retry_exceptions is not None else default_retry_exceptions()
+        self.deadline = deadline
+        self.retry_unsafe = retry_unsafe
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the delay before the next attempt.
+
+        :param attempt: Number of attempts made so far (1 after the first failure).
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def idempotent(self, method: str, path: str) -> bool:
+        return method != "POST" or path in idempotent_post_paths
+
+    def delay(self, method: str, path: str, attempt: int, started: float,
+              status_code: Optional[int] = None, error: Optional[BaseException] = None,
+              retry_after: Optional[float] = None, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Returns how long to wait before retrying a failed attempt, or None if it must not be retried.
+
+        :param method: The HTTP method of the request.
+        :param path: The API path of the request.
+        :param attempt: Number of attempts made so far.
+        :param started: time.monotonic() when the first attempt started.
+        :param status_code: The HTTP status code, if a response was received.
+        :param error: The exception raised, if no response was received.
+        :param retry_after: Seconds the server asked to wait, if it said so.
+        :param deadline: Absolute time.monotonic() deadline of the call, if any.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if error is not None:
+            if not isinstance(error, self.retry_exceptions):
+                return None
+            repeatable = not_sent(error)
+        else:
+            if status_code not in self.retry_statuses:
+                return None
+            repeatable = status_code in not_processed_statuses
+        if not (repeatable or self.retry_unsafe or self.idempotent(method, path)):
+            return None
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        now = time.monotonic()
+        if self.deadline is not None and now + delay - started >= self.deadline:
+            return None
+        if deadline is not None and now + delay >= deadline:
+            return None
+        return delay
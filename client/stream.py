@@ -0,0 +1,163 @@
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, List
+
+# Bytes read from a streamed response at a time.
+default_chunk_size = 64 * 1024
+
+_whitespace = re.compile(r"[\s,]*")
+# Characters that open or close an element or a string, and the ones that end or escape a string.
+_structure = re.compile(r'[\[\]{}"]')
+_string_end = re.compile(r'["\\]')
+
+
+class JsonArrayStream:
+    """
+    Incrementally decodes the elements of one array member of a JSON object, for example the
+    "items" of {"items": [...]}, as chunks of the body arrive. Only the elements that are not
+    complete yet are kept in memory. Elements must be JSON objects or arrays, so that a complete
+    element cannot be mistaken for the prefix of a longer one.
+
+    Complete elements are decoded straight away. When decoding fails, the brackets and strings of
+    the element are scanned to tell an element cut by the end of the chunk from a malformed one:
+    a malformed element raises at once instead of buffering the rest of the body, and a cut one
+    is decoded only once it is complete, its scan resuming where the previous chunk stopped.
+
+    :param key: The name of the member holding the array.
+    """
+
+    def __init__(self, key: str):
+        self._start = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._in_array = False
+        # Scan state of the incomplete element at the start of _buffer.
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List:
+        """
+        Adds a chunk of the body and returns the array elements completed by it.
+
+        :param chunk: The next bytes of the body.
+        :return: A list of decoded elements, possibly empty.
+        :raises ValueError: If the array holds something other than objects and arrays, or an
+            element is not valid JSON.
+        """
+        if self.done:
+            return []
+        buffer = self._buffer + self._text.decode(chunk)
+        items = []
+        pos = 0
+        if not self._in_array:
+            match = self._start.search(buffer)
+            if match is None:
+                # Keep a tail long enough to hold a key split across chunks.
+                self._buffer = buffer[-(len(self._start.pattern) + 64):]
+                return items
+            self._in_array = True
+            pos = match.end()
+        while True:
+            if self._depth == 0:
+                pos = _whitespace.match(buffer, pos).end()
+                if pos >= len(buffer):
+                    break
+                char = buffer[pos]
+                if char == "]":
+                    self.done = True
+                    break
+                if char not in "{[":
+                    raise ValueError(f"malformed JSON array: unexpected {char!r} where an element should start")
+                try:
+                    item, pos = self._json.raw_decode(buffer, pos)
+                    items.append(item)
+                    continue
+                except json.JSONDecodeError:
+                    # Truncated by the end of the chunk, or malformed: the scan tells them apart.
+                    self._scan = pos
+            end = self._scan_element(buffer)
+            if end is None:
+                # Keep the incomplete element, and where its scan stopped, for the next chunk.
+                self._scan -= pos
+                break
+            try:
+                item, decoded_end = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"malformed JSON array element: {e.msg}") from e
+            if decoded_end != end:
+                raise ValueError("malformed JSON array element")
+            items.append(item)
+            pos = end
+        self._buffer = "" if self.done else buffer[pos:]
+        return items
+
+    def _scan_element(self, buffer: str):
+        # Scans from self._scan; returns the end of the element if it is complete, else None.
+        i = self._scan
+        depth = self._depth
+        in_string = self._in_string
+        end = None
+        while True:
+            if in_string:
+                match = _string_end.search(buffer, i)
+                if match is None:
+                    i = len(buffer)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        # Rescan the escape once the escaped character has arrived.
+                        i = match.start()
+                        break
+                    i = match.end() + 1
+                    continue
+                in_string = False
+                i = match.end()
+                continue
+            match = _structure.search(buffer, i)
+            if match is None:
+                i = len(buffer)
+                break
+            char = match.group()
+            i = match.end()
+            if char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    end = i
+                    break
+        self._scan = i
+        self._depth = depth
+        self._in_string = in_string
+        return end
+
+    def close(self):
+        """
+        Checks that the whole array was read.
+
+        :raises ValueError: If the body ended before the end of the array.
+        """
+        if not self.done:
+            raise ValueError("response body ended before the end of the JSON array")
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator:
+    """
+    Yields the elements of the array member key of a JSON object streamed as chunks of bytes.
+
+    :param chunks: The body, for example response.iter_content(default_chunk_size).
+    :param key: The name of the member holding the array.
+    :raises ValueError: If the body ended before the end of the array.
+    """
+    parser = JsonArrayStream(key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    parser.close()
@@ -0,0 +1,17 @@
+import asyncio
+
+from client.client import AsyncClient
+from sms.sms import Sms
+
+
+# Replace with your own API key and secret
+api_key = "your_api_key"
+api_secret = "your_api_secret"
+
+
+async def main():
+    async with AsyncClient(api_key, api_secret) as movider_client:
+        sms = await Sms.send_async(movider_client,["your_recipient_number"],"your_message_to_send")
+        print(sms.result)
+
+asyncio.run(main())
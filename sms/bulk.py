@@ -0,0 +1,415 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import validation as v
+
+from client import client as c
+from client.retry import in_doubt, status_in_doubt
+from sms import sms as s
+
+# Number of recipients sent in one request by default.
+default_batch_size = 1000
+# Number of batches sent at the same time by default.
+default_max_workers = 4
+
+
+class BatchResult:
+    def __init__(self, index: int, to: List[str], result: Optional[dict] = None, error=None,
+                 in_doubt: bool = False):
+        """
+        Outcome of a single batch of a bulk send.
+
+        :param index: Position of the batch in the bulk send.
+        :param to: The phone numbers sent in this batch.
+        :param result: The ResultSms dictionary (or CompactResultSms) returned by the API if the batch succeeded.
+        :param error: The API error object or the exception raised if the batch failed.
+        :param in_doubt: True if the batch failed after its request may have reached the API (a read
+            timeout, a 5xx response), so sending it again could deliver its messages twice.
+        """
+        self.index = index
+        self.to = to
+        self.result = result
+        self.error = error
+        self.in_doubt = in_doubt
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkResult:
+    def __init__(self, text: str, delivery_datetime: Optional[str] = None, params: Optional[s.Params] = None,
+                 compact: bool = False):
+        """
+        Merged outcome of a bulk send. The merged fields only cover the batches that succeeded;
+        failed batches are kept in batches with their error so they can be retried. If reading the
+        phone numbers failed partway, error holds the exception: the batches sent before it are
+        kept, and the numbers after it were not sent.
+
+        :param text: The text message that was sent.
+        :param delivery_datetime: The RFC3339 delivery datetime for scheduled sends.
+        :param params: Parameters used for every batch.
+        :param compact: If True, phone_number_list and bad_phone_number_list are merged as
+            PhoneNumberColumns and BadNumberColumns instead of lists of dictionaries.
+        """
+        self.text = text
+        self.delivery_datetime = delivery_datetime
+        self.params = params
+        self.compact = compact
+        self.remaining_balance = None
+        self.total_sms = 0
+        self.phone_number_list = s.PhoneNumberColumns() if compact else []
+        self.bad_phone_number_list = s.BadNumberColumns() if compact else []
+        self.batches = []
+        self.error = None
+
+    def add(self, batch: BatchResult):
+        self.batches.append(batch)
+        if not batch.ok:
+            return
+        result = batch.result
+        if isinstance(result, s.CompactResultSms):
+            total_sms, remaining_balance = result.total_sms, result.remaining_balance
+            phone_numbers, bad_numbers = result.phone_number_list, result.bad_phone_number_list
+            if not self.compact:
+                phone_numbers, bad_numbers = phone_numbers.to_list(), bad_numbers.to_list()
+        else:
+            total_sms, remaining_balance = result["total_sms"], result["remaining_balance"]
+            phone_numbers, bad_numbers = result["phone_number_list"], result["bad_phone_number_list"]
+            if self.compact:
+                phone_numbers = s.phone_number_columns_from_json(phone_numbers)
+                bad_numbers = s.bad_number_columns_from_json(bad_numbers)
+        self.total_sms += total_sms
+        self.phone_number_list.extend(phone_numbers)
+        self.bad_phone_number_list.extend(bad_numbers)
+        # Batches finish in any order; the balance only goes down, so the lowest value is the final one.
+        # Batches rejected locally may not know the balance.
+        if remaining_balance is None:
+            return
+        if self.remaining_balance is None or remaining_balance < self.remaining_balance:
+            self.remaining_balance = remaining_balance
+
+    def failed(self) -> List[BatchResult]:
+        """Returns the batches that did not succeed."""
+        return [batch for batch in self.batches if not batch.ok]
+
+    def retryable(self, resend_in_doubt: bool = False) -> List[BatchResult]:
+        """
+        Returns the failed batches that retry sends again.
+
+        :param resend_in_doubt: If True, include the batches whose request may have reached the API.
+        """
+        return [batch for batch in self.batches if not batch.ok and (resend_in_doubt or not batch.in_doubt)]
+
+    def kept(self, resend_in_doubt: bool = False) -> List[BatchResult]:
+        # The batches a retry leaves as they are: the successful ones and, by default, the in-doubt ones.
+        return [batch for batch in self.batches if batch.ok or (batch.in_doubt and not resend_in_doubt)]
+
+
+class BulkScheduleResult:
+    def __init__(self):
+        """
+        Outcome of a bulk operation on scheduled messages, per schedule id.
+
+        results holds the API result of every id that succeeded, errors the API error object or
+        the exception raised for every id that failed.
+        """
+        self.results: Dict[str, object] = {}
+        self.errors: Dict[str, object] = {}
+
+    def failed(self) -> List[str]:
+        """Returns the schedule ids that did not succeed."""
+        return list(self.errors)
+
+
+class BulkSms:
+    def send(client: c.Client, to: Iterable[str], text: str, params: Optional[s.Params] = None,
+             batch_size: int = default_batch_size, max_workers: int = default_max_workers,
+             timeout=None, deadline=None) -> BulkResult:
+        """Sends an SMS message to a large list of phone numbers, split into concurrent batches.
+
+    Each batch is a separate request, so a failed batch does not affect the others and can be
+    sent again with BulkSms.retry. The client pool size should be at least max_workers.
+    Duplicate numbers within a batch window are sent only once.
+
+    :param client: A Client object containing API authentication details.
+    :param to: A list or any other iterable of phone numbers to send the SMS message to.
+    :param text: The text message to be sent.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param batch_size: Maximum number of phone numbers per request.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole bulk send. Batches that
+        cannot be sent before it are reported as failed with DeadlineExceededError, so they can be retried.
+    :raises TypeError: If client parameter is not an instance of Client class.
+    :raises TypeError: If to parameter is not an iterable, or yields a value that is not a string
+        before any batch was sent; later errors of to are kept in BulkResult.error.
+    :raises TypeError: If text parameter is not a string.
+    :raises ValueError: If batch_size or max_workers is lower than 1.
+    :return: A BulkResult object with the merged result and the outcome of every batch."""
+        return BulkSms.send_schedule(client, to, text, None, params, batch_size, max_workers, timeout, deadline)
+
+    def send_schedule(client: c.Client, to: Iterable[str], text: str, delivery_datetime: Optional[str],
+                      params: Optional[s.Params] = None, batch_size: int = default_batch_size,
+                      max_workers: int = default_max_workers, timeout=None, deadline=None) -> BulkResult:
+        """Schedules an SMS message to a large list of phone numbers, split into concurrent batches.
+
+    :param client: A Client object containing API authentication details.
+    :param to: A list or any other iterable of phone numbers to send the SMS message to.
+    :param text: The text message to be sent.
+    :param delivery_datetime: The date and time to send the message in RFC3339 format, None to send now.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param batch_size: Maximum number of phone numbers per request.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole bulk send. Batches that
+        cannot be sent before it are reported as failed with DeadlineExceededError, so they can be retried.
+    :return: A BulkResult object with the merged result and the outcome of every batch."""
+        v.validate([client,text],[c.Client,str],["client","text"])
+        v.validate_iterable(to,"to")
+        validate_batching(batch_size, max_workers)
+        if params is None:
+            params = s.Params()
+        bulk = BulkResult(text, delivery_datetime, params, client.compact_results)
+        errors = []
+        batches = enumerate(iter_batches(to, batch_size))
+        for batch in send_batches(client, batches, text, delivery_datetime, params, max_workers,
+                                  timeout, deadline, errors):
+            bulk.add(batch)
+        if errors:
+            if not bulk.batches:
+                raise errors[0]
+            bulk.error = errors[0]
+        bulk.batches.sort(key=lambda batch: batch.index)
+        return bulk
+
+    def iter_send(client: c.Client, to: Iterable[str], text: str, params: Optional[s.Params] = None,
+                  batch_size: int = default_batch_size, max_workers: int = default_max_workers,
+                  timeout=None, deadline=None) -> Iterator[BatchResult]:
+        """Sends an SMS message to a stream of phone numbers and yields the result of every batch.
+
+    Numbers are read lazily from to (for example a generator over a file), validated and
+    de-duplicated one batch window at a time, and each batch is sent as soon as it is full.
+    At most max_workers batches are in flight, so memory use depends on batch_size and
+    max_workers, not on the number of recipients. Batches are yielded as they complete.
+
+    :param client: A Client object containing API authentication details.
+    :param to: Any iterable of phone numbers to send the SMS message to.
+    :param text: The text message to be sent.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param batch_size: Maximum number of phone numbers per request.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole bulk send. Batches that
+        cannot be sent before it are reported as failed with DeadlineExceededError, so they can be retried.
+    :raises TypeError: If to is not an iterable, or (while iterating) if it yields a value that is not
+        a string. The batches already in flight are yielded first.
+    :return: A generator of BatchResult objects."""
+        return BulkSms.iter_send_schedule(client, to, text, None, params, batch_size, max_workers,
+                                          timeout, deadline)
+
+    def iter_send_schedule(client: c.Client, to: Iterable[str], text: str, delivery_datetime: Optional[str],
+                           params: Optional[s.Params] = None, batch_size: int = default_batch_size,
+                           max_workers: int = default_max_workers, timeout=None,
+                           deadline=None) -> Iterator[BatchResult]:
+        """Schedules an SMS message to a stream of phone numbers and yields the result of every batch.
+
+    :param client: A Client object containing API authentication details.
+    :param to: Any iterable of phone numbers to send the SMS message to.
+    :param text: The text message to be sent.
+    :param delivery_datetime: The date and time to send the message in RFC3339 format, None to send now.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param batch_size: Maximum number of phone numbers per request.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole bulk send. Batches that
+        cannot be sent before it are reported as failed with DeadlineExceededError, so they can be retried.
+    :return: A generator of BatchResult objects."""
+        v.validate([client,text],[c.Client,str],["client","text"])
+        v.validate_iterable(to,"to")
+        validate_batching(batch_size, max_workers)
+        if params is None:
+            params = s.Params()
+
+        batches = enumerate(iter_batches(to, batch_size))
+        return send_batches(client, batches, text, delivery_datetime, params, max_workers, timeout, deadline)
+
+    def retry(client: c.Client, bulk: BulkResult, max_workers: int = default_max_workers,
+              timeout=None, deadline=None, resend_in_doubt: bool = False) -> BulkResult:
+        """Sends the failed batches of a bulk send again. Batches that already succeeded are not sent.
+
+    Batches whose request may have reached the API (batch.in_doubt, for example after a read
+    timeout) are left failed unless resend_in_doubt is True, since the API may already have sent
+    their messages; check them with the delivery reports or the balance first.
+
+    :param client: A Client object containing API authentication details.
+    :param bulk: The BulkResult returned by a previous bulk send.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole bulk send. Batches that
+        cannot be sent before it are reported as failed with DeadlineExceededError, so they can be retried.
+    :param resend_in_doubt: If True, also send the in-doubt batches again, at the risk of sending messages twice.
+    :return: The same BulkResult, updated with the outcome of the retried batches."""
+        v.validate([client,bulk],[c.Client,BulkResult],["client","bulk"])
+        validate_batching(1, max_workers)
+        failed = [(batch.index, batch.to) for batch in bulk.retryable(resend_in_doubt)]
+        bulk.batches = bulk.kept(resend_in_doubt)
+        for batch in send_batches(client, failed, bulk.text, bulk.delivery_datetime, bulk.params, max_workers,
+                                  timeout, deadline):
+            bulk.add(batch)
+        bulk.batches.sort(key=lambda batch: batch.index)
+        return bulk
+
+    def get_scheduled(client: c.Client, schedule_ids: Iterable[str], max_workers: int = default_max_workers,
+                      timeout=None, deadline=None) -> BulkScheduleResult:
+        """Returns information about many scheduled SMS messages, fetched concurrently.
+
+    :param client: A Client object containing API authentication details.
+    :param schedule_ids: The IDs of the scheduled messages to retrieve.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole operation.
+    :raises TypeError: If client parameter is not an instance of Client class or schedule_ids contains a non-string.
+    :return: A BulkScheduleResult with the scheduled message of every id, or its error."""
+        return run_scheduled(client, schedule_ids, "GET", max_workers, timeout, deadline)
+
+    def del_scheduled(client: c.Client, schedule_ids: Iterable[str], max_workers: int = default_max_workers,
+                      timeout=None, deadline=None) -> BulkScheduleResult:
+        """Deletes many scheduled SMS messages concurrently.
+
+    :param client: A Client object containing API authentication details.
+    :param schedule_ids: The IDs of the scheduled messages to delete.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole operation.
+    :raises TypeError: If client parameter is not an instance of Client class or schedule_ids contains a non-string.
+    :return: A BulkScheduleResult with "Delete Complete" for every deleted id, or its error."""
+        return run_scheduled(client, schedule_ids, "DELETE", max_workers, timeout, deadline)
+
+
+def run_scheduled(client: c.Client, schedule_ids: Iterable[str], method: str, max_workers: int,
+                  timeout, deadline) -> BulkScheduleResult:
+    v.validate([client],[c.Client],["client"])
+    v.validate_iterable(schedule_ids,"schedule_ids")
+    validate_batching(1, max_workers)
+    schedule_ids = list(dict.fromkeys(schedule_ids))
+    v.validate_list(schedule_ids,str,"schedule_ids")
+    tasks = (partial(schedule_call, client, schedule_id, method, timeout, deadline)
+             for schedule_id in schedule_ids)
+    bulk = BulkScheduleResult()
+    for schedule_id, result, error in run_bounded(tasks, max_workers):
+        if error is None:
+            bulk.results[schedule_id] = result
+        else:
+            bulk.errors[schedule_id] = error
+    return bulk
+
+
+def schedule_call(client: c.Client, schedule_id: str, method: str, timeout, deadline) -> tuple:
+    url = client.endpoint + s.SMS_SCHEDULE_URI_PATH + "/" + schedule_id
+    try:
+        if method == "DELETE":
+            response = client.delete(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        else:
+            response = client.get(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        error = c.error_from_response(response)
+        if error is not None:
+            return schedule_id, None, error
+        if method == "DELETE":
+            return schedule_id, s.deleted_from_response(response).result, None
+        return schedule_id, s.schedule_from_response(response, client).result, None
+    except Exception as e:
+        return schedule_id, None, e
+
+
+def validate_batching(batch_size: int, max_workers: int):
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+
+def iter_batches(to: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Reads phone numbers lazily and yields lists of at most batch_size distinct numbers.
+
+    Duplicates are removed within each window only, so memory stays bounded by batch_size."""
+    batch = []
+    seen = set()
+    for number in to:
+        if not isinstance(number, str):
+            raise TypeError("to can contain only str")
+        if number in seen:
+            continue
+        seen.add(number)
+        batch.append(number)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+            seen = set()
+    if batch:
+        yield batch
+
+
+def run_bounded(tasks: Iterable[Callable], max_workers: int, errors: Optional[List[Exception]] = None) -> Iterator:
+    """Runs zero-argument callables over a pool of max_workers threads and yields their results.
+
+    Tasks are pulled from the iterable only when a worker is free, and results are yielded in completion order.
+    If the iterable raises, no further task is pulled and the tasks in flight are finished and yielded; the
+    exception is then added to errors, or raised if errors is None."""
+    error = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        tasks = iter(tasks)
+        while True:
+            try:
+                task = next(tasks)
+            except StopIteration:
+                break
+            except Exception as e:
+                error = e
+                break
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(task))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    if error is not None:
+        if errors is None:
+            raise error
+        errors.append(error)
+
+
+def send_batches(client: c.Client, batches, text: str, delivery_datetime: Optional[str],
+                 params: s.Params, max_workers: int, timeout=None, deadline=None,
+                 errors: Optional[List[Exception]] = None) -> Iterator[BatchResult]:
+    """Sends (index, to) batches over a pool of max_workers threads and yields a BatchResult per batch.
+
+    An exception raised by batches is handled as in run_bounded."""
+    tasks = (partial(send_batch, client, index, to, text, delivery_datetime, params, timeout, deadline)
+             for index, to in batches)
+    return run_bounded(tasks, max_workers, errors)
+
+
+def send_batch(client: c.Client, index: int, to: List[str], text: str,
+               delivery_datetime: Optional[str], params: s.Params, timeout=None, deadline=None,
+               idempotency_key: Optional[str] = None) -> BatchResult:
+    recipients, rejected = s.clean_recipients(client, to)
+    if not recipients:
+        return BatchResult(index, to, result=s.rejected_result(client, rejected).result)
+    if client.instrumentation is not None:
+        client.instrumentation.batch_sent(len(recipients))
+    data = s.make_request_data(client, recipients, text, delivery_datetime, params)
+    path = s.SMS_SCHEDULE_URI_PATH if delivery_datetime else s.SMS_URI_PATH
+    try:
+        response = client.request(client.endpoint + path, client.content_type_form, data,
+                                  idempotency_key=idempotency_key, timeout=timeout, deadline=deadline)
+        error = c.error_from_response(response)
+        if error is not None:
+            return BatchResult(index, to, error=error, in_doubt=status_in_doubt(response["code"]))
+        return BatchResult(index, to, result=s.add_rejected(s.sms_from_response(response, client), rejected).result)
+    except Exception as e:
+        return BatchResult(index, to, error=e, in_doubt=in_doubt(e))
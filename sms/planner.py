@@ -0,0 +1,212 @@
+import math
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import validation as v
+
+from client import client as c
+from sms import bulk as b
+from sms import sms as s
+
+# Seconds between two delivery times of a plan by default.
+default_slot_seconds = 60.0
+
+
+class Slot(NamedTuple):
+    """A scheduled request of a plan: the phone numbers delivered at one RFC3339 delivery_datetime."""
+    delivery_datetime: str
+    to: List[str]
+
+
+class CampaignStatus(NamedTuple):
+    """
+    Status of a campaign's scheduled messages: the scheduled message of every id (or its error),
+    and the number of scheduled requests per delivery_status.
+    """
+    schedules: b.BulkScheduleResult
+    counts: Dict[str, int]
+
+
+def rfc3339(moment: datetime) -> str:
+    """Formats a timezone-aware datetime in RFC3339, with Z for UTC."""
+    text = moment.isoformat(timespec="seconds")
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def plan(to: List[str], start: datetime, end: Optional[datetime] = None, rate: Optional[float] = None,
+         slot_seconds: float = default_slot_seconds, batch_size: int = b.default_batch_size) -> List[Slot]:
+    """
+    Divides phone numbers into time slots so that they are delivered at a steady rate.
+
+    Slots start at start and are slot_seconds apart; each one holds the numbers due in it at the
+    rate, split into requests of at most batch_size numbers. Fractional numbers per slot carry over,
+    so the average rate is exact.
+
+    :param to: The phone numbers, in delivery order.
+    :param start: Timezone-aware delivery time of the first slot.
+    :param end: Optional timezone-aware time the last slot must start before. Without a rate, the
+        numbers are spread evenly between start and end.
+    :param rate: Messages per second. Required if end is not given.
+    :param slot_seconds: Seconds between two delivery times.
+    :param batch_size: Maximum number of phone numbers per request.
+    :raises ValueError: If neither end nor rate is given, a time is not timezone-aware, or the
+        window is too short for the numbers at the rate.
+    :return: The slots, in delivery order.
+    """
+    if start.tzinfo is None or (end is not None and end.tzinfo is None):
+        raise ValueError("start and end must be timezone-aware datetimes")
+    if slot_seconds <= 0:
+        raise ValueError("slot_seconds must be greater than 0")
+    b.validate_batching(batch_size, 1)
+    if not to:
+        return []
+    if rate is None:
+        if end is None:
+            raise ValueError("either end or rate is required")
+        window = (end - start).total_seconds()
+        if window <= 0:
+            raise ValueError("end must be after start")
+        # Spread over every slot starting before end.
+        rate = len(to) / (math.ceil(window / slot_seconds) * slot_seconds)
+    elif rate <= 0:
+        raise ValueError("rate must be greater than 0")
+    per_slot = rate * slot_seconds
+    slots_needed = math.ceil(len(to) / per_slot - 1e-9)
+    if end is not None and start + timedelta(seconds=(slots_needed - 1) * slot_seconds) >= end:
+        raise ValueError(f"{len(to)} messages at {rate:g} per second do not fit between start and end")
+    slots = []
+    taken = 0
+    for index in range(slots_needed):
+        due = min(len(to), math.floor(per_slot * (index + 1) + 1e-9)) if index < slots_needed - 1 else len(to)
+        delivery_datetime = rfc3339(start + timedelta(seconds=index * slot_seconds))
+        for first in range(taken, due, batch_size):
+            slots.append(Slot(delivery_datetime, to[first:min(due, first + batch_size)]))
+        taken = due
+    return slots
+
+
+class Campaign(b.BulkResult):
+    def __init__(self, text: str, params: Optional[s.Params] = None, compact: bool = False):
+        """
+        Handle of a planned campaign: the merged result of its scheduled requests, like BulkResult,
+        with the delivery_datetime of every batch by batch index.
+
+        :param text: The text message that was scheduled.
+        :param params: Parameters used for every request.
+        :param compact: If True, the phone number lists are merged as columns.
+        """
+        super().__init__(text, None, params, compact)
+        self.delivery_datetimes: Dict[int, str] = {}
+        self.cancelled: List[str] = []
+
+    def scheduled_ids(self) -> List[str]:
+        """Returns the scheduled_id of every request that was scheduled and not cancelled."""
+        cancelled = set(self.cancelled)
+        ids = []
+        for batch in self.batches:
+            if batch.ok:
+                scheduled_id = batch.result.scheduled_id if isinstance(batch.result, s.CompactResultSms) \
+                    else batch.result.get("scheduled_id")
+                if scheduled_id is not None and str(scheduled_id) not in cancelled:
+                    ids.append(str(scheduled_id))
+        return ids
+
+    def status(self, client: c.Client, max_workers: int = b.default_max_workers,
+               timeout=None, deadline=None) -> CampaignStatus:
+        """Fetches the scheduled message of every request of the campaign concurrently.
+
+    :param client: A Client object containing API authentication details.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole operation.
+    :return: A CampaignStatus with every scheduled message and the count per delivery_status."""
+        schedules = b.BulkSms.get_scheduled(client, self.scheduled_ids(), max_workers, timeout, deadline)
+        counts: Dict[str, int] = {}
+        for result in schedules.results.values():
+            status = result["delivery_status"] if isinstance(result, dict) else result.delivery_status
+            counts[status] = counts.get(status, 0) + 1
+        return CampaignStatus(schedules, counts)
+
+    def cancel(self, client: c.Client, max_workers: int = b.default_max_workers,
+               timeout=None, deadline=None) -> b.BulkScheduleResult:
+        """Deletes every scheduled request of the campaign concurrently. Deleted ids are added to cancelled.
+
+    :param client: A Client object containing API authentication details.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole operation.
+    :return: A BulkScheduleResult with the outcome for every id."""
+        deleted = b.BulkSms.del_scheduled(client, self.scheduled_ids(), max_workers, timeout, deadline)
+        self.cancelled.extend(deleted.results)
+        return deleted
+
+
+class Planner:
+    def schedule(client: c.Client, to: Iterable[str], text: str, start: datetime, end: Optional[datetime] = None,
+                 rate: Optional[float] = None, params: Optional[s.Params] = None,
+                 slot_seconds: float = default_slot_seconds, batch_size: int = b.default_batch_size,
+                 max_workers: int = b.default_max_workers, timeout=None, deadline=None) -> Campaign:
+        """Schedules an SMS message to many phone numbers, delivered at a steady rate over a time window.
+
+    The numbers are divided into time slots (see plan), and each slot is scheduled with
+    Sms.send_schedule requests sent concurrently, so the campaign reaches phones at the target rate
+    instead of all at once. Duplicate numbers are sent only once.
+
+    :param client: A Client object containing API authentication details.
+    :param to: A list or any other iterable of phone numbers, in delivery order.
+    :param text: The text message to be sent.
+    :param start: Timezone-aware delivery time of the first messages.
+    :param end: Optional timezone-aware time the last messages must be delivered before.
+    :param rate: Messages per second; without it, the numbers are spread evenly until end.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param slot_seconds: Seconds between two delivery times.
+    :param batch_size: Maximum number of phone numbers per request.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for scheduling the whole campaign.
+    :raises TypeError: If client is not a Client, text is not a string, or to is not an iterable of strings.
+    :raises ValueError: If the plan is impossible (see plan).
+    :return: A Campaign handle with the outcome of every request; failed requests can be sent again with retry."""
+        v.validate([client,text],[c.Client,str],["client","text"])
+        v.validate_iterable(to,"to")
+        b.validate_batching(batch_size, max_workers)
+        to = list(dict.fromkeys(to))
+        v.validate_list(to,str,"to")
+        if params is None:
+            params = s.Params()
+        slots = plan(to, start, end, rate, slot_seconds, batch_size)
+        campaign = Campaign(text, params, client.compact_results)
+        for index, slot in enumerate(slots):
+            campaign.delivery_datetimes[index] = slot.delivery_datetime
+        tasks = (partial(b.send_batch, client, index, slot.to, text, slot.delivery_datetime, params, timeout, deadline)
+                 for index, slot in enumerate(slots))
+        for batch in b.run_bounded(tasks, max_workers):
+            campaign.add(batch)
+        campaign.batches.sort(key=lambda batch: batch.index)
+        return campaign
+
+    def retry(client: c.Client, campaign: Campaign, max_workers: int = b.default_max_workers,
+              timeout=None, deadline=None, resend_in_doubt: bool = False) -> Campaign:
+        """Schedules the failed requests of a campaign again, each at its planned delivery_datetime.
+
+    Like BulkSms.retry, requests that may have reached the API are left failed unless
+    resend_in_doubt is True, since the API may already have scheduled them.
+
+    :param client: A Client object containing API authentication details.
+    :param campaign: The Campaign returned by Planner.schedule.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole operation.
+    :param resend_in_doubt: If True, also schedule the in-doubt requests again, at the risk of sending messages twice.
+    :return: The same Campaign, updated with the outcome of the retried requests."""
+        v.validate([client,campaign],[c.Client,Campaign],["client","campaign"])
+        b.validate_batching(1, max_workers)
+        failed = campaign.retryable(resend_in_doubt)
+        campaign.batches = campaign.kept(resend_in_doubt)
+        tasks = (partial(b.send_batch, client, batch.index, batch.to, campaign.text,
+                         campaign.delivery_datetimes[batch.index], campaign.params, timeout, deadline)
+                 for batch in failed)
+        for batch in b.run_bounded(tasks, max_workers):
+            campaign.add(batch)
+        campaign.batches.sort(key=lambda batch: batch.index)
+        return campaign
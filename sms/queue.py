@@ -0,0 +1,252 @@
+import json
+import sqlite3
+import threading
+import uuid
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional
+import validation as v
+
+from client import client as c
+from sms import bulk as b
+from sms import sms as s
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+IN_DOUBT = "in_doubt"
+
+# Rows read from the queue at a time while draining.
+page_size = 256
+
+_schema = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    recipients TEXT NOT NULL,
+    text TEXT NOT NULL,
+    delivery_datetime TEXT,
+    callback_url TEXT,
+    callback_method TEXT,
+    from_ TEXT,
+    idempotency_key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS batches_state ON batches (state, id);
+CREATE TABLE IF NOT EXISTS messages (
+    message_id TEXT PRIMARY KEY,
+    batch_id INTEGER NOT NULL,
+    number TEXT NOT NULL,
+    price REAL
+);
+"""
+
+
+class SendQueue:
+    """
+    A durable local queue of SMS batches, stored in an SQLite database in WAL mode.
+
+    put() splits recipients into batches and stores them with the fields of their request (not
+    the credentials) and an Idempotency-Key. drain() sends the pending batches over a pool of
+    threads and commits the state of every batch before and after its request, together with
+    the message_ids it produced, so sent batches are never read again.
+
+    A batch is never sent twice automatically. Batches whose request may have reached the API
+    without an answer, either because the request failed in doubt (a read timeout, a 5xx) or
+    because a crash interrupted it, are moved to the in_doubt state. List them with in_doubt(),
+    check them against the delivery reports, then send them again with requeue_in_doubt() or
+    close them with mark_sent(). Only one drain() may run on a queue at a time.
+
+    :param path: The database file, created if it does not exist.
+    :param batch_size: Maximum number of phone numbers per batch.
+    :param synchronous: SQLite synchronous setting. "NORMAL" survives process crashes, "FULL"
+        also survives power loss at the cost of an fsync per state change.
+    """
+
+    def __init__(self, path: str, batch_size: int = b.default_batch_size, synchronous: str = "NORMAL"):
+        b.validate_batching(batch_size, 1)
+        self.path = path
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.executescript(_schema)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def put(self, to: Iterable[str], text: str, delivery_datetime: Optional[str] = None,
+            params: Optional[s.Params] = None) -> int:
+        """
+        Adds an SMS send to the queue, split into batches, in one transaction.
+
+        :param to: A list or any other iterable of phone numbers.
+        :param text: The text message to be sent.
+        :param delivery_datetime: Optional RFC3339 delivery datetime, to schedule the message.
+        :param params: Optional parameters for the SMS message API (default is None).
+        :raises TypeError: If to is not an iterable of phone numbers or text is not a string.
+        :return: The number of batches added.
+        """
+        v.validate([text],[str],["text"])
+        v.validate_iterable(to,"to")
+        if params is None:
+            params = s.Params()
+        rows = ((json.dumps(batch), text, delivery_datetime, params.callback_url, params.callback_method,
+                 params.from_, uuid.uuid4().hex, PENDING)
+                for batch in b.iter_batches(to, self.batch_size))
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            cursor = self._db.executemany(
+                "INSERT INTO batches (recipients, text, delivery_datetime, callback_url, callback_method, from_,"
+                " idempotency_key, state) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return cursor.rowcount
+
+    def drain(self, client: c.Client, max_workers: int = b.default_max_workers,
+              timeout=None, deadline=None) -> Iterator[b.BatchResult]:
+        """
+        Sends the pending batches and yields a BatchResult per batch as it completes; the index of
+        each BatchResult is the batch id. Batches still marked sending by an interrupted drain are
+        moved to in_doubt first. Batches that fail are marked failed, or in_doubt if the API may
+        have processed them.
+
+        :param client: A Client object containing API authentication details.
+        :param max_workers: Maximum number of requests in flight at the same time.
+        :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole drain.
+        :raises TypeError: If client parameter is not an instance of Client class.
+        :raises ValueError: If max_workers is lower than 1.
+        """
+        v.validate([client],[c.Client],["client"])
+        b.validate_batching(1, max_workers)
+        with self._lock, self._db:
+            self._db.execute("UPDATE batches SET state = ?, error = ? WHERE state = ?",
+                             (IN_DOUBT, json.dumps("interrupted while sending"), SENDING))
+        tasks = (partial(self._send, client, row, timeout, deadline) for row in self._rows(PENDING))
+        return b.run_bounded(tasks, max_workers)
+
+    def requeue_failed(self) -> int:
+        """
+        Queues the failed batches again. These are known not to have been sent: the API rejected
+        them (they get a new Idempotency-Key) or the request never reached it. In-doubt batches
+        are left alone.
+
+        :return: The number of batches queued again.
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE batches SET state = ?, error = NULL, idempotency_key = CASE WHEN rejected"
+                " THEN lower(hex(randomblob(16))) ELSE idempotency_key END, rejected = 0 WHERE state = ?",
+                (PENDING, FAILED))
+            return cursor.rowcount
+
+    def in_doubt(self) -> List[dict]:
+        """
+        Returns the batches that may or may not have been sent, to reconcile with the delivery reports.
+
+        :return: A dictionary per batch with its id, the phone numbers, the text, the number of
+            attempts and the last error.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT id, recipients, text, attempts, error FROM batches WHERE state = ?"
+                                    " ORDER BY id", (IN_DOUBT,)).fetchall()
+        return [{"id": id, "to": json.loads(recipients), "text": text, "attempts": attempts,
+                 "error": json.loads(error) if error is not None else None}
+                for id, recipients, text, attempts, error in rows]
+
+    def requeue_in_doubt(self, ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Queues in-doubt batches again, with their Idempotency-Key. Their messages are sent twice if
+        the API did process the earlier request, so only requeue batches that reconciliation found unsent.
+
+        :param ids: The batch ids to queue again (default is every in-doubt batch).
+        :return: The number of batches queued again.
+        """
+        return self._resolve_in_doubt(PENDING, ids)
+
+    def mark_sent(self, ids: Iterable[int]) -> int:
+        """
+        Closes in-doubt batches that reconciliation found sent. Their message_ids are not known to the queue.
+
+        :param ids: The batch ids to mark sent.
+        :return: The number of batches marked sent.
+        """
+        return self._resolve_in_doubt(SENT, ids)
+
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of batches in each state."""
+        with self._lock:
+            rows = self._db.execute("SELECT state, count(*) FROM batches GROUP BY state").fetchall()
+        counts = {PENDING: 0, SENDING: 0, SENT: 0, FAILED: 0, IN_DOUBT: 0}
+        counts.update(rows)
+        return counts
+
+    def lookup(self, message_id: str) -> Optional[dict]:
+        """
+        Returns the batch_id, number and price of a sent message, or None if the queue did not send it.
+
+        :param message_id: A message_id from the phone_number_list of a result.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT batch_id, number, price FROM messages WHERE message_id = ?",
+                                   (message_id,)).fetchone()
+        return {"batch_id": row[0], "number": row[1], "price": row[2]} if row is not None else None
+
+    def _resolve_in_doubt(self, state: str, ids: Optional[Iterable[int]]) -> int:
+        with self._lock, self._db:
+            if ids is None:
+                cursor = self._db.execute("UPDATE batches SET state = ?, error = NULL WHERE state = ?",
+                                          (state, IN_DOUBT))
+            else:
+                self._db.execute("BEGIN")
+                cursor = self._db.executemany(
+                    "UPDATE batches SET state = ?, error = NULL WHERE state = ? AND id = ?",
+                    ((state, IN_DOUBT, id) for id in ids))
+            return cursor.rowcount
+
+    def _rows(self, state: str) -> Iterator[tuple]:
+        # Pages through one state by id, so each pass reads only the rows it sends.
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, recipients, text, delivery_datetime, callback_url, callback_method, from_,"
+                    " idempotency_key FROM batches WHERE state = ? AND id > ? ORDER BY id LIMIT ?",
+                    (state, last, page_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def _send(self, client: c.Client, row: tuple, timeout, deadline) -> b.BatchResult:
+        id, recipients, text, delivery_datetime, callback_url, callback_method, from_, key = row
+        to = json.loads(recipients)
+        params = s.Params(callback_url=callback_url, callback_method=callback_method, from_=from_)
+        with self._lock, self._db:
+            self._db.execute("UPDATE batches SET state = ?, attempts = attempts + 1 WHERE id = ?", (SENDING, id))
+        batch = b.send_batch(client, id, to, text, delivery_datetime, params, timeout, deadline, key)
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            if batch.ok:
+                result = batch.result.to_dict() if isinstance(batch.result, s.CompactResultSms) else dict(batch.result)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO messages (message_id, batch_id, number, price) VALUES (?, ?, ?, ?)",
+                    ((pn["message_id"], id, pn["number"], pn["price"]) for pn in result.pop("phone_number_list")))
+                self._db.execute("UPDATE batches SET state = ?, result = ? WHERE id = ?",
+                                 (SENT, json.dumps(result), id))
+            else:
+                rejected = not isinstance(batch.error, Exception)
+                error = batch.error if rejected else repr(batch.error)
+                self._db.execute("UPDATE batches SET state = ?, rejected = ?, error = ? WHERE id = ?",
+                                 (IN_DOUBT if batch.in_doubt else FAILED, rejected, json.dumps(error), id))
+        return batch
@@ -0,0 +1,265 @@
+import json
+import queue
+import threading
+import time
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Union
+from urllib.parse import parse_qsl
+from wsgiref.simple_server import WSGIServer, make_server
+
+# Reports handed to the sink at most at a time, and the longest a report waits for a batch to fill.
+default_batch_size = 500
+default_flush_interval = 0.5
+# Callbacks accepted but not yet handed to the sink; above it the receiver answers 503.
+default_max_pending = 10000
+# Largest callback body read.
+max_body_size = 64 * 1024
+# Sink calls per batch before its reports go to the dead letter hook, and the delay before the first retry.
+default_sink_attempts = 3
+default_sink_backoff = 0.5
+
+
+class DeliveryReport(NamedTuple):
+    """
+    A delivery report received on the callback_url of a send.
+
+    :param message_id: The message_id of the message, as in the phone_number_list of the ResultSms.
+    :param status: The delivery status reported by the API.
+    :param number: The phone number, if the callback has it.
+    :param sent: What the correlate lookup returned for message_id, or None.
+    :param fields: All the fields of the callback.
+    """
+    message_id: Optional[str]
+    status: Optional[str]
+    number: Optional[str]
+    sent: Optional[object]
+    fields: dict
+
+
+class DeliveryReceiver:
+    """
+    A WSGI application receiving the delivery report callbacks of Params.callback_url.
+
+    Requests only queue the raw callback and answer 200, so they stay cheap; a background thread
+    parses the queued callbacks (JSON, form or query string, one report or a list of them) and
+    hands them to sink in micro-batches of up to batch_size reports, or whatever arrived within
+    flush_interval. When max_pending callbacks are waiting, new ones get 503 with Retry-After so
+    the sender retries later instead of the receiver running out of memory.
+
+    A report that cannot be parsed or correlated (a message_id that is not a string, a correlate
+    that raises) is dropped on its own and counted in invalid_reports. A batch the sink keeps
+    failing on is retried sink_attempts times with exponential backoff, and then handed to
+    dead_letter, so reports already acknowledged with 200 are never dropped silently.
+
+    Run it with any WSGI server, or with serve() for a threaded standard library server. Call
+    close() to hand the remaining reports to the sink and stop the thread.
+
+    :param sink: A callable receiving a list of DeliveryReport.
+    :param correlate: Optional mapping or callable returning what was sent for a message_id, for
+        example message_index(results) or SendQueue.lookup. It is stored in DeliveryReport.sent.
+    :param batch_size: Maximum number of reports per sink call.
+    :param flush_interval: Seconds a report waits at most for its batch to fill.
+    :param max_pending: Maximum number of callbacks waiting for the sink.
+    :param sink_attempts: Sink calls per batch before it is given up.
+    :param sink_backoff: Seconds before the first sink retry, doubled for each further one.
+    :param dead_letter: Optional callable receiving the reports of a batch the sink gave up on and
+        the last exception, for example to write them to a file. Batches given up on are counted
+        in failed_batches, and every exception is kept in last_error.
+    """
+
+    def __init__(self, sink: Callable[[List[DeliveryReport]], None],
+                 correlate: Optional[Union[Mapping, Callable[[str], object]]] = None,
+                 batch_size: int = default_batch_size, flush_interval: float = default_flush_interval,
+                 max_pending: int = default_max_pending, sink_attempts: int = default_sink_attempts,
+                 sink_backoff: float = default_sink_backoff,
+                 dead_letter: Optional[Callable[[List[DeliveryReport], Exception], None]] = None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if sink_attempts < 1:
+            raise ValueError("sink_attempts must be at least 1")
+        self.sink = sink
+        self.correlate = correlate.get if isinstance(correlate, Mapping) else correlate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sink_attempts = sink_attempts
+        self.sink_backoff = sink_backoff
+        self.dead_letter = dead_letter
+        self.received = 0
+        self.rejected = 0
+        self.delivered = 0
+        self.invalid_reports = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.last_error = None
+        self._pending = queue.Queue(max_pending)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="DeliveryReceiver", daemon=True)
+        self._thread.start()
+
+    def __call__(self, environ, start_response):
+        method = environ["REQUEST_METHOD"]
+        if method not in ("GET", "POST"):
+            start_response("405 Method Not Allowed", [("Allow", "GET, POST"), ("Content-Length", "0")])
+            return []
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > max_body_size:
+            start_response("413 Payload Too Large", [("Content-Length", "0")])
+            return []
+        body = environ["wsgi.input"].read(length) if length else b""
+        callback = (body, environ.get("CONTENT_TYPE", ""), environ.get("QUERY_STRING", ""))
+        try:
+            if self._closed:
+                raise queue.Full
+            self._pending.put_nowait(callback)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            start_response("503 Service Unavailable", [("Retry-After", "1"), ("Content-Length", "0")])
+            return []
+        with self._lock:
+            self.received += 1
+        start_response("200 OK", [("Content-Length", "0")])
+        return []
+
+    def pending(self) -> int:
+        """Returns the number of callbacks waiting for the sink."""
+        return self._pending.qsize()
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Stops accepting callbacks, hands the queued ones to the sink and stops the background thread.
+
+        :param timeout: Seconds to wait for the queued callbacks, None to wait until they are done.
+        """
+        self._closed = True
+        self._thread.join(timeout)
+
+    def serve(self, host: str = "", port: int = 8080):
+        """
+        Serves the receiver with the standard library WSGI server, one thread per connection,
+        until interrupted.
+
+        :param host: The address to listen on.
+        :param port: The port to listen on.
+        """
+        with make_server(host, port, self, server_class=ThreadingWSGIServer) as server:
+            try:
+                server.serve_forever()
+            finally:
+                self.close()
+
+    def _run(self):
+        pending = self._pending
+        # Reports parsed but not yet handed to the sink; a callback may hold more than a batch.
+        reports = []
+        flush_at = 0.0
+        while True:
+            try:
+                if not reports:
+                    try:
+                        callback = pending.get(timeout=self.flush_interval)
+                    except queue.Empty:
+                        if self._closed:
+                            return
+                        continue
+                    flush_at = time.monotonic() + self.flush_interval
+                    reports = self._parse(callback)
+                while len(reports) < self.batch_size:
+                    wait = flush_at - time.monotonic()
+                    try:
+                        callback = pending.get_nowait() if wait <= 0 else pending.get(timeout=wait)
+                    except queue.Empty:
+                        break
+                    reports.extend(self._parse(callback))
+                batch, reports = reports[:self.batch_size], reports[self.batch_size:]
+                if batch:
+                    self._deliver(batch)
+            except Exception as e:
+                # Only close() stops the thread; anything else would leave callbacks queued for good.
+                self.last_error = e
+
+    def _parse(self, callback: tuple) -> List[DeliveryReport]:
+        reports = []
+        for fields in parse_callback(*callback):
+            try:
+                reports.append(self._report(fields))
+            except Exception as e:
+                self.invalid_reports += 1
+                self.last_error = e
+        return reports
+
+    def _deliver(self, reports: List[DeliveryReport]):
+        delay = self.sink_backoff
+        for attempt in range(1, self.sink_attempts + 1):
+            try:
+                self.sink(reports)
+                self.delivered += len(reports)
+                return
+            except Exception as e:
+                self.last_error = e
+                if attempt < self.sink_attempts:
+                    time.sleep(delay)
+                    delay *= 2
+        self.failed_batches += 1
+        if self.dead_letter is not None:
+            try:
+                self.dead_letter(reports, self.last_error)
+                self.dead_lettered += len(reports)
+            except Exception as e:
+                self.last_error = e
+
+    def _report(self, fields: dict) -> DeliveryReport:
+        message_id = fields.get("message_id")
+        if message_id is not None and not isinstance(message_id, str):
+            raise ValueError(f"message_id must be a string, not {type(message_id).__name__}")
+        correlate = self.correlate
+        sent = correlate(message_id) if correlate is not None and message_id is not None else None
+        return DeliveryReport(message_id, fields.get("status"), fields.get("number", fields.get("to")), sent, fields)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def parse_callback(body: bytes, content_type: str, query: str) -> List[dict]:
+    """
+    Returns the reports of one callback: a JSON object or list, a form, or the query string of a GET.
+    Malformed callbacks give no report.
+    """
+    if body:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return [dict(parse_qsl(body.decode("utf-8", "replace")))]
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return []
+        if isinstance(data, dict):
+            return [data]
+        if isinstance(data, list):
+            return [item for item in data if isinstance(item, dict)]
+        return []
+    if query:
+        return [dict(parse_qsl(query))]
+    return []
+
+
+def message_index(results: Iterable) -> Dict[str, dict]:
+    """
+    Maps the message_ids of send results to their number and price, to correlate delivery reports.
+
+    :param results: ResultSms dictionaries or CompactResultSms objects, for example from a BulkResult.
+    :return: A dictionary of message_id to {"number", "price"}.
+    """
+    index = {}
+    for result in results:
+        if isinstance(result, dict):
+            for pn in result.get("phone_number_list", ()):
+                index[pn["message_id"]] = {"number": pn["number"], "price": pn["price"]}
+        else:
+            for number, message_id, price in result.phone_number_list:
+                index[message_id] = {"number": number, "price": price}
+    return index
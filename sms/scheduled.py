@@ -0,0 +1,110 @@
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+from client import client as c
+from sms import sms as s
+
+
+class ScheduleIndex:
+    """
+    A local, queryable copy of the scheduled SMS messages of an account.
+
+    refresh() streams /sms/scheduled and only re-indexes the items whose
+    delivery_status_update_date changed since the last refresh, dropping the ones that are gone,
+    so dashboards can query the index instead of fetching and converting every item again.
+    Queries are safe while another thread refreshes.
+    """
+
+    def __init__(self):
+        self._items: Dict[int, dict] = {}
+        self._by_status: Dict[str, set] = {}
+        # (delivery_date, id) pairs, sorted lazily on the first date query after a change.
+        self._dates: Optional[List[tuple]] = None
+        self._lock = threading.Lock()
+        self.last_update_date = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def refresh(self, client: c.Client, timeout=None, deadline=None) -> s.Sms:
+        """
+        Brings the index up to date with the API.
+
+        :param client: A Client object containing API authentication details.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the request, including retries.
+        :return: A Sms object whose result is {"added": n, "updated": n, "removed": n}, or the error.
+        """
+        response = s.Sms.iter_all_scheduled(client, timeout, deadline)
+        if isinstance(response.result, dict):
+            return response
+        added = updated = 0
+        seen = set()
+        for item in response.result:
+            if not isinstance(item, dict):
+                # CompactResultSchedule with compact_results; the index holds dictionaries.
+                item = item.to_dict()
+            seen.add(item["id"])
+            with self._lock:
+                current = self._items.get(item["id"])
+                if current is not None and \
+                        current["delivery_status_update_date"] == item["delivery_status_update_date"]:
+                    continue
+                if current is None:
+                    added += 1
+                else:
+                    updated += 1
+                    self._remove(current)
+                self._add(item)
+        with self._lock:
+            gone = [self._items[id] for id in self._items if id not in seen]
+            for item in gone:
+                self._remove(item)
+        return s.Sms(result={"added": added, "updated": updated, "removed": len(gone)})
+
+    def get(self, id: int) -> Optional[dict]:
+        """Returns the scheduled message with the given id, or None."""
+        return self._items.get(id)
+
+    def by_status(self, delivery_status: str) -> List[dict]:
+        """Returns the scheduled messages with the given delivery_status."""
+        with self._lock:
+            return [self._items[id] for id in self._by_status.get(delivery_status, ())]
+
+    def by_delivery_date(self, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        """
+        Returns the scheduled messages with start <= delivery_date < end, ordered by delivery_date.
+
+        Dates are compared as strings, so bounds must use the same RFC3339 format as the API.
+
+        :param start: Optional RFC3339 lower bound, inclusive.
+        :param end: Optional RFC3339 upper bound, exclusive.
+        """
+        with self._lock:
+            if self._dates is None:
+                self._dates = sorted((item["delivery_date"], id) for id, item in self._items.items())
+            dates = self._dates
+            low = 0 if start is None else bisect.bisect_left(dates, (start,))
+            high = len(dates) if end is None else bisect.bisect_left(dates, (end,))
+            return [self._items[id] for _, id in dates[low:high]]
+
+    def changed_since(self, update_date: str) -> List[dict]:
+        """Returns the scheduled messages whose delivery status changed after update_date."""
+        with self._lock:
+            return [item for item in self._items.values() if item["delivery_status_update_date"] > update_date]
+
+    def _add(self, item: dict):
+        self._items[item["id"]] = item
+        self._by_status.setdefault(item["delivery_status"], set()).add(item["id"])
+        self._dates = None
+        if self.last_update_date is None or item["delivery_status_update_date"] > self.last_update_date:
+            self.last_update_date = item["delivery_status_update_date"]
+
+    def _remove(self, item: dict):
+        del self._items[item["id"]]
+        ids = self._by_status[item["delivery_status"]]
+        ids.discard(item["id"])
+        if not ids:
+            del self._by_status[item["delivery_status"]]
+        self._dates = None
@@ -0,0 +1,193 @@
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+GSM7 = "GSM-7"
+UCS2 = "UCS-2"
+
+# GSM 03.38 default alphabet, one septet per character (the escape character itself is left out).
+gsm7_basic = ("@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+              "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà")
+# GSM 03.38 extension table, two septets per character (escape + character).
+gsm7_extension = "\f^{}\\[~]|€"
+
+# Units per segment: a single message, and each part of a concatenated one (the rest holds the UDH).
+gsm7_single, gsm7_part = 160, 153
+ucs2_single, ucs2_part = 70, 67
+
+_not_gsm7 = re.compile("[^" + re.escape(gsm7_basic + gsm7_extension) + "]")
+_gsm7_extension = re.compile("[" + re.escape(gsm7_extension) + "]")
+_astral = re.compile("[\U00010000-\U0010ffff]")
+
+
+class Segments(NamedTuple):
+    """
+    How a text is sent: its encoding, its length in encoding units (septets for GSM-7, UTF-16
+    code units for UCS-2), the number of SMS segments and the units left in the last segment.
+    """
+    encoding: str
+    units: int
+    segments: int
+    remaining: int
+
+
+class Estimate(NamedTuple):
+    """
+    Estimated cost of sending a text to a list of phone numbers.
+
+    unpriced holds the numbers the price table has no price for; they are counted in total_sms
+    but not in cost.
+    """
+    segments: Segments
+    recipients: int
+    total_sms: int
+    cost: float
+    unpriced: List[str]
+
+
+@lru_cache(maxsize=4096)
+def segment(text: str) -> Segments:
+    """
+    Returns the encoding and number of SMS segments of a text.
+
+    Results are cached, so estimating the same campaign text for many batches costs one count.
+
+    :param text: The text message.
+    """
+    if _not_gsm7.search(text) is None:
+        units = len(text) + len(_gsm7_extension.findall(text))
+        if units <= gsm7_single:
+            return Segments(GSM7, units, 1 if units else 0, gsm7_single - units)
+        if units == len(text):
+            return _split_evenly(GSM7, units, gsm7_part)
+        # An escape and its character must stay in the same segment.
+        return _split(GSM7, (2 if _gsm7_extension.match(char) else 1 for char in text), units, gsm7_part)
+    astral = len(_astral.findall(text))
+    units = len(text) + astral
+    if units <= ucs2_single:
+        return Segments(UCS2, units, 1, ucs2_single - units)
+    if not astral:
+        return _split_evenly(UCS2, units, ucs2_part)
+    # A surrogate pair must stay in the same segment.
+    return _split(UCS2, (2 if char > "\uffff" else 1 for char in text), units, ucs2_part)
+
+
+def _split_evenly(encoding: str, units: int, per_segment: int) -> Segments:
+    segments = -(-units // per_segment)
+    return Segments(encoding, units, segments, segments * per_segment - units)
+
+
+def _split(encoding: str, widths: Iterable[int], units: int, per_segment: int) -> Segments:
+    segments, used = 1, 0
+    for width in widths:
+        if used + width > per_segment:
+            segments += 1
+            used = 0
+        used += width
+    return Segments(encoding, units, segments, per_segment - used)
+
+
+class PriceTable:
+    """
+    Per-segment SMS prices by destination, matched on the longest calling code prefix of a
+    phone number in E.164 digits. Lookups are cached per prefix, and the table can be saved to
+    and loaded from a JSON file, or learned from the prices of previous sends.
+
+    :param prices: Calling code or number prefix to price of one segment, for example {"66": 0.1}.
+    :param default: Price for numbers matching no prefix, or None to report them as unpriced.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None, default: Optional[float] = None):
+        self.prices = dict(prices or {})
+        self.default = default
+        self._max_prefix = max(map(len, self.prices), default=0)
+        # Price by the first _max_prefix digits of a number, which decide its price.
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def price(self, number: str) -> Optional[float]:
+        """
+        Returns the price of one segment to a phone number, or default if no prefix matches.
+
+        :param number: The phone number in E.164 digits.
+        """
+        key = number[:self._max_prefix]
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        result = self.default
+        for length in range(len(key), 0, -1):
+            price = self.prices.get(key[:length])
+            if price is not None:
+                result = price
+                break
+        self._cache[key] = result
+        return result
+
+    def set(self, prefix: str, price: float):
+        """
+        Sets the price of one segment for a prefix.
+
+        :param prefix: A calling code or number prefix.
+        :param price: The price of one segment.
+        """
+        with self._lock:
+            self.prices[prefix] = price
+            self._max_prefix = max(self._max_prefix, len(prefix))
+            self._cache = {}
+
+    def learn(self, result, segments: int, prefix_length: int = 2):
+        """
+        Updates the table from the phone_number_list of a ResultSms, so later estimates use the
+        prices the API actually charged.
+
+        :param result: A ResultSms dictionary or CompactResultSms.
+        :param segments: The number of segments of the text that was sent.
+        :param prefix_length: Number of leading digits of each number used as its prefix.
+        """
+        if not segments:
+            return
+        if isinstance(result, dict):
+            pairs = ((pn["number"], pn["price"]) for pn in result["phone_number_list"])
+        else:
+            pairs = zip(result.phone_number_list.numbers, result.phone_number_list.prices)
+        learned = {number[:prefix_length]: price / segments for number, price in pairs}
+        with self._lock:
+            self.prices.update(learned)
+            self._max_prefix = max(self._max_prefix, prefix_length if learned else 0)
+            self._cache = {}
+
+    def save(self, path: str):
+        """Writes the table to a JSON file."""
+        with open(path, "w") as file:
+            json.dump({"prices": self.prices, "default": self.default}, file)
+
+    def load(path: str) -> "PriceTable":
+        """Reads a table written by save."""
+        with open(path) as file:
+            data = json.load(file)
+        return PriceTable(data["prices"], data.get("default"))
+
+    def estimate(self, text: str, to: Iterable[str]) -> Estimate:
+        """
+        Estimates the number of SMS and the cost of sending a text to phone numbers, without a request.
+
+        :param text: The text message.
+        :param to: The phone numbers in E.164 digits.
+        """
+        segments = segment(text)
+        price = self.price
+        recipients = 0
+        cost = 0.0
+        unpriced = []
+        for number in to:
+            recipients += 1
+            number_price = price(number)
+            if number_price is None:
+                unpriced.append(number)
+            else:
+                cost += number_price
+        return Estimate(segments, recipients, recipients * segments.segments, cost * segments.segments, unpriced)
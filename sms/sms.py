@@ -1,9 +1,11 @@
 import json
-from typing import List, Optional
+import re
+from array import array
+from typing import List, NamedTuple, Optional
 import validation as v
-import requests
 
 from client import client as c
+from client import stream
 
 
 class Params:
@@ -63,6 +65,162 @@ class ResultSchedule:
         self.created_date = created_date
 
 
+class PhoneNumberColumns:
+    """
+    Column-oriented list of sent phone numbers: one list per field instead of one object per number.
+
+    Iterating or indexing yields (number, message_id, price) tuples; to_list() returns the
+    PhoneNumber dictionaries of a regular result.
+    """
+    __slots__ = ("numbers", "message_ids", "prices")
+
+    def __init__(self, numbers: Optional[List[str]] = None, message_ids: Optional[List[str]] = None,
+                 prices: Optional[array] = None):
+        self.numbers = numbers if numbers is not None else []
+        self.message_ids = message_ids if message_ids is not None else []
+        self.prices = prices if prices is not None else array("d")
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __getitem__(self, index):
+        return self.numbers[index], self.message_ids[index], self.prices[index]
+
+    def __iter__(self):
+        return zip(self.numbers, self.message_ids, self.prices)
+
+    def extend(self, other: "PhoneNumberColumns"):
+        self.numbers.extend(other.numbers)
+        self.message_ids.extend(other.message_ids)
+        self.prices.extend(other.prices)
+
+    def to_list(self) -> List[dict]:
+        return [{"number": number, "message_id": message_id, "price": price}
+                for number, message_id, price in self]
+
+
+class BadNumberColumns:
+    """
+    Column-oriented list of rejected phone numbers. Iterating or indexing yields (number, msg) tuples;
+    to_list() returns the BadNumber dictionaries of a regular result.
+    """
+    __slots__ = ("numbers", "msgs")
+
+    def __init__(self, numbers: Optional[List[str]] = None, msgs: Optional[List[str]] = None):
+        self.numbers = numbers if numbers is not None else []
+        self.msgs = msgs if msgs is not None else []
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __getitem__(self, index):
+        return self.numbers[index], self.msgs[index]
+
+    def __iter__(self):
+        return zip(self.numbers, self.msgs)
+
+    def extend(self, other: "BadNumberColumns"):
+        self.numbers.extend(other.numbers)
+        self.msgs.extend(other.msgs)
+
+    def to_list(self) -> List[dict]:
+        return [{"number": number, "msg": msg} for number, msg in self]
+
+
+class CompactResultSms:
+    """
+    Memory-compact ResultSms returned when the client has compact_results enabled.
+
+    Only the raw response body is kept until a field is first read; it is then decoded once into
+    columns (PhoneNumberColumns, BadNumberColumns) and released. to_dict() returns the same
+    dictionary as a regular Sms result.
+
+    :param body: The raw JSON body of the response.
+    :param loads: The JSON decoder used on first access.
+    """
+    __slots__ = ("_body", "_loads", "_remaining_balance", "_total_sms", "_phone_number_list",
+                 "_bad_phone_number_list", "_scheduled_id")
+
+    def __init__(self, body: bytes, loads=json.loads):
+        self._body = body
+        self._loads = loads
+
+    def _decode(self):
+        data = self._loads(self._body)
+        self._remaining_balance = data["remaining_balance"]
+        self._total_sms = data["total_sms"]
+        self._phone_number_list = phone_number_columns_from_json(data["phone_number_list"])
+        self._bad_phone_number_list = bad_number_columns_from_json(data["bad_phone_number_list"])
+        self._scheduled_id = data.get("scheduleId")
+        self._body = None
+
+    @property
+    def remaining_balance(self) -> float:
+        # Read on every send to update the balance cache, so it is scanned from the body without
+        # decoding the phone number lists.
+        if self._body is not None:
+            try:
+                return self._remaining_balance
+            except AttributeError:
+                pass
+            balance = scan_remaining_balance(self._body)
+            if balance is None:
+                self._decode()
+            else:
+                self._remaining_balance = balance
+        return self._remaining_balance
+
+    @property
+    def total_sms(self) -> int:
+        if self._body is not None:
+            self._decode()
+        return self._total_sms
+
+    @property
+    def phone_number_list(self) -> PhoneNumberColumns:
+        if self._body is not None:
+            self._decode()
+        return self._phone_number_list
+
+    @property
+    def bad_phone_number_list(self) -> BadNumberColumns:
+        if self._body is not None:
+            self._decode()
+        return self._bad_phone_number_list
+
+    @property
+    def scheduled_id(self) -> Optional[int]:
+        if self._body is not None:
+            self._decode()
+        return self._scheduled_id
+
+    def to_dict(self) -> dict:
+        return {
+            "remaining_balance": self.remaining_balance,
+            "total_sms": self.total_sms,
+            "phone_number_list": self.phone_number_list.to_list(),
+            "bad_phone_number_list": self.bad_phone_number_list.to_list(),
+            "scheduled_id": self.scheduled_id,
+        }
+
+
+class CompactResultSchedule(NamedTuple):
+    """Tuple-backed ResultSchedule returned when the client has compact_results enabled."""
+    id: int
+    text: str
+    total_sms: int
+    method: str
+    callback_url: str
+    from_number: str
+    delivery_date: str
+    delivery_status: str
+    delivery_status_update_date: str
+    created_date: str
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
 SMS_URI_PATH = "/sms"
 SMS_SCHEDULE_URI_PATH = "/sms/scheduled"
 
@@ -72,13 +230,16 @@ class Sms:
         self.result = result
 
     def send(
-            client: c.Client, to: List[str], text: str, params: Optional[Params] = None):
+            client: c.Client, to: List[str], text: str, params: Optional[Params] = None,
+            timeout=None, deadline=None):
         """Sends an SMS message to the specified phone numbers.
 
     :param client: A Client object containing API authentication details.
     :param to: A list of phone numbers to send the SMS message to.
     :param text: The text message to be sent.
     :param params: Optional parameters for the SMS message API (default is None).
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
     :raises TypeError: If client parameter is not an instance of Client class.
     :raises TypeError: If to parameter is not a non-empty list of phone numbers.
     :raises TypeError: If text parameter is not a string.
@@ -91,23 +252,44 @@ class Sms:
         if params is None:
             params = Params()
 
+        to, rejected = clean_recipients(client, to)
+        if not to:
+            return rejected_result(client, rejected)
         data = make_request_data(client, to, text, params=params)
 
         url = client.endpoint + SMS_URI_PATH
-        response = client.request(url, client.content_type_form, data)
+        response = client.request(url, client.content_type_form, data, timeout=timeout, deadline=deadline)
+        return add_rejected(sms_from_response(response, client), rejected)
 
-        status_code = response["code"]
-        body_byte = response["content"]
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Sms(result=error)
-        result = json.loads(body_byte)
-        result = result_sms_from_json(result)
-        return Sms(result=result.__dict__)
+    async def send_async(
+            client: c.AsyncClient, to: List[str], text: str, params: Optional[Params] = None,
+            timeout=None, deadline=None):
+        """Asynchronous version of Sms.send using an AsyncClient.
+
+    :param client: An AsyncClient object containing API authentication details.
+    :param to: A list of phone numbers to send the SMS message to.
+    :param text: The text message to be sent.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+    :return: A Sms object containing the result of the SMS send request."""
+        v.validate([client,to,text],[c.AsyncClient,list,str],["client","to","text"])
+        v.validate_list(to,str,"to")
+        if params is None:
+            params = Params()
+
+        to, rejected = clean_recipients(client, to)
+        if not to:
+            return rejected_result(client, rejected)
+        data = make_request_data(client, to, text, params=params)
+
+        url = client.endpoint + SMS_URI_PATH
+        response = await client.request(url, client.content_type_form, data, timeout=timeout, deadline=deadline)
+        return add_rejected(sms_from_response(response, client), rejected)
 
     def send_schedule(
-            client: c.Client, to: List[str], text: str, delivery_datetime: str, params: Optional[Params] = None):
+            client: c.Client, to: List[str], text: str, delivery_datetime: str, params: Optional[Params] = None,
+            timeout=None, deadline=None):
         """Sends an SMS message to the specified phone numbers.
 
     :param client: A Client object containing API authentication details.
@@ -115,6 +297,8 @@ class Sms:
     :param text: The text message to be sent.
     :param delivery_datetime: The date and time to send the message and the datetime should be in RFC3339 format.
     :param params: Optional parameters for the SMS message API (default is None).
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
     :raises TypeError: If client parameter is not an instance of Client class.
     :raises TypeError: If to parameter is not a non-empty list of phone numbers.
     :raises TypeError: If text or delivery_datetime parameter is not a string.
@@ -127,73 +311,129 @@ class Sms:
         if params is None:
             params = Params()
 
+        to, rejected = clean_recipients(client, to)
+        if not to:
+            return rejected_result(client, rejected)
         data = make_request_data(client, to, text, delivery_datetime, params)
 
         url = client.endpoint + SMS_SCHEDULE_URI_PATH
-        response = client.request(url, client.content_type_form, data)
-        status_code = response["code"]
-        body_byte = response["content"]
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Sms(result=error)
+        response = client.request(url, client.content_type_form, data, timeout=timeout, deadline=deadline)
+        return add_rejected(sms_from_response(response, client), rejected)
+
+    async def send_schedule_async(
+            client: c.AsyncClient, to: List[str], text: str, delivery_datetime: str, params: Optional[Params] = None,
+            timeout=None, deadline=None):
+        """Asynchronous version of Sms.send_schedule using an AsyncClient.
+
+    :param client: An AsyncClient object containing API authentication details.
+    :param to: A list of phone numbers to send the SMS message to.
+    :param text: The text message to be sent.
+    :param delivery_datetime: The date and time to send the message and the datetime should be in RFC3339 format.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+    :return: A Sms object containing the result of the SMS send request."""
+        v.validate([client,to,text,delivery_datetime],[c.AsyncClient,list,str,str],["client","to","text","delivery_datetime"])
+        v.validate_list(to,str,"to")
 
-        result = json.loads(body_byte)
-        result = result_sms_from_json(result)
-        return Sms(result=result.__dict__)
+        if params is None:
+            params = Params()
 
-    def get_scheduled(client: c.Client, schedule_id):
+        to, rejected = clean_recipients(client, to)
+        if not to:
+            return rejected_result(client, rejected)
+        data = make_request_data(client, to, text, delivery_datetime, params)
+
+        url = client.endpoint + SMS_SCHEDULE_URI_PATH
+        response = await client.request(url, client.content_type_form, data, timeout=timeout, deadline=deadline)
+        return add_rejected(sms_from_response(response, client), rejected)
+
+    def get_scheduled(client: c.Client, schedule_id, timeout=None, deadline=None):
         """
         Returns information about a specific scheduled SMS message.
 
     :param client: A Client object containing API authentication details.
     :param schedule_id: The ID of the scheduled message to retrieve.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
     :raises TypeError: If client parameter is not an instance of Client class or schedule_id is not a string.
     :return: A Sms object containing information about the scheduled message."""
         v.validate([client,schedule_id],[c.Client,str],["client","schedule_id"])
         url = client.endpoint + SMS_SCHEDULE_URI_PATH + "/"+str(schedule_id)
-        response = client.get(url, client.content_type_json)
-        status_code = response["code"]
-        body_byte = response["content"]
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Sms(result=error)
+        response = client.get(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        return schedule_from_response(response, client)
 
-        result = json.loads(body_byte)
-        result = result_schedule_from_json(result)
-        return Sms(result=result.__dict__)
+    async def get_scheduled_async(client: c.AsyncClient, schedule_id, timeout=None, deadline=None):
+        """
+        Asynchronous version of Sms.get_scheduled using an AsyncClient.
 
-    def get_all_scheduled(client: c.Client):
+    :param client: An AsyncClient object containing API authentication details.
+    :param schedule_id: The ID of the scheduled message to retrieve.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+    :return: A Sms object containing information about the scheduled message."""
+        v.validate([client,schedule_id],[c.AsyncClient,str],["client","schedule_id"])
+        url = client.endpoint + SMS_SCHEDULE_URI_PATH + "/"+str(schedule_id)
+        response = await client.get(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        return schedule_from_response(response, client)
+
+    def get_all_scheduled(client: c.Client, timeout=None, deadline=None):
         """
         Returns information about all scheduled SMS message.
 
     :param client: A Client object containing API authentication details.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
     :raises TypeError: If client parameter is not an instance of Client class.
     :return: A Sms object containing information about the scheduled messages."""
         v.validate([client],[c.Client],["client"])
         url = client.endpoint + SMS_SCHEDULE_URI_PATH
-        response = client.get(url, client.content_type_json)
-        status_code = response["code"]
-        body_byte = response["content"]
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Sms(result=error)
+        response = client.get(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        return all_scheduled_from_response(response, client)
 
-        result = json.loads(body_byte)
-        result_list = []
-        for item in result["items"]:
-            result_list.append(result_schedule_from_json(item).__dict__)
+    async def get_all_scheduled_async(client: c.AsyncClient, timeout=None, deadline=None):
+        """
+        Asynchronous version of Sms.get_all_scheduled using an AsyncClient.
 
-        return Sms(result=result_list)
+    :param client: An AsyncClient object containing API authentication details.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+    :return: A Sms object containing information about the scheduled messages."""
+        v.validate([client],[c.AsyncClient],["client"])
+        url = client.endpoint + SMS_SCHEDULE_URI_PATH
+        response = await client.get(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        return all_scheduled_from_response(response, client)
 
-    def del_scheduled(client: c.Client, schedule_id):
+    def iter_all_scheduled(client: c.Client, timeout=None, deadline=None):
+        """
+        Returns information about all scheduled SMS messages as a lazy iterator.
+
+        The response body is parsed while it is received, so items are yielded as they arrive and
+        the whole list is never held in memory. Iterate the result to the end, or close it, to
+        release the connection.
+
+    :param client: A Client object containing API authentication details.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the request, including retries.
+    :raises TypeError: If client parameter is not an instance of Client class.
+    :return: A Sms object whose result is a generator of scheduled message dictionaries (CompactResultSchedule
+        tuples with compact_results), or the error."""
+        v.validate([client],[c.Client],["client"])
+        url = client.endpoint + SMS_SCHEDULE_URI_PATH
+        response = client.get_stream(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        error = c.error_from_response(response)
+        if error is not None:
+            return Sms(result=error)
+        return Sms(result=iter_schedules(response["stream"], client))
+
+    def del_scheduled(client: c.Client, schedule_id, timeout=None, deadline=None):
         """
        Delete a specific scheduled SMS message.
 
     :param client: A Client object containing API authentication details.
     :param schedule_id: The ID of the scheduled message to delete.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
     :raises TypeError: If client parameter is not an instance of Client class or schedule_id is not a string.
     :return: A result message."""
         if not isinstance(client, c.Client):
@@ -202,19 +442,26 @@ class Sms:
             raise TypeError("schedule_id must be type of string")
         v.validate([client,schedule_id],[c.Client,str],["client","schedule_id"])
         url = client.endpoint + SMS_SCHEDULE_URI_PATH + "/"+str(schedule_id)
-        response = client.get(url, client.content_type_json)
-        status_code = response["code"]
-        body_byte = response["content"]
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Sms(result=error)
+        response = client.delete(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        return deleted_from_response(response)
 
-        return Sms(result="Delete Complete")
+    async def del_scheduled_async(client: c.AsyncClient, schedule_id, timeout=None, deadline=None):
+        """
+       Asynchronous version of Sms.del_scheduled using an AsyncClient.
+
+    :param client: An AsyncClient object containing API authentication details.
+    :param schedule_id: The ID of the scheduled message to delete.
+    :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+    :return: A result message."""
+        v.validate([client,schedule_id],[c.AsyncClient,str],["client","schedule_id"])
+        url = client.endpoint + SMS_SCHEDULE_URI_PATH + "/"+str(schedule_id)
+        response = await client.delete(url, client.content_type_json, timeout=timeout, deadline=deadline)
+        return deleted_from_response(response)
 
 
 def make_request_data(
-    client: c.Client, to: List[str], text: str, delivery_datetime: Optional[str] = None, params: Optional[Params] = None
+    client, to: List[str], text: str, delivery_datetime: Optional[str] = None, params: Optional[Params] = None
 ) -> dict:
     data = {
         "api_key": client.api_key,
@@ -230,14 +477,51 @@ def make_request_data(
     return data
 
 
+def clean_recipients(client, to: List[str]) -> tuple:
+    """
+    Normalizes the phone numbers of a send with the recipient_normalizer of the client, if it has one.
+
+    :return: A (to, bad_phone_number_list) tuple of the numbers to send and the rejected ones.
+    """
+    if client.recipient_normalizer is None:
+        return to, []
+    return client.recipient_normalizer.clean(to)
+
+
+def rejected_result(client, rejected: List[dict]) -> Sms:
+    """Returns the result of a send whose phone numbers were all rejected locally, without a request."""
+    cached = client.balance_cache.get() if client.balance_cache is not None else None
+    result = {
+        "remaining_balance": cached["amount"] if cached is not None else None,
+        "total_sms": 0,
+        "phone_number_list": [],
+        "bad_phone_number_list": rejected,
+    }
+    if client.compact_results:
+        return Sms(result=CompactResultSms(json.dumps(result).encode(), client.json_decoder))
+    result["scheduled_id"] = None
+    return Sms(result=result)
+
+
+def add_rejected(sms: Sms, rejected: List[dict]) -> Sms:
+    """Adds the phone numbers rejected locally to the bad_phone_number_list of a send result."""
+    if not rejected:
+        return sms
+    if isinstance(sms.result, CompactResultSms):
+        sms.result.bad_phone_number_list.extend(bad_number_columns_from_json(rejected))
+    elif "bad_phone_number_list" in sms.result:
+        sms.result["bad_phone_number_list"].extend(rejected)
+    return sms
+
+
 def result_sms_from_json(data: dict) -> ResultSms:
+    # Build the PhoneNumber and BadNumber dictionaries directly, without an object per number.
     phone_number_list = [
-        PhoneNumber(number=pn["number"],
-                    message_id=pn["message_id"], price=pn["price"]).__dict__
+        {"number": pn["number"], "message_id": pn["message_id"], "price": pn["price"]}
         for pn in data["phone_number_list"]
     ]
     bad_phone_number_list = [
-        BadNumber(number=bpn["number"], msg=bpn["msg"]).__dict__
+        {"number": bpn["number"], "msg": bpn["msg"]}
         for bpn in data["bad_phone_number_list"]
     ]
     result_sms = ResultSms(
@@ -265,3 +549,84 @@ def result_schedule_from_json(data: dict) -> ResultSchedule:
         delivery_status_update_date=data["delivery_status_updated_date"],
         created_date=data["created_date"]
     )
+
+
+def phone_number_columns_from_json(data: List[dict]) -> PhoneNumberColumns:
+    return PhoneNumberColumns([pn["number"] for pn in data], [pn["message_id"] for pn in data],
+                              array("d", [pn["price"] for pn in data]))
+
+
+def bad_number_columns_from_json(data: List[dict]) -> BadNumberColumns:
+    return BadNumberColumns([bpn["number"] for bpn in data], [bpn["msg"] for bpn in data])
+
+
+def compact_schedule_from_json(data: dict) -> CompactResultSchedule:
+    return CompactResultSchedule(
+        data["id"], data["text"], data["total_sms"], data["method"], data["callback_url"], data["from"],
+        data["delivery_date"], data["delivery_status"], data["delivery_status_updated_date"], data["created_date"])
+
+
+def sms_from_response(response: dict, client=None) -> Sms:
+    error = c.error_from_response(response)
+    if error is not None:
+        return Sms(result=error)
+    if client is not None and client.compact_results:
+        result = CompactResultSms(response["content"], client.json_decoder)
+    else:
+        result = result_sms_from_json(c.decode_json(response["content"], client))
+    if client is not None and client.balance_cache is not None:
+        client.balance_cache.update(result.remaining_balance)
+    if isinstance(result, CompactResultSms):
+        return Sms(result=result)
+    return Sms(result=result.__dict__)
+
+
+def schedule_from_response(response: dict, client=None) -> Sms:
+    error = c.error_from_response(response)
+    if error is not None:
+        return Sms(result=error)
+    result = c.decode_json(response["content"], client)
+    if client is not None and client.compact_results:
+        return Sms(result=compact_schedule_from_json(result))
+    result = result_schedule_from_json(result)
+    return Sms(result=result.__dict__)
+
+
+def all_scheduled_from_response(response: dict, client=None) -> Sms:
+    error = c.error_from_response(response)
+    if error is not None:
+        return Sms(result=error)
+    result = c.decode_json(response["content"], client)
+    if client is not None and client.compact_results:
+        return Sms(result=[compact_schedule_from_json(item) for item in result["items"]])
+    result_list = []
+    for item in result["items"]:
+        result_list.append(result_schedule_from_json(item).__dict__)
+    return Sms(result=result_list)
+
+
+def iter_schedules(response, client=None):
+    compact = client is not None and client.compact_results
+    try:
+        for item in stream.iter_json_array(response.iter_content(stream.default_chunk_size), "items"):
+            yield compact_schedule_from_json(item) if compact else result_schedule_from_json(item).__dict__
+    finally:
+        response.close()
+
+
+_remaining_balance_field = re.compile(rb'"remaining_balance"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)')
+
+
+def scan_remaining_balance(body: bytes):
+    """Returns the remaining_balance number of a raw send result body, or None if it is not a plain number."""
+    match = _remaining_balance_field.search(body)
+    if match is None:
+        return None
+    return json.loads(match.group(1))
+
+
+def deleted_from_response(response: dict) -> Sms:
+    error = c.error_from_response(response)
+    if error is not None:
+        return Sms(result=error)
+    return Sms(result="Delete Complete")
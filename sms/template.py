@@ -0,0 +1,208 @@
+import re
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+import validation as v
+
+from client import client as c
+from sms import bulk as b
+from sms import sms as s
+
+# Number of recipients held while grouping by rendered text before partial batches are sent.
+default_window = 100000
+
+_token = re.compile(r"\{(\w+)\}|\{\{|\}\}|[{}%]")
+
+
+class Template:
+    """
+    A text message with {name} placeholders, filled in per recipient.
+
+    The template is compiled once into a %-format string, so rendering a record is a single
+    formatting operation in C whatever the number of placeholders. Write {{ and }} for literal braces.
+
+    :param text: The template, for example "Hi {name}, your code is {code}".
+    :raises TypeError: If text is not a string.
+    :raises ValueError: If a brace is neither part of a placeholder nor escaped.
+    """
+
+    def __init__(self, text: str):
+        v.validate([text],[str],["text"])
+        parts = []
+        fields = []
+        end = 0
+        for match in _token.finditer(text):
+            parts.append(text[end:match.start()].replace("%", "%%"))
+            token = match.group(0)
+            if match.group(1) is not None:
+                fields.append(match.group(1))
+                parts.append("%(" + match.group(1) + ")s")
+            elif token == "%":
+                parts.append("%%")
+            elif token in ("{{", "}}"):
+                parts.append(token[0])
+            else:
+                raise ValueError(f"unmatched {token!r} at position {match.start()} of the template")
+            end = match.end()
+        parts.append(text[end:])
+        self.text = text
+        self.fields = tuple(dict.fromkeys(fields))
+        self._format = "".join(parts)
+
+    def render(self, record: Mapping) -> str:
+        """
+        Returns the text for one recipient.
+
+        :param record: A dictionary (or other mapping) with a value for every placeholder.
+        :raises KeyError: If the record has no value for a placeholder.
+        """
+        return self._format % record
+
+
+class TemplateResult(b.BulkResult):
+    def __init__(self, template: Template, delivery_datetime: Optional[str] = None,
+                 params: Optional[s.Params] = None, compact: bool = False):
+        """
+        Merged outcome of a templated bulk send, like BulkResult. texts holds the rendered text of
+        every batch by batch index, and records that could not be rendered are reported in
+        bad_phone_number_list.
+
+        :param template: The Template that was sent.
+        :param delivery_datetime: The RFC3339 delivery datetime for scheduled sends.
+        :param params: Parameters used for every batch.
+        :param compact: If True, the phone number lists are merged as columns.
+        """
+        super().__init__(template.text, delivery_datetime, params, compact)
+        self.template = template
+        self.texts: Dict[int, str] = {}
+
+    def reject(self, rejected: List[dict]):
+        if not rejected:
+            return
+        if self.compact:
+            self.bad_phone_number_list.extend(s.bad_number_columns_from_json(rejected))
+        else:
+            self.bad_phone_number_list.extend(rejected)
+
+
+class TemplateSms:
+    def send(client: c.Client, template: Union[Template, str], records: Iterable[Mapping],
+             params: Optional[s.Params] = None, delivery_datetime: Optional[str] = None, to_field: str = "to",
+             batch_size: int = b.default_batch_size, max_workers: int = b.default_max_workers,
+             window: int = default_window, timeout=None, deadline=None) -> TemplateResult:
+        """Sends a personalized SMS message to every recipient of a stream of records.
+
+    Every record is rendered with the precompiled template, and recipients whose text is the same
+    share batched requests: a batch is sent as soon as batch_size recipients have the same text,
+    and once window recipients are held, every partial batch is sent. Different texts need
+    different requests, which are sent concurrently over max_workers threads, so templates with
+    few distinct texts (per city, per offer) cost far fewer requests than one per recipient.
+
+    :param client: A Client object containing API authentication details.
+    :param template: A Template, or a template text to compile.
+    :param records: Any iterable of mappings (for example csv.DictReader rows) holding the phone
+        number under to_field and a value for every placeholder of the template.
+    :param params: Optional parameters for the SMS message API (default is None).
+    :param delivery_datetime: The date and time to send the messages in RFC3339 format, None to send now.
+    :param to_field: The key of the phone number in every record.
+    :param batch_size: Maximum number of phone numbers per request.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param window: Maximum number of recipients held while grouping by text.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole send. Batches that
+        cannot be sent before it are reported as failed with DeadlineExceededError, so they can be retried.
+    :raises TypeError: If client is not a Client, records is not an iterable, or a phone number is not a string.
+    :raises ValueError: If the template is invalid, a record has no to_field, or batch_size, max_workers
+        or window is lower than 1.
+    :return: A TemplateResult with the merged result, the outcome of every batch and its text."""
+        v.validate([client],[c.Client],["client"])
+        v.validate_iterable(records,"records")
+        b.validate_batching(batch_size, max_workers)
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if not isinstance(template, Template):
+            template = Template(template)
+        if params is None:
+            params = s.Params()
+        result = TemplateResult(template, delivery_datetime, params, client.compact_results)
+        rejected = []
+        batches = enumerate(iter_template_batches(template, records, to_field, batch_size, window, rejected))
+        tasks = (_send_task(client, result, index, text, to, delivery_datetime, params, timeout, deadline)
+                 for index, (text, to) in batches)
+        for batch in b.run_bounded(tasks, max_workers):
+            result.add(batch)
+        result.batches.sort(key=lambda batch: batch.index)
+        result.reject(rejected)
+        return result
+
+    def retry(client: c.Client, result: TemplateResult, max_workers: int = b.default_max_workers,
+              timeout=None, deadline=None, resend_in_doubt: bool = False) -> TemplateResult:
+        """Sends the failed batches of a templated send again, each with its own text.
+
+    Like BulkSms.retry, batches whose request may have reached the API are left failed unless
+    resend_in_doubt is True.
+
+    :param client: A Client object containing API authentication details.
+    :param result: The TemplateResult returned by TemplateSms.send.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param timeout: Optional per-request timeout in seconds or (connect, read) tuple, overriding the client defaults.
+    :param deadline: Optional absolute deadline (see client.deadline_after) for the whole send.
+    :param resend_in_doubt: If True, also send the in-doubt batches again, at the risk of sending messages twice.
+    :return: The same TemplateResult, updated with the outcome of the retried batches."""
+        v.validate([client,result],[c.Client,TemplateResult],["client","result"])
+        b.validate_batching(1, max_workers)
+        failed = result.retryable(resend_in_doubt)
+        result.batches = result.kept(resend_in_doubt)
+        tasks = (_send_task(client, result, batch.index, result.texts[batch.index], batch.to,
+                            result.delivery_datetime, result.params, timeout, deadline) for batch in failed)
+        for batch in b.run_bounded(tasks, max_workers):
+            result.add(batch)
+        result.batches.sort(key=lambda batch: batch.index)
+        return result
+
+
+def _send_task(client: c.Client, result: TemplateResult, index: int, text: str, to: List[str],
+               delivery_datetime: Optional[str], params: s.Params, timeout, deadline):
+    # Recorded when the task is created, so the text is known even if the batch fails.
+    result.texts[index] = text
+    return partial(b.send_batch, client, index, to, text, delivery_datetime, params, timeout, deadline)
+
+
+def iter_template_batches(template: Template, records: Iterable[Mapping], to_field: str, batch_size: int,
+                          window: int, rejected: List[dict]) -> Iterator[Tuple[str, List[str]]]:
+    """Renders records lazily and yields (text, phone numbers) batches of recipients with the same text.
+
+    A phone number appears once per text within a batch. Records missing a placeholder value are
+    added to rejected as bad phone numbers."""
+    render = template.render
+    groups: Dict[str, dict] = {}
+    held = 0
+    for record in records:
+        try:
+            number = record[to_field]
+        except (KeyError, TypeError):
+            raise ValueError(f"every record needs a {to_field!r} field")
+        if not isinstance(number, str):
+            raise TypeError("phone numbers can only be str")
+        try:
+            text = render(record)
+        except KeyError as e:
+            rejected.append({"number": number, "msg": f"missing template variable {e.args[0]}"})
+            continue
+        group = groups.get(text)
+        if group is None:
+            group = groups[text] = {}
+        elif number in group:
+            continue
+        group[number] = None
+        held += 1
+        if len(group) == batch_size:
+            del groups[text]
+            held -= batch_size
+            yield text, list(group)
+        if held >= window:
+            for text, group in groups.items():
+                yield text, list(group)
+            groups = {}
+            held = 0
+    for text, group in groups.items():
+        yield text, list(group)
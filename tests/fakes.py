@@ -0,0 +1,68 @@
+import json
+import threading
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from requests.structures import CaseInsensitiveDict
+
+from benchmark.server import sms_result
+from client import client as c
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body, headers=None, request_body=None):
+        self.status_code = status_code
+        self.content = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.elapsed = timedelta(0)
+        self.request = type("Request", (), {"body": request_body})()
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """
+    Stands in for the requests.Session of a Client. handler(method, path, form) returns a
+    (status, body) or (status, body, headers) tuple or raises; without a handler every SMS send
+    succeeds.
+    """
+
+    def __init__(self, handler=None):
+        self.handler = handler if handler is not None else default_handler
+        self.calls = []
+        self.headers = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, data=None, timeout=None, stream=False):
+        path = urlparse(url).path
+        if path.startswith("/v1"):
+            path = path[3:]
+        form = dict(data or {})
+        with self._lock:
+            self.calls.append((method, path, form))
+            self.headers.append(dict(headers or {}))
+        status, body, *headers = self.handler(method, path, form)
+        return FakeResponse(status, body, *headers)
+
+    def close(self):
+        pass
+
+    def sends(self):
+        return [form for method, path, form in self.calls if path in ("/sms", "/sms/scheduled") and method == "POST"]
+
+
+def default_handler(method, path, form):
+    if path == "/balance":
+        return 200, {"type": "credit", "amount": 100.0}
+    return 200, sms_result(form.get("to", "").split(","), scheduled=path == "/sms/scheduled")
+
+
+def fake_client(handler=None, **kwargs) -> c.Client:
+    client = c.Client("key", "secret", **kwargs)
+    client._session = FakeSession(handler)
+    return client
@@ -0,0 +1,57 @@
+import threading
+
+from balance.balance import Balance
+from balance.cache import BalanceCache
+from tests.fakes import fake_client
+
+
+def test_out_of_order_send_results_keep_the_lowest_balance():
+    cache = BalanceCache()
+    cache.update(90.0)
+    cache.update(95.0)
+    assert cache.amount == 90.0
+
+
+def test_balance_get_and_expiry_replace_a_lower_balance():
+    cache = BalanceCache(ttl=60)
+    cache.update(10.0)
+    cache.set({"type": "credit", "amount": 500.0})
+    assert cache.amount == 500.0
+    cache.ttl = 0
+    cache.update(600.0)
+    assert cache.amount == 600.0
+
+
+def test_send_result_corrects_a_local_estimate():
+    cache = BalanceCache()
+    cache.set({"type": "credit", "amount": 100.0})
+    cache.debit(10.0)
+    cache.update(95.0)
+    assert cache.amount == 95.0
+
+
+def test_low_balance_callback_gets_the_amount_that_crossed():
+    amounts = []
+    cache = BalanceCache(low_balance_threshold=10.0, on_low_balance=amounts.append)
+    cache.update(20.0)
+    cache.update(5.0)
+    cache.update(4.0)
+    assert amounts == [5.0]
+
+
+def test_balance_get_asks_the_api_while_the_type_is_unknown():
+    client = fake_client(balance_cache=BalanceCache())
+    client.balance_cache.update(42.0)
+    assert Balance.get(client).result == {"type": "credit", "amount": 100.0}
+    assert Balance.get(client).result == {"type": "credit", "amount": 100.0}
+    assert len(client.session.calls) == 1
+
+
+def test_concurrent_updates_settle_on_the_minimum():
+    cache = BalanceCache()
+    threads = [threading.Thread(target=cache.update, args=(float(amount),)) for amount in range(100, 0, -7)]
+    for thread in reversed(threads):
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.amount == 2.0
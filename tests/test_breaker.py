@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from client import breaker as br
+from client.client import AsyncClient
+from client.limiter import RateLimiter
+from sms.sms import Sms
+from tests.fakes import fake_client
+
+
+def open_breaker(open_for=0.05):
+    breaker = br.CircuitBreaker(min_calls=2, open_for=open_for, half_open_probes=1)
+    for _ in range(2):
+        breaker.record(breaker.acquire(), 0.01, True)
+    return breaker
+
+
+def test_breaker_opens_half_opens_and_closes():
+    changes = []
+    breaker = open_breaker()
+    breaker.on_state_change = lambda old, new: changes.append(new)
+    assert breaker.state == br.OPEN
+    with pytest.raises(br.CircuitOpenError):
+        breaker.acquire()
+
+    time.sleep(0.06)
+    probe = breaker.acquire()
+    assert probe and breaker.state == br.HALF_OPEN
+    with pytest.raises(br.CircuitOpenError):
+        breaker.acquire()
+    breaker.record(probe, 0.01, False)
+    assert breaker.state == br.CLOSED
+    assert changes == [br.HALF_OPEN, br.CLOSED]
+
+
+def test_failed_probe_opens_the_breaker_again():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.record(breaker.acquire(), 0.01, True)
+    assert breaker.state == br.OPEN
+
+
+def test_slow_calls_open_the_breaker():
+    breaker = br.CircuitBreaker(min_calls=2, slow_call_duration=0.1, slow_rate=0.5)
+    for _ in range(2):
+        breaker.record(breaker.acquire(), 0.2, False)
+    assert breaker.state == br.OPEN
+
+
+def test_open_circuit_fails_fast_without_using_the_rate_budget():
+    breakers = br.CircuitBreakers({"/sms": open_breaker(open_for=60)})
+    limiter = RateLimiter({"/sms": 2})
+    client = fake_client(breakers=breakers, limiter=limiter)
+    for _ in range(3):
+        with pytest.raises(br.CircuitOpenError):
+            Sms.send(client, ["66812345678"], "hi")
+    assert limiter.reserve("/sms") == 0
+    assert not client.session.calls
+
+
+def test_async_open_circuit_fails_fast_without_using_the_rate_budget():
+    async def main():
+        breakers = br.CircuitBreakers({"/sms": open_breaker(open_for=60)})
+        limiter = RateLimiter({"/sms": 2})
+        client = AsyncClient("key", "secret", breakers=breakers, limiter=limiter)
+        for _ in range(3):
+            with pytest.raises(br.CircuitOpenError):
+                await Sms.send_async(client, ["66812345678"], "hi")
+        assert limiter.reserve("/sms") == 0
+
+    asyncio.run(main())
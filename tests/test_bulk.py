@@ -0,0 +1,100 @@
+import pytest
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from client import client as c
+from sms.bulk import BulkSms
+from tests.fakes import default_handler, fake_client
+
+
+def failing_batches(errors):
+    # Fails the first send of every batch whose first number is in errors, then succeeds.
+    failed = set()
+
+    def handler(method, path, form):
+        first = form["to"].split(",")[0]
+        if first in errors and first not in failed:
+            failed.add(first)
+            error = errors[first]
+            if isinstance(error, int):
+                return error, {"error": {"code": error, "name": "error"}}
+            raise error
+        return default_handler(method, path, form)
+    return handler
+
+
+def connection_refused():
+    return requests.ConnectionError(NewConnectionError(None, "refused"))
+
+
+def test_retry_skips_batches_that_may_have_been_sent():
+    client = fake_client(failing_batches({"1": requests.ReadTimeout(), "3": connection_refused(), "5": 500}))
+    bulk = BulkSms.send(client, ["1", "2", "3", "4", "5", "6"], "hi", batch_size=2, max_workers=1)
+    assert [batch.in_doubt for batch in bulk.failed()] == [True, False, True]
+
+    BulkSms.retry(client, bulk, max_workers=1)
+
+    assert [batch.index for batch in bulk.failed()] == [0, 2]
+    assert [form["to"] for form in client.session.sends()].count("3,4") == 2
+    assert [form["to"] for form in client.session.sends()].count("1,2") == 1
+
+
+def test_retry_resends_in_doubt_batches_on_request():
+    client = fake_client(failing_batches({"1": requests.ReadTimeout()}))
+    bulk = BulkSms.send(client, ["1", "2"], "hi")
+
+    BulkSms.retry(client, bulk, resend_in_doubt=True)
+
+    assert not bulk.failed()
+    assert bulk.total_sms == 2
+
+
+def test_rejected_and_throttled_batches_are_not_in_doubt():
+    client = fake_client(failing_batches({"1": 400, "3": 429, "5": 503}))
+    bulk = BulkSms.send(client, ["1", "2", "3", "4", "5", "6"], "hi", batch_size=2)
+    assert [batch.in_doubt for batch in bulk.failed()] == [False, False, False]
+
+
+def test_deadline_before_sending_is_not_in_doubt():
+    client = fake_client()
+    bulk = BulkSms.send(client, ["1", "2"], "hi", deadline=c.deadline_after(-1))
+    assert isinstance(bulk.failed()[0].error, c.DeadlineExceededError)
+    assert not bulk.failed()[0].in_doubt
+    assert not client.session.sends()
+
+
+def numbers_then(error, count):
+    for i in range(count):
+        yield str(66800000000 + i)
+    raise error
+
+
+def test_batches_sent_before_the_numbers_fail_are_kept():
+    client = fake_client()
+    bulk = BulkSms.send(client, numbers_then(OSError("file unreadable"), 5), "hi", batch_size=2, max_workers=2)
+    assert isinstance(bulk.error, OSError)
+    assert [batch.to for batch in bulk.batches] == [["66800000000", "66800000001"], ["66800000002", "66800000003"]]
+    assert bulk.total_sms == 4 and len(client.session.sends()) == 2
+
+
+def test_number_that_is_not_a_string_stops_the_send():
+    client = fake_client()
+    bulk = BulkSms.send(client, ["66812345678", "66812345679", 66812345680, "66812345681"], "hi", batch_size=1)
+    assert isinstance(bulk.error, TypeError)
+    assert sorted(form["to"] for form in client.session.sends()) == ["66812345678", "66812345679"]
+
+
+def test_numbers_failing_before_any_batch_raise():
+    client = fake_client()
+    with pytest.raises(TypeError):
+        BulkSms.send(client, [66812345678], "hi")
+    assert not client.session.calls
+
+
+def test_iter_send_yields_the_batches_in_flight_before_raising():
+    batches = []
+    with pytest.raises(OSError):
+        for batch in BulkSms.iter_send(fake_client(), numbers_then(OSError("file unreadable"), 4), "hi",
+                                       batch_size=2, max_workers=2):
+            batches.append(batch)
+    assert sorted(batch.index for batch in batches) == [0, 1]
@@ -0,0 +1,43 @@
+import io
+import json
+
+import pytest
+
+from campaign import campaign as cp
+from sms.sms import Params
+
+
+def config(**kwargs) -> cp.Config:
+    settings = dict(api_key="key", api_secret="secret", endpoint="http://127.0.0.1:9/v1", text="hi", template=None,
+                    to_field="to", params=Params(), delivery_datetime=None, batch_size=10, threads=1, rate=None,
+                    retries=1, country_code=None)
+    settings.update(kwargs)
+    return cp.Config(**settings)
+
+
+def test_a_chunk_whose_worker_raises_is_written_as_failed(tmp_path):
+    path = tmp_path / "recipients.csv"
+    path.write_text("to\n1\n2\n3\n")
+    output = io.StringIO()
+    # The worker raises ValueError for an empty text; every chunk is still written.
+    progress = cp.run(config(text=""), [str(path)], output, processes=1, chunk_size=2,
+                      progress=cp.Progress(io.StringIO()))
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(record["number"] for record in records) == ["1", "2", "3"]
+    assert all(record["status"] == "failed" and "ValueError" in record["error"] for record in records)
+    assert progress.failed == 3
+
+
+def test_failed_chunk_keeps_bad_records():
+    chunk = cp.Chunk("jsonl", None, [b'{"to": "1"}\n', b'not json\n'])
+    result = cp.failed_chunk(chunk, "to", RuntimeError("pool broke"))
+    assert [record["status"] for record in result.records] == ["failed", "bad"]
+    assert result.failed == 1 and result.bad == 1
+
+
+@pytest.mark.parametrize("argv", [["--template", "Hi {name"], ["--text", ""]])
+def test_invalid_message_is_a_usage_error(argv, capsys):
+    with pytest.raises(SystemExit) as exit:
+        cp.main(["recipients.csv", "--api-key", "key", "--api-secret", "secret"] + argv)
+    assert exit.value.code == 2
+    assert "Traceback" not in capsys.readouterr().err
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from verify.coalesce import Coalescer
+
+
+class Verify:
+    def __init__(self, request_id):
+        self.result = {"request_id": request_id}
+
+
+def test_without_a_window_sequential_calls_each_send_a_request():
+    coalescer = Coalescer(window=0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        return Verify("r1")
+
+    assert coalescer.do("key", call).result == {"request_id": "r1"}
+    assert coalescer.do("key", call).result == {"request_id": "r1"}
+    assert len(calls) == 2
+
+
+def test_concurrent_identical_calls_share_one_request():
+    coalescer = Coalescer(window=0)
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return Verify("r1")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(coalescer.do, "key", call) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        # Every caller but the one sending the request waits for it.
+        while coalescer.coalesced < 7 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result(5) for future in futures]
+    assert len(calls) == 1
+    assert coalescer.coalesced == 7
+    assert all(result is results[0] for result in results)
+
+
+def test_window_reuses_a_successful_result():
+    coalescer = Coalescer(window=60)
+    assert coalescer.do("key", lambda: Verify("r1")) is coalescer.do("key", lambda: Verify("r2"))
+    assert coalescer.coalesced == 1
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    async def main():
+        coalescer = Coalescer(window=0)
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return Verify("r1")
+
+        leader = asyncio.ensure_future(coalescer.do_async("key", call))
+        await started.wait()
+        follower = asyncio.ensure_future(coalescer.do_async("key", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert (await follower).result == {"request_id": "r1"}
+        assert len(calls) == 1
+
+    asyncio.run(main())
+
+
+def test_errors_are_shared_but_not_kept():
+    async def main():
+        coalescer = Coalescer()
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise OSError("down")
+
+        first = asyncio.ensure_future(coalescer.do_async("key", failing))
+        second = asyncio.ensure_future(coalescer.do_async("key", failing))
+        await asyncio.sleep(0)
+        release.set()
+        for future in (first, second):
+            with pytest.raises(OSError):
+                await future
+
+        async def succeeding():
+            return Verify("r2")
+
+        assert (await coalescer.do_async("key", succeeding)).result == {"request_id": "r2"}
+
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+import json
+
+from balance.balance import Balance, CompactResultBalance
+from balance.cache import BalanceCache
+from benchmark.server import scheduled_item
+from sms import sms as s
+from tests.fakes import FakeResponse, fake_client
+
+
+def test_cached_balance_has_the_same_type_as_a_fetched_one():
+    client = fake_client(compact_results=True, balance_cache=BalanceCache(ttl=60))
+    fetched = Balance.get(client).result
+    cached = Balance.get(client).result
+    assert isinstance(fetched, CompactResultBalance) and isinstance(cached, CompactResultBalance)
+    assert cached == fetched
+    assert len(client.session.calls) == 1
+
+
+def test_compact_send_updates_the_balance_cache_without_decoding():
+    decoded = []
+
+    def loads(body):
+        decoded.append(body)
+        return json.loads(body)
+
+    client = fake_client(compact_results=True, balance_cache=BalanceCache(), json_decoder=loads)
+    result = s.Sms.send(client, ["66812345678"], "hi").result
+    assert client.balance_cache.amount == 1000000.0 - 0.1
+    assert not decoded
+    assert result.total_sms == 1 and len(decoded) == 1
+    assert result.remaining_balance == 1000000.0 - 0.1
+
+
+def test_remaining_balance_scan_falls_back_to_decoding():
+    result = s.CompactResultSms(json.dumps({"remaining_balance": None, "total_sms": 0, "phone_number_list": [],
+                                            "bad_phone_number_list": []}).encode())
+    assert result.remaining_balance is None
+    assert s.scan_remaining_balance(b'{"remaining_balance": 12}') == 12
+
+
+def test_iter_all_scheduled_is_compact_with_compact_results():
+    items = [scheduled_item(i) for i in range(3)]
+    client = fake_client(compact_results=True)
+    client.session.request = lambda *args, **kwargs: FakeResponse(200, {"items": items})
+    result = list(s.Sms.iter_all_scheduled(client).result)
+    assert [item.id for item in result] == [0, 1, 2]
+    assert isinstance(result[0], s.CompactResultSchedule)
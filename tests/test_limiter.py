@@ -0,0 +1,73 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from client.limiter import RateLimitedError, RateLimiter, TokenBucket, parse_retry_after
+from sms.sms import Sms
+from tests.fakes import default_handler, fake_client
+
+
+def test_tokens_refill_at_the_rate_up_to_capacity():
+    bucket = TokenBucket(10, capacity=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    # A second later the bucket is full again, but holds no more than capacity.
+    bucket.updated -= 1
+    assert bucket.wait_time() == 0
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() > 0
+
+
+def test_budgets_match_the_longest_path_prefix():
+    limiter = RateLimiter({"/sms": 5, "/sms/scheduled": 1})
+    assert limiter.bucket("/sms/scheduled/42") is limiter.buckets["/sms/scheduled"]
+    assert limiter.bucket("/sms") is limiter.buckets["/sms"]
+    assert limiter.bucket("/smsx") is None and limiter.bucket("/verify") is None
+
+
+@pytest.mark.parametrize("value, expected", [("2", 2.0), ("-1", 0.0), ("soon", None), (None, None)])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+
+
+def throttled(times, retry_after="0.05"):
+    calls = []
+
+    def handler(method, path, form):
+        calls.append(time.monotonic())
+        if len(calls) <= times:
+            return 429, {"error": {"code": 429, "name": "too many requests"}}, {"Retry-After": retry_after}
+        return default_handler(method, path, form)
+    return handler, calls
+
+
+def test_429_waits_for_retry_after_and_slows_the_budget():
+    handler, calls = throttled(1)
+    limiter = RateLimiter({"/sms": 100})
+    client = fake_client(handler, limiter=limiter)
+    assert Sms.send(client, ["66812345678"], "hi").result["total_sms"] == 1
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.05
+    # Halved by the 429, then sped up by rate / 20 by the successful retry.
+    assert limiter.buckets["/sms"].rate == 55
+
+
+def test_429_on_a_path_without_budget_pauses_that_path():
+    limiter = RateLimiter({})
+    assert limiter.on_response("/sms/scheduled", 429, {"Retry-After": "10"})
+    assert limiter.reserve("/sms") == pytest.approx(10, abs=0.5)
+    assert limiter.reserve("/verify") == 0
+
+
+def test_429_after_max_throttle_retries_raises():
+    handler, calls = throttled(10, retry_after="0.01")
+    client = fake_client(handler, limiter=RateLimiter({"/sms": 100}, max_throttle_retries=2))
+    with pytest.raises(RateLimitedError) as raised:
+        Sms.send(client, ["66812345678"], "hi")
+    assert raised.value.retry_after == 0.01
+    assert len(calls) == 3
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sms.planner import Planner, plan, rfc3339
+from tests.fakes import fake_client
+
+start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def numbers(count):
+    return [str(66800000000 + i) for i in range(count)]
+
+
+def test_slots_are_spaced_by_slot_seconds_and_split_by_batch_size():
+    slots = plan(numbers(150), start, rate=1, slot_seconds=60, batch_size=50)
+    assert [(slot.delivery_datetime, len(slot.to)) for slot in slots] == [
+        ("2030-01-01T00:00:00Z", 50), ("2030-01-01T00:00:00Z", 10),
+        ("2030-01-01T00:01:00Z", 50), ("2030-01-01T00:01:00Z", 10),
+        ("2030-01-01T00:02:00Z", 30),
+    ]
+    assert [number for slot in slots for number in slot.to] == numbers(150)
+
+
+def test_fractional_numbers_per_slot_carry_over():
+    slots = plan(numbers(5), start, rate=0.5, slot_seconds=3)
+    assert [len(slot.to) for slot in slots] == [1, 2, 1, 1]
+    assert slots[-1].delivery_datetime == "2030-01-01T00:00:09Z"
+
+
+def test_without_a_rate_numbers_are_spread_until_end():
+    slots = plan(numbers(100), start, end=start + timedelta(minutes=5), slot_seconds=60)
+    assert [len(slot.to) for slot in slots] == [20] * 5
+    assert slots[-1].delivery_datetime == rfc3339(start + timedelta(minutes=4))
+
+
+def test_plan_that_does_not_fit_before_end_is_rejected():
+    with pytest.raises(ValueError, match="do not fit"):
+        plan(numbers(200), start, end=start + timedelta(minutes=2), rate=1, slot_seconds=60)
+    assert len(plan(numbers(120), start, end=start + timedelta(minutes=2), rate=1, slot_seconds=60)) == 2
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"start": datetime(2030, 1, 1), "rate": 1},
+    {"start": start},
+    {"start": start, "end": start},
+    {"start": start, "rate": 0},
+    {"start": start, "rate": 1, "slot_seconds": 0},
+])
+def test_invalid_plans_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        plan(numbers(10), **kwargs)
+
+
+def test_rfc3339_keeps_non_utc_offsets():
+    assert rfc3339(datetime(2030, 1, 1, 7, tzinfo=timezone(timedelta(hours=7)))) == "2030-01-01T07:00:00+07:00"
+
+
+def test_schedule_sends_every_slot_at_its_delivery_datetime():
+    client = fake_client()
+    campaign = Planner.schedule(client, numbers(5) + numbers(1), "hi", start, rate=1 / 60, batch_size=2)
+    sends = sorted(client.session.sends(), key=lambda form: form["delivery_datetime"])
+    assert [(form["to"], form["delivery_datetime"]) for form in sends] == [
+        (number, rfc3339(start + timedelta(minutes=i))) for i, number in enumerate(numbers(5))]
+    assert campaign.delivery_datetimes == {i: form["delivery_datetime"] for i, form in enumerate(sends)}
+    assert campaign.total_sms == 5
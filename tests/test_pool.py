@@ -0,0 +1,83 @@
+from collections import Counter
+
+import pytest
+import requests
+
+from client import client as c
+from client.pool import LEAST_IN_FLIGHT, Account, ClientPool, NoAccountAvailableError
+
+
+class Result:
+    def __init__(self, result):
+        self.result = result
+
+
+def accounts(*names, **kwargs):
+    return [Account(c.Client(name, "secret"), name=name, **kwargs) for name in names]
+
+
+def answer(client):
+    return Result({"account": client.api_key})
+
+
+def failing(*names, error=None):
+    # An operation failing on the named accounts, with an API error or by raising error.
+    def operation(client):
+        if client.api_key in names:
+            if error is not None:
+                raise error
+            return Result({"code": 503, "name": "service unavailable"})
+        return answer(client)
+    return operation
+
+
+def test_weighted_round_robin_spreads_calls_by_weight():
+    heavy, light = Account(c.Client("heavy", "secret"), weight=2), Account(c.Client("light", "secret"))
+    pool = ClientPool([heavy, light])
+    used = [pool.call(answer).result["account"] for _ in range(6)]
+    assert Counter(used) == {"heavy": 4, "light": 2}
+    assert used[:2] == ["heavy", "light"]
+
+
+def test_least_in_flight_takes_the_idlest_account():
+    pool = ClientPool(accounts("a", "b", "c"), strategy=LEAST_IN_FLIGHT)
+    pool.accounts[0].in_flight = 2
+    pool.accounts[1].in_flight = 1
+    assert pool.call(answer).result["account"] == "c"
+    pool.accounts[2].in_flight = 3
+    assert pool.call(answer).result["account"] == "b"
+
+
+def test_api_error_fails_over_to_the_next_account():
+    pool = ClientPool(accounts("a", "b"))
+    assert pool.call(failing("a")).result == {"account": "b"}
+    assert pool.stats()[0]["failures"] == 1 and not pool.stats()[0]["available"]
+
+
+def test_unsent_request_fails_over_to_the_next_account():
+    error = requests.ConnectTimeout("connect timeout")
+    pool = ClientPool(accounts("a", "b"))
+    assert pool.call(failing("a", error=error)).result == {"account": "b"}
+    assert pool.stats()[0]["last_error"] is error
+
+
+def test_request_that_may_have_been_sent_is_not_failed_over():
+    pool = ClientPool(accounts("a", "b"))
+    with pytest.raises(requests.ReadTimeout):
+        pool.call(failing("a", error=requests.ReadTimeout("read timeout")))
+    unsafe = ClientPool(accounts("a", "b"), fail_over_unsafe=True)
+    assert unsafe.call(failing("a", error=requests.ReadTimeout("read timeout"))).result == {"account": "b"}
+
+
+def test_failing_account_is_skipped_during_cooldown():
+    pool = ClientPool(accounts("a", "b"), cooldown=60)
+    used = [pool.call(failing("a")).result["account"] for _ in range(4)]
+    assert used == ["b"] * 4
+    assert [account["calls"] for account in pool.stats()] == [1, 4]
+
+
+def test_every_account_failing_returns_the_last_error_then_none_is_available():
+    pool = ClientPool(accounts("a", "b"), cooldown=60)
+    assert pool.call(failing("a", "b")).result["code"] == 503
+    with pytest.raises(NoAccountAvailableError):
+        pool.call(answer)
@@ -0,0 +1,52 @@
+import requests
+
+from sms import queue as q
+from tests.fakes import default_handler, fake_client
+
+
+def test_drain_sends_every_batch_once(tmp_path):
+    client = fake_client()
+    with q.SendQueue(str(tmp_path / "queue.db"), batch_size=2) as queue:
+        assert queue.put(["1", "2", "3"], "hi") == 2
+        assert all(batch.ok for batch in queue.drain(client))
+        assert list(queue.drain(client)) == []
+        assert queue.counts()[q.SENT] == 2
+        assert queue.lookup("m3")["number"] == "3"
+    assert len(client.session.sends()) == 2
+
+
+def test_interrupted_batches_are_not_resent_after_a_crash(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with q.SendQueue(path, batch_size=2) as queue:
+        queue.put(["1", "2", "3", "4"], "hi")
+        # A crash after the first batch was marked sending, before its outcome was stored.
+        queue._db.execute("UPDATE batches SET state = ? WHERE id = 1", (q.SENDING,))
+    client = fake_client()
+    with q.SendQueue(path, batch_size=2) as queue:
+        assert [batch.index for batch in queue.drain(client)] == [2]
+        assert [batch["to"] for batch in queue.in_doubt()] == [["1", "2"]]
+        assert [form["to"] for form in client.session.sends()] == ["3,4"]
+
+        assert queue.requeue_in_doubt([1]) == 1
+        assert [batch.index for batch in queue.drain(client)] == [1]
+        assert queue.counts()[q.IN_DOUBT] == 0
+
+
+def test_requeue_failed_only_requeues_batches_known_not_sent(tmp_path):
+    def handler(method, path, form):
+        if form["to"] == "1":
+            raise requests.ReadTimeout()
+        if form["to"] == "2":
+            return 400, {"error": {"code": 400, "name": "invalid"}}
+        return default_handler(method, path, form)
+
+    client = fake_client(handler)
+    with q.SendQueue(str(tmp_path / "queue.db"), batch_size=1) as queue:
+        queue.put(["1", "2", "3"], "hi")
+        list(queue.drain(client))
+        assert queue.counts() == {q.PENDING: 0, q.SENDING: 0, q.SENT: 1, q.FAILED: 1, q.IN_DOUBT: 1}
+
+        assert queue.requeue_failed() == 1
+        assert queue.counts()[q.PENDING] == 1
+        assert queue.mark_sent([1]) == 1
+        assert queue.counts()[q.IN_DOUBT] == 0
@@ -0,0 +1,88 @@
+import io
+import json
+
+from sms.receiver import DeliveryReceiver
+
+
+def post(receiver, data) -> str:
+    body = json.dumps(data).encode()
+    statuses = []
+    environ = {"REQUEST_METHOD": "POST", "CONTENT_LENGTH": str(len(body)), "CONTENT_TYPE": "application/json",
+               "QUERY_STRING": "", "wsgi.input": io.BytesIO(body)}
+    receiver(environ, lambda status, headers: statuses.append(status))
+    return statuses[0]
+
+
+def test_reports_are_batched_and_correlated():
+    batches = []
+    receiver = DeliveryReceiver(batches.append, correlate={"m1": "sent"}, flush_interval=0.05)
+    assert post(receiver, [{"message_id": "m1", "status": "DELIVERED"}, {"message_id": "m2"}]).startswith("200")
+    receiver.close()
+    assert [(report.message_id, report.sent) for report in batches[0]] == [("m1", "sent"), ("m2", None)]
+    assert receiver.delivered == 2
+
+
+def test_bad_reports_are_dropped_alone_and_the_thread_keeps_running():
+    def correlate(message_id):
+        if message_id == "boom":
+            raise KeyError(message_id)
+        return message_id
+
+    reports = []
+    receiver = DeliveryReceiver(reports.extend, correlate=correlate, flush_interval=0.05)
+    post(receiver, [{"message_id": [1]}, {"message_id": "boom"}, {"message_id": "m1"}])
+    post(receiver, {"message_id": "m2"})
+    receiver.close()
+    assert [report.message_id for report in reports] == ["m1", "m2"]
+    assert receiver.invalid_reports == 2
+    assert not receiver._thread.is_alive()
+
+
+def test_unhashable_message_id_with_a_mapping_correlate():
+    reports = []
+    receiver = DeliveryReceiver(reports.extend, correlate={}, flush_interval=0.05)
+    post(receiver, {"message_id": [1]})
+    post(receiver, {"message_id": "m1"})
+    receiver.close()
+    assert [report.message_id for report in reports] == ["m1"]
+
+
+def test_failing_sink_is_retried_then_dead_lettered():
+    calls = []
+    dead = []
+
+    def sink(reports):
+        calls.append(len(reports))
+        raise OSError("database down")
+
+    receiver = DeliveryReceiver(sink, flush_interval=0.05, sink_attempts=2, sink_backoff=0.01,
+                                dead_letter=lambda reports, error: dead.append((reports, error)))
+    post(receiver, {"message_id": "m1"})
+    receiver.close()
+    assert calls == [1, 1]
+    assert [report.message_id for report in dead[0][0]] == ["m1"]
+    assert isinstance(dead[0][1], OSError)
+    assert receiver.failed_batches == 1 and receiver.dead_lettered == 1
+
+
+def test_sink_recovering_on_retry_delivers_the_batch():
+    calls = []
+
+    def sink(reports):
+        calls.append(reports)
+        if len(calls) == 1:
+            raise OSError("busy")
+
+    receiver = DeliveryReceiver(sink, flush_interval=0.05, sink_backoff=0.01)
+    post(receiver, {"message_id": "m1"})
+    receiver.close()
+    assert len(calls) == 2 and receiver.delivered == 1 and receiver.failed_batches == 0
+
+
+def test_a_callback_larger_than_batch_size_is_split():
+    batches = []
+    receiver = DeliveryReceiver(batches.append, batch_size=2, flush_interval=0.05)
+    post(receiver, [{"message_id": f"m{i}"} for i in range(5)])
+    receiver.close()
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [report.message_id for batch in batches for report in batch] == [f"m{i}" for i in range(5)]
@@ -0,0 +1,80 @@
+import pytest
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from client.limiter import RateLimitedError
+from client.retry import RetryPolicy, in_doubt, not_sent, status_in_doubt
+from sms.sms import Sms
+from tests.fakes import default_handler, fake_client
+
+refused = requests.ConnectionError(NewConnectionError(None, "connection refused"))
+read_timeout = requests.ReadTimeout("read timed out")
+
+
+def policy(**kwargs):
+    return RetryPolicy(backoff_base=0.001, jitter=False, **kwargs)
+
+
+@pytest.mark.parametrize("status_code, error, retried", [
+    (None, refused, True),
+    (None, requests.ConnectTimeout("connect timed out"), True),
+    (429, None, True),
+    (503, None, True),
+    (None, read_timeout, False),
+    (None, requests.ConnectionError("connection reset"), False),
+    (500, None, False),
+    (502, None, False),
+    (504, None, False),
+])
+def test_send_is_retried_only_when_it_was_not_sent(status_code, error, retried):
+    delay = policy().delay("POST", "/sms", 1, 0, status_code=status_code, error=error)
+    assert (delay is not None) == retried
+
+
+@pytest.mark.parametrize("status_code, error", [(500, None), (None, read_timeout)])
+def test_idempotent_requests_and_retry_unsafe_retry_any_transient_failure(status_code, error):
+    assert policy().delay("GET", "/sms/scheduled", 1, 0, status_code=status_code, error=error) is not None
+    assert policy(retry_unsafe=True).delay("POST", "/sms", 1, 0, status_code=status_code, error=error) is not None
+
+
+def test_no_retry_after_max_attempts():
+    assert policy(max_attempts=2).delay("POST", "/sms", 2, 0, status_code=503) is None
+
+
+def test_in_doubt_classification():
+    assert in_doubt(read_timeout)
+    assert not in_doubt(refused) and not_sent(refused)
+    assert not in_doubt(RateLimitedError("/sms"))
+    assert status_in_doubt(500) and status_in_doubt(504)
+    assert not status_in_doubt(503) and not status_in_doubt(429)
+
+
+def failing_first(error):
+    calls = []
+
+    def handler(method, path, form):
+        calls.append(1)
+        if len(calls) == 1:
+            raise error
+        return default_handler(method, path, form)
+    return handler
+
+
+def test_idempotency_key_is_the_same_across_attempts():
+    client = fake_client(failing_first(refused), retry=policy())
+    assert Sms.send(client, ["66812345678"], "hi").result["total_sms"] == 1
+    keys = [headers.get("Idempotency-Key") for headers in client.session.headers]
+    assert len(keys) == 2 and keys[0] and keys[0] == keys[1]
+    Sms.send(client, ["66812345678"], "hi")
+    assert client.session.headers[2]["Idempotency-Key"] != keys[0]
+
+
+def test_read_timeout_of_a_send_is_raised_unless_retry_unsafe():
+    client = fake_client(failing_first(read_timeout), retry=policy())
+    with pytest.raises(requests.ReadTimeout):
+        Sms.send(client, ["66812345678"], "hi")
+    assert len(client.session.calls) == 1
+
+    client = fake_client(failing_first(read_timeout), retry=policy(retry_unsafe=True))
+    assert Sms.send(client, ["66812345678"], "hi").result["total_sms"] == 1
+    assert len(client.session.calls) == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from benchmark.server import scheduled_item
+from sms.scheduled import ScheduleIndex
+from tests.fakes import fake_client
+
+
+def listing(items):
+    return lambda method, path, form: (200, {"items": items})
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_refresh_indexes_the_listing(compact):
+    items = [scheduled_item(i) for i in range(3)]
+    client = fake_client(listing(items), compact_results=compact)
+    index = ScheduleIndex()
+    assert index.refresh(client).result == {"added": 3, "updated": 0, "removed": 0}
+    assert index.get(1)["delivery_status"] == "pending"
+    assert [item["id"] for item in index.by_status("pending")] == [0, 1, 2]
+
+    items[1] = dict(items[1], delivery_status="sent", delivery_status_updated_date="2030-01-02T00:00:00Z")
+    del items[2]
+    assert index.refresh(client).result == {"added": 0, "updated": 1, "removed": 1}
+    assert [item["id"] for item in index.by_status("sent")] == [1]
+    assert index.last_update_date == "2030-01-02T00:00:00Z"
+    assert len(index) == 2
@@ -0,0 +1,39 @@
+import pytest
+
+from sms import segment as sg
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", sg.Segments(sg.GSM7, 0, 0, 160)),
+    ("a" * 160, sg.Segments(sg.GSM7, 160, 1, 0)),
+    ("a" * 161, sg.Segments(sg.GSM7, 161, 2, 145)),
+    ("€" * 80, sg.Segments(sg.GSM7, 160, 1, 0)),
+    ("ก" * 70, sg.Segments(sg.UCS2, 70, 1, 0)),
+    ("ก" * 71, sg.Segments(sg.UCS2, 71, 2, 63)),
+])
+def test_segment_counts(text, expected):
+    assert sg.segment(text) == expected
+
+
+def test_escape_and_its_character_stay_in_one_segment():
+    # The escape would be the 153rd septet of the first part, so both move to the second one.
+    assert sg.segment("a" * 152 + "€" + "a" * 10) == sg.Segments(sg.GSM7, 164, 2, 141)
+
+
+def test_surrogate_pair_stays_in_one_segment():
+    assert sg.segment("ก" * 66 + "😀" + "ก" * 5) == sg.Segments(sg.UCS2, 73, 2, 60)
+
+
+def test_estimate_uses_the_longest_prefix():
+    table = sg.PriceTable({"66": 0.1, "668": 0.2})
+    estimate = table.estimate("a" * 161, ["66812345678", "66912345678", "15551234567"])
+    assert estimate.recipients == 3
+    assert estimate.total_sms == 6
+    assert estimate.cost == pytest.approx((0.2 + 0.1) * 2)
+    assert estimate.unpriced == ["15551234567"]
+
+
+def test_learned_prices_are_per_segment():
+    table = sg.PriceTable()
+    table.learn({"phone_number_list": [{"number": "447700900123", "price": 0.3}]}, segments=2)
+    assert table.price("447700900456") == pytest.approx(0.15)
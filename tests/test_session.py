@@ -0,0 +1,104 @@
+import threading
+import time
+
+import requests
+
+from tests.fakes import fake_client
+from verify import session as vs
+
+
+def verify_handler(cancel_errors=()):
+    counter = iter(range(1000000))
+
+    def handler(method, path, form):
+        if path == "/verify":
+            return 200, {"request_id": "r%d" % next(counter), "number": form["to"], "price": 0.1}
+        if path == "/verify/acknowledge":
+            if form["code"] == "1234":
+                return 200, {"request_id": form["request_id"], "price": 0}
+            return 400, {"error": {"code": 400, "name": "wrong code"}}
+        if path == "/verify/cancel":
+            error = dict(cancel_errors).get(form["request_id"])
+            if isinstance(error, Exception):
+                raise error
+            if error is not None:
+                return error, {"error": {"code": error, "name": "error"}}
+            return 200, {"request_id": form["request_id"]}
+        return 404, {"error": {"code": 404, "name": "not found"}}
+    return handler
+
+
+def test_expired_sessions_are_answered_locally_during_grace():
+    client = fake_client(verify_handler())
+    manager = vs.SessionManager(client, store=vs.MemoryStore(grace=3600))
+    request_id = manager.start("66812345678").result["request_id"]
+    manager.store.get(request_id).expires_at = time.time() - 1
+
+    manager.sweep()
+
+    calls = len(client.session.calls)
+    assert manager.acknowledge(request_id, "1234").result["code"] == "session_expired"
+    assert len(client.session.calls) == calls
+
+
+def test_sweep_purges_sessions_past_grace():
+    client = fake_client(verify_handler())
+    manager = vs.SessionManager(client, store=vs.MemoryStore(grace=60))
+    old = manager.start("66812345678").result["request_id"]
+    recent = manager.start("66812345679").result["request_id"]
+    manager.store._sessions[old].expires_at = time.time() - 61
+    manager.store._sessions[recent].expires_at = time.time() - 1
+
+    manager.sweep()
+
+    assert len(manager.store) == 1
+    assert old not in manager.store._sessions
+    assert manager.store._sessions[recent].state == vs.EXPIRED
+
+
+def test_failed_cancels_leave_sessions_pending():
+    client = fake_client(verify_handler({"r0": 500, "r1": requests.ReadTimeout()}))
+    manager = vs.SessionManager(client, stale_after=0)
+    ids = [manager.start(number).result["request_id"] for number in ("661", "662", "663")]
+    time.sleep(0.01)
+
+    assert manager.sweep() == ["r2"]
+
+    assert [manager.store.get(request_id).state for request_id in ids] == [vs.PENDING, vs.PENDING, vs.CANCELLED]
+    assert "request_id" in manager.acknowledge("r0", "1234").result
+
+
+def test_manual_cancel_failure_keeps_the_session():
+    client = fake_client(verify_handler({"r0": 500}))
+    manager = vs.SessionManager(client)
+    manager.start("661")
+    manager.cancel("r0")
+    assert manager.store.get("r0").state == vs.PENDING
+
+
+def test_concurrent_acknowledges_do_not_exceed_max_attempts():
+    sent = []
+    release = threading.Event()
+    handler = verify_handler()
+
+    def slow_handler(method, path, form):
+        if path == "/verify/acknowledge":
+            sent.append(form["code"])
+            release.wait(1)
+        return handler(method, path, form)
+
+    client = fake_client(slow_handler)
+    manager = vs.SessionManager(client, max_attempts=2)
+    manager.start("661")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.acknowledge("r0", "0000").result))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(sent) == 2
+    assert sum(result["code"] == "too_many_attempts" for result in results) == 3
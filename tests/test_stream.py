@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from client import stream
+
+items = [{"id": i, "text": 'quote " brace } bracket ] backslash \\ unicode é€', "tags": [i, {"n": None}]}
+         for i in range(5)]
+body = json.dumps({"total": 5, "items": items, "after": [1]}, ensure_ascii=False).encode()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(body)])
+def test_elements_are_decoded_whatever_the_chunk_boundaries(size):
+    chunks = [body[i:i + size] for i in range(0, len(body), size)]
+    assert list(stream.iter_json_array(chunks, "items")) == items
+
+
+def test_cut_element_is_not_decoded_again_on_every_chunk():
+    parser = stream.JsonArrayStream("items")
+    decoded = []
+    raw_decode = parser._json.raw_decode
+    parser._json.raw_decode = lambda *args: decoded.append(1) or raw_decode(*args)
+    for i in range(len(body)):
+        parser.feed(body[i:i + 1])
+    # One failed attempt on the chunk that cuts an element, one decode once it is complete.
+    assert len(decoded) == 2 * len(items)
+
+
+def test_malformed_element_raises_on_the_chunk_that_completes_it():
+    parser = stream.JsonArrayStream("items")
+    assert parser.feed(b'{"items": [{"id": 1}, {"id": tr') == [{"id": 1}]
+    with pytest.raises(ValueError, match="malformed"):
+        parser.feed(b'u}, {"id": 3')
+
+
+def test_non_container_element_raises():
+    with pytest.raises(ValueError, match="malformed"):
+        stream.JsonArrayStream("items").feed(b'{"items": [1, 2]}')
+
+
+def test_truncated_body_raises_on_close():
+    with pytest.raises(ValueError, match="ended"):
+        list(stream.iter_json_array([b'{"items": [{"id": 1}, {"id"'], "items"))
@@ -0,0 +1,55 @@
+import pytest
+
+from sms.template import Template, TemplateSms, iter_template_batches
+from tests.fakes import fake_client
+
+
+def test_literal_percent_and_escaped_braces():
+    template = Template("{{code}} 100% off for {name}, {name}")
+    assert template.fields == ("name",)
+    assert template.render({"name": "Ann %(x)s"}) == "{code} 100% off for Ann %(x)s, Ann %(x)s"
+
+
+@pytest.mark.parametrize("text", ["Hi {name", "Hi name}", "Hi {}"])
+def test_unmatched_braces_are_rejected(text):
+    with pytest.raises(ValueError, match="unmatched"):
+        Template(text)
+
+
+def test_recipients_are_grouped_by_text_in_batches_of_batch_size():
+    records = [{"to": str(66800000000 + i), "city": "Bangkok" if i % 3 else "Phuket"} for i in range(9)]
+    rejected = []
+    batches = list(iter_template_batches(Template("Open in {city}"), records, "to", 2, 100, rejected))
+    assert all(len(to) <= 2 for _, to in batches)
+    by_text = {}
+    for text, to in batches:
+        by_text.setdefault(text, []).extend(to)
+    assert {text: len(to) for text, to in by_text.items()} == {"Open in Bangkok": 6, "Open in Phuket": 3}
+    assert not rejected
+
+
+def test_a_number_appears_once_per_text_in_a_batch():
+    records = [{"to": "66812345678", "n": 1}, {"to": "66812345678", "n": 1}, {"to": "66812345678", "n": 2}]
+    batches = list(iter_template_batches(Template("{n}"), records, "to", 10, 100, []))
+    assert batches == [("1", ["66812345678"]), ("2", ["66812345678"])]
+
+
+def test_window_flushes_partial_batches():
+    records = [{"to": str(66800000000 + i), "n": i} for i in range(4)]
+    batches = list(iter_template_batches(Template("{n}"), records, "to", 10, 2, []))
+    assert [to for _, to in batches] == [["66800000000"], ["66800000001"], ["66800000002"], ["66800000003"]]
+
+
+def test_missing_variables_are_reported_as_bad_numbers():
+    client = fake_client()
+    records = [{"to": "66812345678", "name": "Ann"}, {"to": "66812345679"}]
+    result = TemplateSms.send(client, "Hi {name}", records)
+    assert [form["text"] for form in client.session.sends()] == ["Hi Ann"]
+    assert result.total_sms == 1
+    assert result.bad_phone_number_list == [{"number": "66812345679", "msg": "missing template variable name"}]
+    assert result.texts == {0: "Hi Ann"}
+
+
+def test_record_without_a_phone_number_is_an_error():
+    with pytest.raises(ValueError, match="'to'"):
+        TemplateSms.send(fake_client(), "Hi", [{"name": "Ann"}])
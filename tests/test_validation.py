@@ -0,0 +1,70 @@
+import pytest
+
+import validation as v
+from sms.sms import Sms
+from tests.fakes import fake_client
+from verify.verify import Verify
+
+
+@pytest.mark.parametrize("number, expected", [
+    ("66812345678", ("66812345678", None)),
+    ("+66 81-234-5678", ("66812345678", None)),
+    ("0066812345678", ("66812345678", None)),
+    ("081 234 5678", ("66812345678", None)),
+    ("+1 415 555 2671", ("14155552671", None)),
+    ("66012345678", (None, "invalid number")),
+    ("99912345678", ("99912345678", None)),
+    ("+66 8x2345678", (None, "invalid characters")),
+    ("６６８１２３４５６７８", (None, "invalid characters")),
+])
+def test_normalize(number, expected):
+    assert v.RecipientNormalizer("66").normalize(number) == expected
+
+
+def test_trunk_prefix_without_a_default_country_code_is_rejected():
+    assert v.RecipientNormalizer().normalize("0812345678") == (None, "missing country code")
+
+
+def test_clean_drops_duplicates_after_normalization():
+    valid, bad = v.RecipientNormalizer("66").clean(["0812345678", "+66812345678", "66812345678", "bad", "12"])
+    assert valid == ["66812345678"]
+    assert bad == [{"number": "bad", "msg": "invalid characters"}, {"number": "12", "msg": "invalid number"}]
+
+
+def test_clean_rejects_non_strings():
+    with pytest.raises(TypeError):
+        v.RecipientNormalizer("66").clean(["66812345678", 66812345678])
+
+
+def test_custom_rules_replace_the_defaults():
+    normalizer = v.RecipientNormalizer(rules={"66": r"8\d{8}"})
+    assert normalizer.normalize("66212345678") == (None, "invalid number")
+    assert normalizer.normalize("14155552671") == ("14155552671", None)
+
+
+def test_sms_send_reports_rejected_numbers():
+    client = fake_client(recipient_normalizer=v.RecipientNormalizer("66"))
+    result = Sms.send(client, ["0812345678", "12"], "hi").result
+    assert client.session.sends()[0]["to"] == "66812345678"
+    assert [pn["number"] for pn in result["phone_number_list"]] == ["66812345678"]
+    assert result["bad_phone_number_list"] == [{"number": "12", "msg": "invalid number"}]
+
+
+def test_sms_send_with_every_number_rejected_sends_no_request():
+    client = fake_client(recipient_normalizer=v.RecipientNormalizer())
+    result = Sms.send(client, ["0812345678"], "hi").result
+    assert not client.session.calls
+    assert result["total_sms"] == 0
+    assert result["bad_phone_number_list"] == [{"number": "0812345678", "msg": "missing country code"}]
+
+
+def test_verify_send_raises_on_rejected_numbers():
+    def handler(method, path, form):
+        return 200, {"request_id": "r1", "number": form["to"], "price": 0.1}
+
+    client = fake_client(handler, recipient_normalizer=v.RecipientNormalizer("66"))
+    assert Verify.send(client, ["081 234 5678"]).result["number"] == "66812345678"
+    with pytest.raises(v.InvalidRecipientsError) as raised:
+        Verify.send(client, ["12"])
+    assert raised.value.bad_phone_number_list == [{"number": "12", "msg": "invalid number"}]
+    assert len(client.session.calls) == 1
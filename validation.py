@@ -1,3 +1,5 @@
+import re
+from collections.abc import Iterable
 
 def validate(value:list,expected_type:list,value_names : list):
     for inx,x in enumerate(value):
@@ -9,4 +11,118 @@ def validate(value:list,expected_type:list,value_names : list):
 def validate_list(value:list,expected_type,list_name):
     for i in value:
         if not isinstance(i,expected_type):
-            raise TypeError(f"{list_name} can contain only {expected_type.__name__}")
\ No newline at end of file
+            raise TypeError(f"{list_name} can contain only {expected_type.__name__}")
+
+def validate_iterable(value,value_name):
+    if isinstance(value,(str,bytes)) or not isinstance(value,Iterable):
+        raise TypeError(f"{value_name} must be an iterable of str")
+
+# National significant number patterns by country calling code, used by RecipientNormalizer.
+# Calling codes are prefix-free, so a number matches at most one of them.
+country_rules = {
+    "1": r"[2-9]\d{2}[2-9]\d{6}",
+    "7": r"\d{10}",
+    "33": r"[1-9]\d{8}",
+    "44": r"[1-9]\d{8,9}",
+    "49": r"[1-9]\d{5,13}",
+    "60": r"1\d{8,9}|[3-9]\d{7,8}",
+    "61": r"[2-478]\d{8}",
+    "62": r"[2-9]\d{7,11}",
+    "63": r"[2-9]\d{7,9}",
+    "65": r"[3689]\d{7}",
+    "66": r"[2-9]\d{7,8}",
+    "81": r"[1-9]\d{8,9}",
+    "82": r"[1-9]\d{7,9}",
+    "84": r"[1-9]\d{7,9}",
+    "852": r"[2-9]\d{7}",
+    "86": r"1\d{10}|[2-9]\d{9,10}",
+    "91": r"[6-9]\d{9}",
+    "95": r"[1-9]\d{6,9}",
+}
+
+# Separators people write inside phone numbers.
+_number_separators = re.compile(r"[\s\-().]+")
+_any_number = re.compile(r"[1-9]\d{7,14}")
+
+
+class InvalidRecipientsError(ValueError):
+    """
+    Raised when phone numbers are rejected locally before a request.
+
+    :param bad_phone_number_list: The rejected numbers as BadNumber dictionaries ({"number", "msg"}).
+    """
+
+    def __init__(self, bad_phone_number_list):
+        super().__init__("invalid phone numbers: " + ", ".join(bad["number"] for bad in bad_phone_number_list))
+        self.bad_phone_number_list = bad_phone_number_list
+
+
+class RecipientNormalizer:
+    """
+    Normalizes phone numbers to E.164 digits (for example 66812345678) before they are sent.
+
+    Separators, a leading "+" or "00" are removed and national numbers starting with a trunk "0"
+    get default_country_code. Numbers of a calling code listed in rules must match its national
+    pattern, other numbers must have 8 to 15 digits. All patterns are compiled once, into a single
+    regular expression, when the normalizer is created. Pass it to Client or AsyncClient as
+    recipient_normalizer to check the numbers of every send.
+
+    :param default_country_code: Calling code given to national numbers, for example "66", or None to reject them.
+    :param rules: Calling code to national number pattern (default is country_rules).
+    """
+
+    def __init__(self, default_country_code=None, rules=None):
+        self.default_country_code = default_country_code
+        self.rules = dict(country_rules if rules is None else rules)
+        codes = sorted(self.rules, key=len, reverse=True)
+        self._known = re.compile("(?:" + "|".join(codes) + ")") if codes else None
+        self._valid = re.compile("|".join(f"{code}(?:{self.rules[code]})" for code in codes)) if codes else None
+
+    def normalize(self, number):
+        """
+        Returns a phone number in E.164 digits and None, or None and the reason it was rejected.
+
+        :param number: The phone number as written.
+        """
+        digits = _number_separators.sub("", number)
+        if digits.startswith("+"):
+            digits = digits[1:]
+        elif digits.startswith("00"):
+            digits = digits[2:]
+        elif digits.startswith("0"):
+            if self.default_country_code is None:
+                return None, "missing country code"
+            digits = self.default_country_code + digits[1:]
+        if not digits.isdigit() or not digits.isascii():
+            return None, "invalid characters"
+        if self._known is not None and self._known.match(digits):
+            valid = self._valid.fullmatch(digits)
+        else:
+            valid = _any_number.fullmatch(digits)
+        if valid is None:
+            return None, "invalid number"
+        return digits, None
+
+    def clean(self, numbers):
+        """
+        Normalizes a list of phone numbers in one pass, dropping duplicates and rejecting invalid numbers.
+
+        :param numbers: An iterable of phone numbers.
+        :raises TypeError: If a number is not a string.
+        :return: A (valid, bad_phone_number_list) tuple: the distinct normalized numbers in their
+            original order, and the rejected numbers as BadNumber dictionaries ({"number", "msg"}).
+        """
+        normalize = self.normalize
+        valid = []
+        bad = []
+        seen = set()
+        for number in numbers:
+            if not isinstance(number, str):
+                raise TypeError("to can contain only str")
+            normalized, msg = normalize(number)
+            if normalized is None:
+                bad.append({"number": number, "msg": msg})
+            elif normalized not in seen:
+                seen.add(normalized)
+                valid.append(normalized)
+        return valid, bad
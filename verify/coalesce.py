@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+# Seconds a completed verification is shared with identical calls by default.
+default_window = 2.0
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Coalescer:
+    """
+    Shares one verification request between identical Verify.send calls.
+
+    Calls with the same phone numbers and Params that arrive while a request is in flight wait for
+    it and get its result, and so do calls arriving up to window seconds after it succeeded, so a
+    double-tapped "send code" costs one request. Errors are shared with the calls that were waiting
+    but not kept, so the next call tries again. Works for Client and AsyncClient; pass it to either
+    as coalescer. It is safe to share between threads and event loops.
+
+    :param window: Seconds a successful result is reused after its request completed, 0 to only
+        share requests in flight.
+    """
+
+    def __init__(self, window: float = default_window):
+        self.window = window
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._async_flights = {}
+        # key -> (expires_at, result), in completion order, so expired entries are at the front.
+        self._recent = OrderedDict()
+
+    def do(self, key: Hashable, call: Callable):
+        """
+        Returns the result of call, or of an identical call in flight or completed within the window.
+
+        :param key: Identifies identical calls.
+        :param call: The zero-argument callable sending the request.
+        """
+        with self._lock:
+            result = self._recent_result(key)
+            if result is not None:
+                self.coalesced += 1
+                return result
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = call()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._remember(key, flight.result)
+            flight.done.set()
+        return flight.result
+
+    async def do_async(self, key: Hashable, call: Callable[[], Awaitable]):
+        """
+        Asynchronous version of do, where call returns an awaitable.
+
+        The request runs as a task of its own that every identical call awaits through
+        asyncio.shield, so cancelling one call, including the first, only cancels that call.
+
+        :param key: Identifies identical calls.
+        :param call: The zero-argument callable returning the awaitable that sends the request.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            result = self._recent_result(key)
+            if result is not None:
+                self.coalesced += 1
+                return result
+            task = self._async_flights.get((loop, key))
+            if task is None:
+                task = self._async_flights[(loop, key)] = loop.create_task(self._fly(loop, key, call))
+                task.add_done_callback(_retrieve)
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fly(self, loop, key: Hashable, call: Callable[[], Awaitable]):
+        result = None
+        try:
+            result = await call()
+            return result
+        finally:
+            with self._lock:
+                del self._async_flights[(loop, key)]
+                if result is not None:
+                    self._remember(key, result)
+
+    def _recent_result(self, key: Hashable):
+        # Called with the lock held.
+        now = time.monotonic()
+        recent = self._recent
+        while recent:
+            oldest = next(iter(recent))
+            if recent[oldest][0] > now:
+                break
+            del recent[oldest]
+        entry = recent.get(key)
+        return entry[1] if entry is not None else None
+
+    def _remember(self, key: Hashable, result):
+        # Called with the lock held. Error results are not shared with later calls.
+        if self.window <= 0 or not succeeded(result):
+            return
+        self._recent.pop(key, None)
+        self._recent[key] = (time.monotonic() + self.window, result)
+
+
+def _retrieve(task: asyncio.Task):
+    # Marks the exception as retrieved in case every call waiting for it was cancelled.
+    if not task.cancelled():
+        task.exception()
+
+
+def succeeded(verify) -> bool:
+    result = verify.result
+    return not (isinstance(result, dict) and "request_id" not in result)
+
+
+def request_key(data: dict) -> tuple:
+    """Returns the coalescing key of verify request data: every field but the API secret."""
+    return tuple(sorted((name, value) for name, value in data.items() if name != "api_secret"))
@@ -0,0 +1,388 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import validation as v
+
+from client import client as c
+from verify import verify as vf
+
+# Movider defaults, in seconds, used when Params leaves pin_expire or next_event_wait unset.
+default_pin_expire = 300
+default_next_event_wait = 300
+
+PENDING = "pending"
+VERIFIED = "verified"
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+
+# Results returned instead of calling the API when a session makes the call pointless.
+session_expired = {"code": "session_expired", "name": "verification code expired"}
+session_verified = {"code": "session_verified", "name": "verification already succeeded"}
+session_cancelled = {"code": "session_cancelled", "name": "verification was cancelled"}
+too_many_attempts = {"code": "too_many_attempts", "name": "too many wrong codes"}
+
+
+class Session:
+    """
+    Local state of one verification request.
+
+    Times are time.time() timestamps so that sessions can be shared between processes.
+    """
+    __slots__ = ("request_id", "number", "created", "expires_at", "next_event_at", "attempts", "state")
+
+    def __init__(self, request_id: str, number: str, created: float, expires_at: float, next_event_at: float,
+                 attempts: int = 0, state: str = PENDING):
+        self.request_id = request_id
+        self.number = number
+        self.created = created
+        self.expires_at = expires_at
+        self.next_event_at = next_event_at
+        self.attempts = attempts
+        self.state = state
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires_at
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class MemoryStore:
+    """
+    Keeps sessions in memory, dropping the least recently used ones above max_sessions. Sessions
+    past their expiry plus grace seconds are dropped when they are read, and all at once by
+    purge(), which SessionManager.sweep calls. Safe to share between threads.
+
+    :param max_sessions: Maximum number of sessions kept.
+    :param grace: Seconds a session is kept after it expired, so late acknowledgements are still answered locally.
+    """
+
+    def __init__(self, max_sessions: int = 100000, grace: float = 3600):
+        self.max_sessions = max_sessions
+        self.grace = grace
+        self._sessions = OrderedDict()
+        self._numbers = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, request_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(request_id)
+            if session is None:
+                return None
+            if time.time() >= session.expires_at + self.grace:
+                self._remove(session)
+                return None
+            self._sessions.move_to_end(request_id)
+            return session
+
+    def get_by_number(self, number: str) -> Optional[Session]:
+        with self._lock:
+            request_id = self._numbers.get(number)
+        return self.get(request_id) if request_id is not None else None
+
+    def put(self, session: Session):
+        with self._lock:
+            self._sessions[session.request_id] = session
+            self._sessions.move_to_end(session.request_id)
+            if session.state == PENDING:
+                self._numbers[session.number] = session.request_id
+            elif self._numbers.get(session.number) == session.request_id:
+                del self._numbers[session.number]
+            while len(self._sessions) > self.max_sessions:
+                self._remove(next(iter(self._sessions.values())))
+
+    def delete(self, request_id: str):
+        with self._lock:
+            session = self._sessions.get(request_id)
+            if session is not None:
+                self._remove(session)
+
+    def add_attempt(self, session: Session) -> int:
+        """Counts one more code attempt of a session atomically and returns the new count."""
+        with self._lock:
+            session = self._sessions.get(session.request_id, session)
+            session.attempts += 1
+            return session.attempts
+
+    def pending_before(self, created: float) -> List[Session]:
+        """Returns the pending sessions created before a time.time() timestamp."""
+        with self._lock:
+            return [session for session in self._sessions.values()
+                    if session.state == PENDING and session.created < created]
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drops the sessions past their expiry plus grace seconds and returns how many were dropped."""
+        limit = (time.time() if now is None else now) - self.grace
+        with self._lock:
+            gone = [session for session in self._sessions.values() if session.expires_at <= limit]
+            for session in gone:
+                self._remove(session)
+        return len(gone)
+
+    def _remove(self, session: Session):
+        del self._sessions[session.request_id]
+        if self._numbers.get(session.number) == session.request_id:
+            del self._numbers[session.number]
+
+
+class RedisStore:
+    """
+    Keeps sessions in Redis, so that several processes share them. Works with any client exposing
+    the redis-py methods get, set, delete, incr, expire, zadd, zrem and zrangebyscore. Attempts are
+    counted in a key of their own with INCR, so concurrent acknowledgements cannot lose a count.
+
+    :param redis: The Redis client, for example redis.Redis().
+    :param prefix: Prefix of the keys used.
+    :param grace: Seconds a session is kept after it expired.
+    """
+
+    def __init__(self, redis, prefix: str = "movider:verify:", grace: float = 3600):
+        self.redis = redis
+        self.prefix = prefix
+        self.grace = grace
+
+    def get(self, request_id: str) -> Optional[Session]:
+        data = self.redis.get(self.prefix + "session:" + request_id)
+        if data is None:
+            return None
+        session = Session(**json.loads(data))
+        attempts = self.redis.get(self.prefix + "attempts:" + request_id)
+        if attempts is not None:
+            session.attempts = int(attempts)
+        return session
+
+    def get_by_number(self, number: str) -> Optional[Session]:
+        request_id = self.redis.get(self.prefix + "number:" + number)
+        if request_id is None:
+            return None
+        return self.get(request_id.decode() if isinstance(request_id, bytes) else request_id)
+
+    def put(self, session: Session):
+        ttl = max(1, int(session.expires_at + self.grace - time.time()))
+        self.redis.set(self.prefix + "session:" + session.request_id, json.dumps(session.to_dict()), ex=ttl)
+        number_key = self.prefix + "number:" + session.number
+        if session.state == PENDING:
+            self.redis.set(number_key, session.request_id, ex=ttl)
+            self.redis.zadd(self.prefix + "pending", {session.request_id: session.created})
+        else:
+            current = self.redis.get(number_key)
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == session.request_id:
+                self.redis.delete(number_key)
+            self.redis.zrem(self.prefix + "pending", session.request_id)
+
+    def delete(self, request_id: str):
+        session = self.get(request_id)
+        self.redis.delete(self.prefix + "session:" + request_id)
+        self.redis.delete(self.prefix + "attempts:" + request_id)
+        self.redis.zrem(self.prefix + "pending", request_id)
+        if session is not None:
+            self.redis.delete(self.prefix + "number:" + session.number)
+
+    def add_attempt(self, session: Session) -> int:
+        """Counts one more code attempt of a session atomically and returns the new count."""
+        key = self.prefix + "attempts:" + session.request_id
+        attempts = self.redis.incr(key)
+        self.redis.expire(key, max(1, int(session.expires_at + self.grace - time.time())))
+        session.attempts = attempts
+        return attempts
+
+    def pending_before(self, created: float) -> List[Session]:
+        sessions = []
+        for request_id in self.redis.zrangebyscore(self.prefix + "pending", "-inf", f"({created}"):
+            request_id = request_id.decode() if isinstance(request_id, bytes) else request_id
+            session = self.get(request_id)
+            if session is None:
+                self.redis.zrem(self.prefix + "pending", request_id)
+            elif session.state == PENDING:
+                sessions.append(session)
+        return sessions
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Does nothing and returns 0: Redis expires the keys of a session once its grace has passed."""
+        return 0
+
+
+class SessionManager:
+    """
+    Tracks verification requests locally so that pointless verify API calls are not made.
+
+    start() reuses the pending session of a number until its next_event_wait has passed instead of
+    sending another code. acknowledge() answers locally for sessions that are expired, verified,
+    cancelled or out of attempts; every code sent to the API counts as an attempt, reserved
+    atomically in the store before the call, so concurrent acknowledgements cannot exceed
+    max_attempts. sweep() cancels the pending sessions older than stale_after, a batch at a time;
+    run it periodically, or call start_sweeper().
+
+    :param client: A Client object containing API authentication details.
+    :param store: Where sessions are kept (default is a MemoryStore).
+    :param params: Default Params of start().
+    :param max_attempts: Maximum number of wrong codes per session, None for no limit.
+    :param stale_after: Seconds after which an unacknowledged session is cancelled by sweep(),
+        None to only cancel sessions that expired.
+    """
+
+    def __init__(self, client: c.Client, store=None, params: Optional[vf.Params] = None,
+                 max_attempts: Optional[int] = None, stale_after: Optional[float] = None):
+        v.validate([client],[c.Client],["client"])
+        self.client = client
+        self.store = store if store is not None else MemoryStore()
+        self.params = params
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def start(self, to: str, params: Optional[vf.Params] = None, timeout=None, deadline=None) -> vf.Verify:
+        """
+        Sends a verification code to a phone number, unless a pending session of that number is
+        still within its next_event_wait, in which case its request is returned without a call.
+
+        :param to: The phone number.
+        :param params: Optional Params, overriding the manager's.
+        :return: A Verify object; for a reused session its result is {"request_id", "number", "price": 0}.
+        """
+        v.validate([to],[str],["to"])
+        now = time.time()
+        session = self.store.get_by_number(to)
+        if session is not None and session.state == PENDING and now < session.next_event_at:
+            return vf.Verify(result={"request_id": session.request_id, "number": session.number, "price": 0})
+        params = params if params is not None else self.params
+        verify = vf.Verify.send(self.client, [to], params, timeout, deadline)
+        result = verify.result
+        request_id = result.get("request_id") if isinstance(result, dict) else getattr(result, "request_id", None)
+        if request_id is not None:
+            pin_expire = params.pin_expire if params is not None and params.pin_expire is not None \
+                else default_pin_expire
+            next_event_wait = params.next_event_wait if params is not None and params.next_event_wait is not None \
+                else default_next_event_wait
+            self.store.put(Session(request_id, to, now, now + pin_expire, now + next_event_wait))
+        return verify
+
+    def acknowledge(self, request_id: str, code: str, timeout=None, deadline=None) -> vf.VerifyAcknowledge:
+        """
+        Checks the code entered by the user, without an API call if the session cannot succeed.
+
+        :param request_id: The request_id returned by start().
+        :param code: The code entered by the user.
+        :return: A VerifyAcknowledge object; its result is one of the session_* errors when answered locally.
+        """
+        v.validate([request_id,code],[str,str],["request_id","code"])
+        session = self.store.get(request_id)
+        if session is not None:
+            error = self._local_error(session)
+            if error is not None:
+                return vf.VerifyAcknowledge(result=dict(error))
+            attempts = self.store.add_attempt(session)
+            if self.max_attempts is not None and attempts > self.max_attempts:
+                return vf.VerifyAcknowledge(result=dict(too_many_attempts))
+        acknowledge = vf.VerifyAcknowledge.send(self.client, request_id, code, timeout, deadline)
+        if session is not None and not failed(acknowledge.result):
+            session.state = VERIFIED
+            self.store.put(session)
+        return acknowledge
+
+    def cancel(self, request_id: str, timeout=None, deadline=None) -> vf.VerifyCancel:
+        """
+        Cancels a verification request and its session.
+
+        :param request_id: The request_id returned by start().
+        :return: A VerifyCancel object.
+        """
+        v.validate([request_id],[str],["request_id"])
+        cancel = vf.VerifyCancel.send(self.client, request_id, timeout, deadline)
+        if not failed(cancel.result):
+            session = self.store.get(request_id)
+            if session is not None:
+                session.state = CANCELLED
+                self.store.put(session)
+        return cancel
+
+    def sweep(self, max_workers: int = 4, timeout=None) -> List[str]:
+        """
+        Cancels stale pending sessions and marks expired ones, which the store keeps for its grace
+        period so late acknowledgements are still answered locally, then purges the sessions past
+        it from the store. A session whose cancel request fails stays pending and is tried again
+        by the next sweep.
+
+        :param max_workers: Maximum number of cancel requests in flight at the same time.
+        :return: The request_ids that were cancelled.
+        """
+        now = time.time()
+        stale_before = now - self.stale_after if self.stale_after is not None else now
+        stale = []
+        for session in self.store.pending_before(stale_before):
+            if session.expired(now):
+                # The API already dropped it; cancelling would be a wasted call.
+                session.state = EXPIRED
+                self.store.put(session)
+            elif self.stale_after is not None:
+                stale.append(session)
+        self.store.purge(now)
+        if not stale:
+            return []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            cancels = list(executor.map(lambda session: self._cancel_stale(session, timeout), stale))
+        cancelled = []
+        for session, cancel in zip(stale, cancels):
+            if cancel is not None and not failed(cancel.result):
+                session.state = CANCELLED
+                self.store.put(session)
+                cancelled.append(session.request_id)
+        return cancelled
+
+    def start_sweeper(self, interval: float = 60):
+        """
+        Runs sweep() every interval seconds on a daemon thread until stop_sweeper() is called.
+
+        :param interval: Seconds between sweeps.
+        """
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception:
+                    # Keep sweeping; a failed sweep leaves the sessions for the next one.
+                    pass
+
+        self._sweeper = threading.Thread(target=run, name="VerifySweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stops the thread started by start_sweeper()."""
+        if self._sweeper is not None:
+            self._stop.set()
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _cancel_stale(self, session: Session, timeout) -> Optional[vf.VerifyCancel]:
+        # One failed cancel must not abort the sweep of the others.
+        try:
+            return vf.VerifyCancel.send(self.client, session.request_id, timeout)
+        except Exception:
+            return None
+
+    def _local_error(self, session: Session) -> Optional[dict]:
+        if session.state == VERIFIED:
+            return session_verified
+        if session.state == CANCELLED:
+            return session_cancelled
+        if session.state == EXPIRED or session.expired():
+            return session_expired
+        if self.max_attempts is not None and session.attempts >= self.max_attempts:
+            return too_many_attempts
+        return None
+
+
+def failed(result) -> bool:
+    # API results are dictionaries with a request_id (or compact tuples); errors have neither.
+    return isinstance(result, dict) and "request_id" not in result
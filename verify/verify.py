@@ -1,8 +1,7 @@
-import json
 from client import client as c
-from typing import List, Optional
+from verify.coalesce import request_key
+from typing import List, NamedTuple, Optional
 import validation as v
-import requests
 
 verifyURIPath = "/verify"
 verifyACKURIPath = "/verify/acknowledge"
@@ -26,6 +25,33 @@ class ResultCancel:
         self.request_id = request_id
 
 
+class CompactResultVerify(NamedTuple):
+    """Tuple-backed ResultVerify returned when the client has compact_results enabled."""
+    request_id: str
+    number: str
+    price: float
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class CompactResultAcknowledge(NamedTuple):
+    """Tuple-backed ResultAcknowledge returned when the client has compact_results enabled."""
+    request_id: str
+    price: float
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class CompactResultCancel(NamedTuple):
+    """Tuple-backed ResultCancel returned when the client has compact_results enabled."""
+    request_id: str
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
 class Params:
     def __init__(self, code_length: Optional[int] = None, language: Optional[str] = None,
                  next_event_wait: Optional[int] = None, pin_expire: Optional[int] = None,
@@ -47,7 +73,7 @@ class Verify:
         """
         self.result = result
     def send(
-        client: c.Client, to: List[str], params: Optional[Params] = None):
+        client: c.Client, to: List[str], params: Optional[Params] = None, timeout=None, deadline=None):
         
         """
         Sends a verification request to one or more phone numbers.
@@ -55,36 +81,85 @@ class Verify:
         :param client: A Client object containing API authentication details.
         :param to: A list of phone numbers to which the verification code will be sent.
         :param params: Optional Params object containing additional verification request parameters.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
         :raises TypeError: If client parameter is not an instance of Client class or if to parameter is not a list.
         :raises ValueError: If to parameter is an empty list.
+        :raises validation.InvalidRecipientsError: If the client has a recipient_normalizer and it rejects a number.
         :return: A Verify object containing the result of the verification request.
         """
         
         v.validate([client,to],[c.Client,list],["client","to"])
         v.validate_list(to,str,"to")
+        to = clean_recipients(client, to)
+        if params is None:
+            params = Params()
+
+        data = make_send_request_data(client, to, params)
+
+        url = client.endpoint + verifyURIPath
+
+        def send():
+            response = client.request(url, client.content_type_json, data, timeout=timeout, deadline=deadline)
+            return verify_from_response(response, client)
+
+        if client.coalescer is not None:
+            return client.coalescer.do(request_key(data), send)
+        return send()
+
+    async def send_async(
+        client: c.AsyncClient, to: List[str], params: Optional[Params] = None, timeout=None, deadline=None):
+        """
+        Asynchronous version of Verify.send using an AsyncClient.
+
+        :param client: An AsyncClient object containing API authentication details.
+        :param to: A list of phone numbers to which the verification code will be sent.
+        :param params: Optional Params object containing additional verification request parameters.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+        :return: A Verify object containing the result of the verification request.
+        """
+        v.validate([client,to],[c.AsyncClient,list],["client","to"])
+        v.validate_list(to,str,"to")
+        to = clean_recipients(client, to)
         if params is None:
             params = Params()
 
         data = make_send_request_data(client, to, params)
 
         url = client.endpoint + verifyURIPath
-        response = client.request(url, client.content_type_json, data)
 
-        status_code = response["code"]
-        body_byte = response["content"]
+        async def send():
+            response = await client.request(url, client.content_type_json, data, timeout=timeout, deadline=deadline)
+            return verify_from_response(response, client)
 
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return Verify(result=error)
+        if client.coalescer is not None:
+            return await client.coalescer.do_async(request_key(data), send)
+        return await send()
 
-        result = json.loads(body_byte)
-        result = ResultVerify(
-            request_id=result["request_id"], number=result["number"], price=result["price"])
-        return Verify(result=result.__dict__)
 
+def verify_from_response(response: dict, client=None) -> Verify:
+    error = c.error_from_response(response)
+    if error is not None:
+        return Verify(result=error)
+    result = c.decode_json(response["content"], client)
+    if client is not None and client.compact_results:
+        return Verify(result=CompactResultVerify(result["request_id"], result["number"], result["price"]))
+    result = ResultVerify(
+        request_id=result["request_id"], number=result["number"], price=result["price"])
+    return Verify(result=result.__dict__)
 
-def make_send_request_data(client: c.Client, to: List[str], params: Optional[Params] = None) -> dict:
+
+def clean_recipients(client, to: List[str]) -> List[str]:
+    if client.recipient_normalizer is None:
+        return to
+    to, rejected = client.recipient_normalizer.clean(to)
+    if rejected:
+        raise v.InvalidRecipientsError(rejected)
+    return to
+
+
+def make_send_request_data(client, to: List[str], params: Optional[Params] = None) -> dict:
     data = {"api_key": client.api_key,
             "api_secret": client.api_secret, 'to':  ",".join(to)}
     if params is not None:
@@ -112,13 +187,15 @@ class VerifyAcknowledge:
         """
         self.result = result
 
-    def send(client: c.Client, requested_id : str, code : str):
+    def send(client: c.Client, requested_id : str, code : str, timeout=None, deadline=None):
         """
         Verify the code entered by the user for the given request ID.
 
         :param client: A Client object containing API authentication details.
         :param requested_id: A string containing the ID of the request to be acknowledged.
         :param code: A string containing the code to be verified.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
         :raises TypeError: If client parameter is not an instance of Client class or if requested_id or code is not a string.
         :raises ValueError: If requested_id or code is empty.
         :return: A VerifyAcknowledge object containing the acknowledge information.
@@ -128,23 +205,42 @@ class VerifyAcknowledge:
             request_id=requested_id, code=code)
 
         url = client.endpoint + verifyACKURIPath
-        response = client.request(url, client.content_type_json, data)
+        response = client.request(url, client.content_type_json, data, timeout=timeout, deadline=deadline)
+        return acknowledge_from_response(response, client)
+
+    async def send_async(client: c.AsyncClient, requested_id : str, code : str, timeout=None, deadline=None):
+        """
+        Asynchronous version of VerifyAcknowledge.send using an AsyncClient.
+
+        :param client: An AsyncClient object containing API authentication details.
+        :param requested_id: A string containing the ID of the request to be acknowledged.
+        :param code: A string containing the code to be verified.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+        :return: A VerifyAcknowledge object containing the acknowledge information.
+        """
+        v.validate([client,requested_id,code],[c.AsyncClient,str,str],["client","requested_id","code"])
+        data = make_acknowledge_request_data(client,
+            request_id=requested_id, code=code)
 
-        status_code = response["code"]
-        body_byte = response["content"]
+        url = client.endpoint + verifyACKURIPath
+        response = await client.request(url, client.content_type_json, data, timeout=timeout, deadline=deadline)
+        return acknowledge_from_response(response, client)
 
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return VerifyAcknowledge(result=error)
 
-        result = json.loads(body_byte)
-        result = ResultAcknowledge(
-            request_id=result["request_id"], price=result["price"])
-        return VerifyAcknowledge(result=result.__dict__)
+def acknowledge_from_response(response: dict, client=None) -> VerifyAcknowledge:
+    error = c.error_from_response(response)
+    if error is not None:
+        return VerifyAcknowledge(result=error)
+    result = c.decode_json(response["content"], client)
+    if client is not None and client.compact_results:
+        return VerifyAcknowledge(result=CompactResultAcknowledge(result["request_id"], result["price"]))
+    result = ResultAcknowledge(
+        request_id=result["request_id"], price=result["price"])
+    return VerifyAcknowledge(result=result.__dict__)
 
 
-def make_acknowledge_request_data(client:c.Client,request_id: str, code: str) -> dict:
+def make_acknowledge_request_data(client,request_id: str, code: str) -> dict:
     return {"api_key": client.api_key,
             "api_secret": client.api_secret,
             'request_id': request_id, 'code': code}
@@ -159,32 +255,56 @@ class VerifyCancel:
         """
         self.result = result
 
-    def send(client: c.Client, requested_id):
+    def send(client: c.Client, requested_id, timeout=None, deadline=None):
         """
         Sends a cancelation request for a specific verification request.
 
         :param client: A Client object containing API authentication details.
         :param requested_id: A string containing the ID of the verification request to be cancelled.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
         :raises TypeError: If client parameter is not an instance of Client class, or if requested_id is not a string.
         :raises ValueError: If requested_id is an empty string.
         :return: A VerifyCancel object containing the results of the cancelation request.
         """
         v.validate([client,requested_id],[c.Client,str],["client","requested_id"])
-        data = {"api_key": client.api_key,
-                "api_secret": client.api_secret, "request_id": requested_id}
+        data = make_cancel_request_data(client, requested_id)
+
+        url = client.endpoint + verifyCXLURIPath
+        response = client.request(url, client.content_type_json, data, timeout=timeout, deadline=deadline)
+        return cancel_from_response(response, client)
+
+    async def send_async(client: c.AsyncClient, requested_id, timeout=None, deadline=None):
+        """
+        Asynchronous version of VerifyCancel.send using an AsyncClient.
+
+        :param client: An AsyncClient object containing API authentication details.
+        :param requested_id: A string containing the ID of the verification request to be cancelled.
+        :param timeout: Optional per-call timeout in seconds or (connect, read) tuple, overriding the client defaults.
+        :param deadline: Optional absolute deadline (see client.deadline_after) for the whole call, including retries.
+        :return: A VerifyCancel object containing the results of the cancelation request.
+        """
+        v.validate([client,requested_id],[c.AsyncClient,str],["client","requested_id"])
+        data = make_cancel_request_data(client, requested_id)
 
         url = client.endpoint + verifyCXLURIPath
-        response = client.request(url, client.content_type_json, data)
+        response = await client.request(url, client.content_type_json, data, timeout=timeout, deadline=deadline)
+        return cancel_from_response(response, client)
+
+
+def make_cancel_request_data(client, request_id: str) -> dict:
+    return {"api_key": client.api_key,
+            "api_secret": client.api_secret, "request_id": request_id}
 
-        status_code = response["code"]
-        body_byte = response["content"]
 
-        if status_code != requests.codes.OK:
-            result = json.loads(body_byte)
-            error = result["error"]
-            return VerifyCancel(result=error)
+def cancel_from_response(response: dict, client=None) -> VerifyCancel:
+    error = c.error_from_response(response)
+    if error is not None:
+        return VerifyCancel(result=error)
+    result = c.decode_json(response["content"], client)
+    if client is not None and client.compact_results:
+        return VerifyCancel(result=CompactResultCancel(result["request_id"]))
+    result = ResultCancel(
+        request_id=result["request_id"])
+    return VerifyCancel(result=result.__dict__)
 
-        result = json.loads(body_byte)
-        result = ResultCancel(
-            request_id=result["request_id"])
-        return VerifyCancel(result=result.__dict__)